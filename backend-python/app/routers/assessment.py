@@ -4,19 +4,61 @@ FastAPI router for the dyslexia screening assessment endpoints.
 
 from fastapi import APIRouter, HTTPException
 from datetime import datetime
-import firebase_admin
-from firebase_admin import firestore
+from typing import List
+from pydantic import ValidationError
 
 from app.schemas.assessment import (
     AssessmentSubmitRequest,
     AssessmentResponse,
     AssessmentStartResponse,
+    AssessmentBatchRequest,
+    AssessmentBatchItem,
+    AssessmentBatchResponse,
+    QuestionnaireAnswer,
     SeverityResult,
 )
-from app.services.severity_model import predict_severity
+from app.services.document_store import SERVER_TIMESTAMP
+from app.services.repositories import assessments
+from app.services.severity_model import predict_severity, predict_severity_batch
 
 router = APIRouter(prefix="/assessment", tags=["Assessment"])
 
+SEVERITY_MESSAGES = {
+    "none": "Great news! No significant dyslexia indicators were found. Keep up the amazing work!",
+    "mild": "Some mild indicators were found. A personalized plan will help you improve quickly.",
+    "moderate": "Moderate indicators detected. Your custom learning path is ready — you have got this!",
+    "severe": "Significant indicators found. We will support you every step of the way.",
+}
+
+
+def _questionnaire_score(answers: List[QuestionnaireAnswer]) -> float:
+    """Weighted questionnaire score (0-100); morphology questions 6 and 7 count 1.5x."""
+    WEIGHTS = {6: 1.5, 7: 1.5}
+    weighted_sum = sum(a.answer * WEIGHTS.get(a.question_id, 1.0) for a in answers)
+    max_possible = sum(5 * WEIGHTS.get(a.question_id, 1.0) for a in answers)
+    return round((weighted_sum / max_possible) * 100, 2)
+
+
+def _assessment_doc(request: AssessmentSubmitRequest, severity_result: dict, questionnaire_score: float) -> dict:
+    """Firestore document for one scored assessment."""
+    return {
+        "user_id": request.user_id,
+        "questionnaire_answers": [a.model_dump() for a in request.questionnaire_answers],
+        "task_results": [t.model_dump() for t in request.task_results],
+        "questionnaire_score": questionnaire_score,
+        "severity_label": severity_result["label"],
+        "severity_score": severity_result["score"],
+        "severity_probability": severity_result["probability"],
+        "group_scores": severity_result["group_scores"],
+        "weakest_areas": severity_result["weakest_areas"],
+        "recommendations": severity_result["recommendations"],
+        "age": request.age,
+        "gender": request.gender,
+        "native_english": request.native_english,
+        "total_duration_seconds": request.total_duration_seconds,
+        "created_at": SERVER_TIMESTAMP,
+    }
+
 
 @router.get("/start", response_model=AssessmentStartResponse)
 async def start_assessment():
@@ -38,15 +80,7 @@ async def submit_assessment(request: AssessmentSubmitRequest):
         )
 
     # Step 2 — compute weighted questionnaire score (0-100)
-    WEIGHTS = {6: 1.5, 7: 1.5}
-    weighted_sum = sum(
-        a.answer * WEIGHTS.get(a.question_id, 1.0)
-        for a in request.questionnaire_answers
-    )
-    max_possible = sum(
-        5 * WEIGHTS.get(a.question_id, 1.0) for a in request.questionnaire_answers
-    )
-    questionnaire_score = round((weighted_sum / max_possible) * 100, 2)
+    questionnaire_score = _questionnaire_score(request.questionnaire_answers)
 
     # Step 3 — run ML prediction
     try:
@@ -63,37 +97,12 @@ async def submit_assessment(request: AssessmentSubmitRequest):
         raise HTTPException(status_code=500, detail="Error processing assessment results")
 
     # Step 4 — personalised message
-    messages = {
-        "none": "Great news! No significant dyslexia indicators were found. Keep up the amazing work!",
-        "mild": "Some mild indicators were found. A personalized plan will help you improve quickly.",
-        "moderate": "Moderate indicators detected. Your custom learning path is ready — you have got this!",
-        "severe": "Significant indicators found. We will support you every step of the way.",
-    }
-    message = messages.get(severity_result["label"], "Assessment complete.")
+    message = SEVERITY_MESSAGES.get(severity_result["label"], "Assessment complete.")
 
     # Step 5 — save to Firestore
     try:
-        db = firestore.client()
-        doc_data = {
-            "user_id": request.user_id,
-            "questionnaire_answers": [a.model_dump() for a in request.questionnaire_answers],
-            "task_results": [t.model_dump() for t in request.task_results],
-            "questionnaire_score": questionnaire_score,
-            "severity_label": severity_result["label"],
-            "severity_score": severity_result["score"],
-            "severity_probability": severity_result["probability"],
-            "group_scores": severity_result["group_scores"],
-            "weakest_areas": severity_result["weakest_areas"],
-            "recommendations": severity_result["recommendations"],
-            "age": request.age,
-            "gender": request.gender,
-            "native_english": request.native_english,
-            "total_duration_seconds": request.total_duration_seconds,
-            "created_at": firestore.SERVER_TIMESTAMP,
-        }
-        doc_ref = db.collection("assessments").document()
-        doc_ref.set(doc_data)
-        assessment_id = doc_ref.id
+        saved = await assessments.create(_assessment_doc(request, severity_result, questionnaire_score))
+        assessment_id = saved["id"]
     except Exception as e:
         print(f"Firestore save error: {e}")
         assessment_id = "local_" + datetime.utcnow().strftime("%Y%m%d%H%M%S")
@@ -107,3 +116,76 @@ async def submit_assessment(request: AssessmentSubmitRequest):
         message=message,
         created_at=datetime.utcnow().isoformat(),
     )
+
+
+@router.post("/submit-batch", response_model=AssessmentBatchResponse)
+async def submit_assessment_batch(request: AssessmentBatchRequest):
+    """Score a whole class in one model call and save all results in batched Firestore writes.
+
+    Invalid submissions are reported per item; they do not fail the batch.
+    """
+    items: List[AssessmentBatchItem] = [None] * len(request.submissions)
+    valid: List[tuple] = []
+
+    # Step 1 — validate each submission independently
+    for i, raw in enumerate(request.submissions):
+        try:
+            valid.append((i, AssessmentSubmitRequest.model_validate(raw)))
+        except ValidationError as e:
+            items[i] = AssessmentBatchItem(index=i, ok=False, error=str(e))
+
+    # Step 2 — one feature matrix, one vectorized predict_proba
+    try:
+        predictions = predict_severity_batch([
+            {
+                "task_results": [t.model_dump() for t in sub.task_results],
+                "age": sub.age,
+                "gender": sub.gender,
+                "native_english": sub.native_english,
+            }
+            for _, sub in valid
+        ]) if valid else []
+    except FileNotFoundError:
+        raise HTTPException(status_code=503, detail="ML model not available. Contact support.")
+    except Exception as e:
+        print(f"ML batch prediction error: {e}")
+        raise HTTPException(status_code=500, detail="Error processing assessment results")
+
+    # Step 3 — queue every successful result for batched Firestore writes
+    scored = []
+    for (i, sub), severity_result in zip(valid, predictions):
+        if "error" in severity_result:
+            items[i] = AssessmentBatchItem(index=i, ok=False, error=severity_result["error"])
+            continue
+        scored.append((i, sub, severity_result, _questionnaire_score(sub.questionnaire_answers)))
+
+    assessment_ids = {}
+    try:
+        # One commit per 500 documents
+        ids = await assessments.create_many([
+            _assessment_doc(sub, severity_result, q_score) for _, sub, severity_result, q_score in scored
+        ])
+        assessment_ids = {i: doc_id for (i, *_), doc_id in zip(scored, ids)}
+    except Exception as e:
+        print(f"Firestore batch save error: {e}")
+        stamp = datetime.utcnow().strftime("%Y%m%d%H%M%S")
+        assessment_ids = {i: f"local_{stamp}_{i}" for i, *_ in scored}
+
+    # Step 4 — build per-item responses
+    created_at = datetime.utcnow().isoformat()
+    for i, sub, severity_result, q_score in scored:
+        items[i] = AssessmentBatchItem(
+            index=i,
+            ok=True,
+            assessment=AssessmentResponse(
+                assessment_id=assessment_ids[i],
+                user_id=sub.user_id,
+                severity=SeverityResult(**severity_result),
+                questionnaire_score=q_score,
+                message=SEVERITY_MESSAGES.get(severity_result["label"], "Assessment complete."),
+                created_at=created_at,
+            ),
+        )
+
+    succeeded = sum(1 for item in items if item.ok)
+    return AssessmentBatchResponse(results=items, succeeded=succeeded, failed=len(items) - succeeded)
@@ -0,0 +1,248 @@
+"""
+FastAPI router for audio transcription (AssemblyAI or the local engine).
+
+/api/transcribe-audio keeps the original request/response contract and holds
+the request open until the transcript is ready. /api/transcriptions is the
+asynchronous variant: it streams the upload to AssemblyAI, queues a
+background job and returns its ID at once; the client follows progress over
+Server-Sent Events (or polls /api/jobs/{jobId}).
+
+Which backend runs is decided by TRANSCRIPTION_ROUTING (see
+app/services/transcription_backends.py). With AssemblyAI only and chunking
+off, uploads are streamed straight through; otherwise the upload is spooled
+to a temp file first so its duration can be probed and long recordings split
+into chunks transcribed in parallel.
+"""
+
+import asyncio
+import hmac
+import json
+import os
+import time
+from typing import Optional
+
+from fastapi import APIRouter, File, HTTPException, Request, UploadFile
+from fastapi.responses import StreamingResponse
+
+from app.services import assemblyai
+from app.services.job_queue import ACTIVE_STATES, COMPLETED, FAILED, Job, QueueFullError, get_job_queue
+from app.services.sse import SSE_HEADERS, format_sse
+from app.services.transcription_backends import (
+    TranscriptionResult,
+    get_backend,
+    metrics_snapshot,
+    needs_audio_file,
+    transcribe_path,
+)
+from app.services.uploads import MAX_AUDIO_UPLOAD_BYTES, SpooledUpload, UploadTooLarge, iter_upload, spool_upload
+
+router = APIRouter(prefix="/api", tags=["Transcription"])
+
+TRANSCRIBE_JOB = "transcribe_audio"
+# Background jobs may run much longer than the synchronous endpoint's 5 minutes
+TRANSCRIPTION_TIMEOUT_SECONDS = float(os.getenv("TRANSCRIPTION_TIMEOUT_SECONDS", "1800"))
+EVENTS_POLL_SECONDS = 0.5
+EVENTS_KEEPALIVE_SECONDS = 15.0
+
+
+async def spool_audio(file: UploadFile) -> SpooledUpload:
+    """Copy the upload to a temp file (always on disk, so a pool process can open it)."""
+    suffix = os.path.splitext(file.filename or "")[1]
+    upload = await spool_upload(file, MAX_AUDIO_UPLOAD_BYTES, memory_threshold=-1, suffix=suffix)
+    if upload.path is None:
+        raise HTTPException(status_code=400, detail="Audio file is empty")
+    return upload
+
+
+def transcription_response(result: TranscriptionResult, timestamps: bool = False) -> dict:
+    response = result.summary()
+    if timestamps:
+        response.update({
+            "wordTimestamps": result.words,
+            "duration": result.duration_seconds,
+            "backend": result.backend,
+            "chunks": result.chunks,
+        })
+    return response
+
+
+@router.post("/transcribe-audio")
+async def transcribe_audio(file: UploadFile = File(...), timestamps: bool = False):
+    """
+    Transcribe audio file using AssemblyAI or the local engine
+    Requires ASSEMBLYAI_API_KEY in environment variables unless routed locally
+    ?timestamps=true adds per-word start/end times (seconds) to the response
+    """
+    upload = None
+    try:
+        if not needs_audio_file():
+            # Stream the upload to AssemblyAI chunk by chunk instead of reading it whole
+            result = await get_backend("assemblyai").transcribe_stream(iter_upload(file, MAX_AUDIO_UPLOAD_BYTES))
+            return transcription_response(result, timestamps)
+
+        upload = await spool_audio(file)
+        result = await transcribe_path(upload.path, upload.size)
+        return transcription_response(result, timestamps)
+
+    except UploadTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except HTTPException:
+        raise
+    except Exception as e:
+        print(f"Transcription error: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Transcription failed: {str(e)}")
+    finally:
+        if upload is not None:
+            upload.cleanup()
+
+
+@router.get("/transcription/metrics")
+async def transcription_metrics():
+    """Per-backend request counts, latency percentiles and real-time factor (this process)."""
+    return metrics_snapshot()
+
+
+async def _spooled_transcription_job(job: Job, report) -> dict:
+    """Background handler for audio spooled to disk; owns (and removes) the file."""
+    path = job.payload["audioPath"]
+    try:
+        await report("transcript", "processing")
+        result = await transcribe_path(path, job.payload.get("sizeBytes"))
+    finally:
+        try:
+            os.unlink(path)
+        except FileNotFoundError:
+            pass
+    return {**result.summary(), "backend": result.backend, "chunks": result.chunks}
+
+
+async def _transcription_job(job: Job, report) -> dict:
+    """Background handler: request the transcript and wait for webhook or poll."""
+    if job.payload.get("audioPath"):
+        return await _spooled_transcription_job(job, report)
+
+    metrics = get_backend("assemblyai").metrics
+    start = time.perf_counter()
+    try:
+        webhook = assemblyai.webhook_url(job.id)
+        # A recovered job reuses the transcript it already requested
+        transcript_id = job.payload.get("transcriptId")
+        if not transcript_id:
+            transcript_id = await assemblyai.request_transcript(job.payload["audioUrl"], webhook=webhook)
+            job.payload["transcriptId"] = transcript_id
+        await report("transcript", "processing")
+
+        result = await assemblyai.wait_for_transcript(
+            transcript_id, timeout=TRANSCRIPTION_TIMEOUT_SECONDS, webhook=webhook is not None
+        )
+    except Exception:
+        metrics.record_failure()
+        raise
+    metrics.record(time.perf_counter() - start, result.get("audio_duration"))
+    return {**assemblyai.transcript_summary(result), "backend": "assemblyai"}
+
+
+get_job_queue().register(TRANSCRIBE_JOB, _transcription_job)
+
+
+async def _queue_payload(file: UploadFile) -> dict:
+    """Stream the upload to AssemblyAI, or spool it for the job to route and chunk."""
+    if not needs_audio_file():
+        return {"audioUrl": await assemblyai.upload_audio(iter_upload(file, MAX_AUDIO_UPLOAD_BYTES))}
+    # The job handler takes ownership of the file
+    upload = await spool_audio(file)
+    return {"audioPath": upload.path, "sizeBytes": upload.size}
+
+
+@router.post("/transcriptions", status_code=202)
+async def create_transcription(file: UploadFile = File(...)):
+    """Upload audio and queue its transcription; returns a job ID straight away."""
+    payload = None
+    try:
+        payload = await _queue_payload(file)
+        job = await get_job_queue().enqueue(TRANSCRIBE_JOB, payload)
+    except UploadTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except QueueFullError as e:
+        if payload and payload.get("audioPath"):
+            os.unlink(payload["audioPath"])
+        raise HTTPException(status_code=503, detail=f"{e}. Please try again shortly.")
+    except HTTPException:
+        raise
+    except Exception as e:
+        print(f"Transcription upload error: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Transcription failed: {str(e)}")
+
+    print(f"🎙️ Queued transcription job {job.id}")
+    return {
+        "jobId": job.id,
+        "status": job.status,
+        "statusUrl": f"/api/jobs/{job.id}",
+        "eventsUrl": f"/api/transcriptions/{job.id}/events",
+    }
+
+
+@router.get("/transcriptions/{job_id}/events")
+async def transcription_events(job_id: str):
+    """SSE stream: "status" on every change, then "completed" (with the transcript) or "failed"."""
+    queue = get_job_queue()
+    if await queue.get(job_id) is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    async def events():
+        last_state = None
+        last_sent = time.monotonic()
+        while True:
+            # Read from the shared backend so any worker can serve the stream
+            job = await queue.get(job_id)
+            if job is None:
+                yield format_sse("failed", {"jobId": job_id, "error": "Job not found"})
+                return
+            state = (job.status, json.dumps(job.progress, sort_keys=True))
+            if state != last_state:
+                last_state = state
+                last_sent = time.monotonic()
+                yield format_sse("status", {"jobId": job_id, "status": job.status, "progress": job.progress})
+            if job.status == COMPLETED:
+                yield format_sse("completed", {"jobId": job_id, **(job.result or {})})
+                return
+            if job.status == FAILED:
+                yield format_sse("failed", {"jobId": job_id, "error": job.error})
+                return
+            if time.monotonic() - last_sent > EVENTS_KEEPALIVE_SECONDS:
+                last_sent = time.monotonic()
+                yield ": keep-alive\n\n"
+            await asyncio.sleep(EVENTS_POLL_SECONDS)
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers=SSE_HEADERS)
+
+
+@router.post("/transcriptions/webhook")
+async def transcription_webhook(request: Request, job: Optional[str] = None):
+    """AssemblyAI completion callback: {"transcript_id": ..., "status": ...}."""
+    if assemblyai.WEBHOOK_SECRET:
+        supplied = request.headers.get(assemblyai.WEBHOOK_HEADER, "")
+        if not hmac.compare_digest(supplied, assemblyai.WEBHOOK_SECRET):
+            raise HTTPException(status_code=401, detail="Invalid webhook secret")
+
+    body = await request.json()
+    transcript_id = body.get("transcript_id")
+    if not transcript_id:
+        raise HTTPException(status_code=400, detail="transcript_id is required")
+
+    if assemblyai.notify_transcript(transcript_id):
+        return {"ok": True, "delivered": "waiter"}
+
+    # The waiting job lives in another worker process (or none, after a restart):
+    # record the outcome in the shared job backend so status and SSE see it now
+    queue = get_job_queue()
+    record = await queue.get(job) if job else None
+    if record is None or record.status not in ACTIVE_STATES or record.payload.get("transcriptId") != transcript_id:
+        return {"ok": True, "delivered": "none"}
+
+    result = await assemblyai.get_transcript(transcript_id)
+    if result["status"] == "completed":
+        await queue.finish(record.id, result=assemblyai.transcript_summary(result))
+    elif result["status"] == "error":
+        await queue.finish(record.id, error=f"Transcription failed: {result.get('error', 'Unknown error')}")
+    return {"ok": True, "delivered": "backend"}
@@ -0,0 +1,53 @@
+"""
+Per-worker health endpoint. Under gunicorn each worker process answers for
+itself, so repeated calls show which workers are up, how long they have been
+running (max_requests restarts reset this) and whether the preloaded model is
+shared from the master process.
+"""
+
+import gc
+import os
+import time
+
+from fastapi import APIRouter
+
+from app.services.severity_model import model_info
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+router = APIRouter(tags=["Health"])
+
+_STARTED_AT = time.time()
+# pid that imported the app: the gunicorn master when the app is preloaded
+_IMPORTED_IN = os.getpid()
+
+
+def _reset_start_time() -> None:
+    global _STARTED_AT
+    _STARTED_AT = time.time()
+
+
+if hasattr(os, "register_at_fork"):
+    # Uptime counts from the fork, not from the preload in the master
+    os.register_at_fork(after_in_child=_reset_start_time)
+
+
+@router.get("/health/worker")
+async def worker_health():
+    """Process-level status of the worker that served this request."""
+    pid = os.getpid()
+    info = {
+        "status": "ok",
+        "pid": pid,
+        "ppid": os.getppid(),
+        "preloaded": _IMPORTED_IN != pid,
+        "uptimeSeconds": round(time.time() - _STARTED_AT, 1),
+        "severityModel": model_info(),
+        "gcFrozenObjects": gc.get_freeze_count(),
+    }
+    if resource is not None:
+        info["maxRssMb"] = round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+    return info
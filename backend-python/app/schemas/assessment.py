@@ -3,7 +3,7 @@ Pydantic v2 schemas for the dyslexia screening assessment feature.
 """
 
 from pydantic import BaseModel, model_validator, Field
-from typing import List, Dict, Optional
+from typing import Any, List, Dict, Optional
 from datetime import datetime
 
 
@@ -63,6 +63,27 @@ class AssessmentResponse(BaseModel):
     created_at: str
 
 
+MAX_BATCH_SIZE = 500
+
+
+class AssessmentBatchRequest(BaseModel):
+    # Items are validated one by one so a bad submission fails alone, not the batch
+    submissions: List[Dict[str, Any]] = Field(..., min_length=1, max_length=MAX_BATCH_SIZE)
+
+
+class AssessmentBatchItem(BaseModel):
+    index: int
+    ok: bool
+    assessment: Optional[AssessmentResponse] = None
+    error: Optional[str] = None
+
+
+class AssessmentBatchResponse(BaseModel):
+    results: List[AssessmentBatchItem]
+    succeeded: int
+    failed: int
+
+
 # ---------------------------------------------------------------------------
 # Screener questions (10 items across 8 cognitive / emotional categories)
 # ---------------------------------------------------------------------------
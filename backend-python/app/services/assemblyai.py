@@ -0,0 +1,154 @@
+"""
+AssemblyAI client on the shared async HTTP pool.
+
+Audio is uploaded as a streamed (chunked) request body straight from the
+incoming upload, so the server never holds a whole recording in memory.
+ASSEMBLYAI_API_BASE points the client at another host, e.g. the local mock in
+benchmarks/mock_assemblyai.py.
+
+Completion is detected by a webhook when TRANSCRIPTION_WEBHOOK_BASE_URL is
+set (AssemblyAI calls /api/transcriptions/webhook, which wakes the waiter via
+notify_transcript) and otherwise by polling with exponential backoff on the
+event loop. With a webhook, polling continues only as a slow safety net.
+"""
+
+import asyncio
+import os
+from typing import AsyncIterator, Dict, Optional
+
+import httpx
+from fastapi import HTTPException
+
+from app.services.gemini_client import get_http_client
+
+ASSEMBLYAI_API_BASE = os.getenv("ASSEMBLYAI_API_BASE", "https://api.assemblyai.com").rstrip("/")
+# Uploads stream for as long as the client keeps sending; only stalls time out
+UPLOAD_TIMEOUT = httpx.Timeout(connect=10.0, read=120.0, write=120.0, pool=30.0)
+# Adaptive polling: first check after POLL_INITIAL, then x POLL_BACKOFF up to the cap
+POLL_INITIAL_SECONDS = float(os.getenv("ASSEMBLYAI_POLL_INITIAL", "1"))
+POLL_MAX_SECONDS = float(os.getenv("ASSEMBLYAI_POLL_MAX", "15"))
+POLL_BACKOFF = 1.5
+# Cap while a webhook is registered: polling is only a fallback for lost deliveries
+POLL_WITH_WEBHOOK_SECONDS = 60.0
+WEBHOOK_BASE_URL = os.getenv("TRANSCRIPTION_WEBHOOK_BASE_URL", "").rstrip("/")
+WEBHOOK_SECRET = os.getenv("ASSEMBLYAI_WEBHOOK_SECRET", "")
+WEBHOOK_HEADER = "X-Webhook-Secret"
+
+# transcript id -> event set when its webhook arrives in this process
+_waiters: Dict[str, asyncio.Event] = {}
+
+def _headers() -> Dict[str, str]:
+    api_key = os.getenv("ASSEMBLYAI_API_KEY")
+    if not api_key:
+        raise HTTPException(
+            status_code=500,
+            detail="AssemblyAI API key not configured. Please add ASSEMBLYAI_API_KEY to .env file."
+        )
+    return {"authorization": api_key}
+
+
+async def upload_audio(chunks: AsyncIterator[bytes]) -> str:
+    """Stream audio to /v2/upload and return its upload_url."""
+    response = await get_http_client().post(
+        f"{ASSEMBLYAI_API_BASE}/v2/upload",
+        headers={**_headers(), "content-type": "application/octet-stream"},
+        content=chunks,
+        timeout=UPLOAD_TIMEOUT,
+    )
+    if response.status_code != 200:
+        print(f"❌ AssemblyAI upload failed: {response.status_code} {response.text[:200]}")
+        raise HTTPException(status_code=500, detail="Failed to upload audio file")
+    return response.json()["upload_url"]
+
+
+def webhook_url(job_id: Optional[str] = None) -> Optional[str]:
+    """Public callback URL for AssemblyAI, or None when webhooks are not configured."""
+    if not WEBHOOK_BASE_URL:
+        return None
+    url = f"{WEBHOOK_BASE_URL}/api/transcriptions/webhook"
+    return f"{url}?job={job_id}" if job_id else url
+
+
+async def request_transcript(
+    audio_url: str, language_code: str = "en", webhook: Optional[str] = None
+) -> str:
+    """Start a transcription job and return its id."""
+    body = {"audio_url": audio_url, "language_code": language_code}
+    if webhook:
+        body["webhook_url"] = webhook
+        if WEBHOOK_SECRET:
+            body["webhook_auth_header_name"] = WEBHOOK_HEADER
+            body["webhook_auth_header_value"] = WEBHOOK_SECRET
+    response = await get_http_client().post(
+        f"{ASSEMBLYAI_API_BASE}/v2/transcript",
+        headers=_headers(),
+        json=body,
+    )
+    if response.status_code != 200:
+        raise HTTPException(status_code=500, detail="Failed to request transcription")
+    return response.json()["id"]
+
+
+async def get_transcript(transcript_id: str) -> dict:
+    response = await get_http_client().get(
+        f"{ASSEMBLYAI_API_BASE}/v2/transcript/{transcript_id}", headers=_headers()
+    )
+    response.raise_for_status()
+    return response.json()
+
+
+def notify_transcript(transcript_id: str) -> bool:
+    """Wake the local waiter for a transcript; False if none is waiting in this process."""
+    event = _waiters.get(transcript_id)
+    if event is None:
+        return False
+    event.set()
+    return True
+
+
+async def wait_for_transcript(
+    transcript_id: str, timeout: float = 300.0, webhook: bool = False
+) -> dict:
+    """Wait until the transcript completes; raises HTTPException on error or timeout.
+
+    Checks status right away, then sleeps with exponential backoff; a webhook
+    delivered via notify_transcript cuts the current sleep short.
+    """
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    event = _waiters.setdefault(transcript_id, asyncio.Event())
+    delay = POLL_INITIAL_SECONDS
+    cap = POLL_WITH_WEBHOOK_SECONDS if webhook else POLL_MAX_SECONDS
+    checks = 0
+    try:
+        while True:
+            result = await get_transcript(transcript_id)
+            checks += 1
+            if result["status"] == "completed":
+                print(f"📝 Transcript {transcript_id} completed after {checks} status check(s)")
+                return result
+            if result["status"] == "error":
+                raise HTTPException(
+                    status_code=500,
+                    detail=f"Transcription failed: {result.get('error', 'Unknown error')}"
+                )
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                raise HTTPException(status_code=408, detail="Transcription timeout. Please try again.")
+            try:
+                await asyncio.wait_for(event.wait(), timeout=min(delay, remaining))
+                event.clear()
+            except asyncio.TimeoutError:
+                delay = min(delay * POLL_BACKOFF, cap)
+    finally:
+        _waiters.pop(transcript_id, None)
+
+
+def transcript_summary(result: dict) -> dict:
+    """Response shape of /api/transcribe-audio."""
+    text = result.get("text") or ""
+    return {
+        "transcription": text,
+        "confidence": result.get("confidence", 0),
+        "words": len(text.split()),
+    }
@@ -0,0 +1,316 @@
+"""
+Silence-aware splitting of long recordings and merging of the chunk transcripts.
+
+A recording is streamed twice as 16 kHz mono PCM (int16) blocks and never
+held whole: the first pass keeps only the short-time energy of each
+FRAME_SECONDS frame (about 2 MB for three hours of audio), the second
+re-decodes it and copies each block into the chunk files it overlaps. Split
+points are placed near every TRANSCRIPTION_CHUNK_SECONDS, each moved to the
+quietest stretch (lowest energy) within ±TRANSCRIPTION_CHUNK_SEARCH_SECONDS, so
+cuts land in pauses rather than mid-word. Each chunk is padded by
+TRANSCRIPTION_CHUNK_OVERLAP_SECONDS on both sides and written as a WAV file
+that any backend accepts.
+
+merge_transcripts() shifts word timestamps back to recording time and keeps,
+from each chunk, only the words whose midpoint falls inside that chunk's own
+span (between its split points). The overlap therefore gives every boundary
+word full context in at least one chunk without being counted twice.
+"""
+
+import importlib.util
+import itertools
+import math
+import os
+import re
+import wave
+from dataclasses import dataclass
+from typing import Iterable, Iterator, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+SAMPLE_RATE = 16_000
+CHUNK_SECONDS = float(os.getenv("TRANSCRIPTION_CHUNK_SECONDS", "300"))
+# Recordings shorter than this are transcribed whole (0 disables chunking)
+CHUNK_MIN_SECONDS = float(os.getenv("TRANSCRIPTION_CHUNK_MIN_SECONDS", "600"))
+CHUNK_OVERLAP_SECONDS = float(os.getenv("TRANSCRIPTION_CHUNK_OVERLAP_SECONDS", "2"))
+CHUNK_SEARCH_SECONDS = float(os.getenv("TRANSCRIPTION_CHUNK_SEARCH_SECONDS", "20"))
+CHUNK_CONCURRENCY = int(os.getenv("TRANSCRIPTION_CHUNK_CONCURRENCY", "4"))
+
+FRAME_SECONDS = 0.02
+# Decoded audio is handed on in blocks of about this length
+BLOCK_SECONDS = 10
+# Length of the quiet stretch looked for around each target split point
+SILENCE_WINDOW_SECONDS = 0.4
+# A repeated word this close to the previous one at a chunk boundary is a duplicate
+DUPLICATE_WORD_SECONDS = 0.5
+
+
+@dataclass
+class AudioChunk:
+    index: int
+    # Span this chunk is responsible for (split point to split point)
+    core_start: float
+    core_end: float
+    # Span actually written, including overlap
+    start: float
+    end: float
+    path: Optional[str] = None
+
+
+def enabled() -> bool:
+    """Chunking is configured and compressed formats can be decoded (PyAV)."""
+    return CHUNK_MIN_SECONDS > 0 and CHUNK_SECONDS > 0 and importlib.util.find_spec("av") is not None
+
+
+def _open_wav(path: str) -> wave.Wave_read:
+    reader = wave.open(path, "rb")
+    if reader.getsampwidth() != 2:
+        reader.close()
+        raise ValueError("Only 16-bit PCM WAV can be read without PyAV")
+    return reader
+
+
+def _iter_wav(reader: wave.Wave_read) -> Iterator[np.ndarray]:
+    channels, rate = reader.getnchannels(), reader.getframerate()
+    block = int(rate * BLOCK_SECONDS)
+    step = rate / SAMPLE_RATE
+    # Resampling state: input samples read so far, the last one (left neighbour
+    # of the next output sample) and the index of that output sample, which
+    # sits at input position index * step
+    read = 0
+    tail = np.zeros(0, dtype=np.float64)
+    emitted = 0
+    with reader:
+        while True:
+            samples = np.frombuffer(reader.readframes(block), dtype=np.int16)
+            if not len(samples):
+                break
+            if channels > 1:
+                samples = samples.reshape(-1, channels).mean(axis=1).astype(np.int16)
+            if rate == SAMPLE_RATE:
+                yield samples
+                continue
+            values = np.concatenate([tail, samples.astype(np.float64)])
+            first = read - len(tail)
+            read += len(samples)
+            # Output samples with both neighbours decoded
+            ready = math.ceil((read - 1) / step)
+            if ready > emitted:
+                positions = np.arange(emitted, ready) * step
+                yield np.interp(positions, np.arange(first, read), values).astype(np.int16)
+                emitted = ready
+            tail = values[-1:]
+        if rate != SAMPLE_RATE and len(tail):
+            # Past the last input sample np.interp holds the final value
+            remaining = math.ceil(read / step) - emitted
+            if remaining > 0:
+                yield np.full(remaining, tail[0]).astype(np.int16)
+
+
+def _iter_av(path: str) -> Iterator[np.ndarray]:
+    import av
+
+    block = int(SAMPLE_RATE * BLOCK_SECONDS)
+    parts, size = [], 0
+    with av.open(path) as container:
+        resampler = av.AudioResampler(format="s16", layout="mono", rate=SAMPLE_RATE)
+        # A final None flushes the resampler
+        for frame in itertools.chain(container.decode(audio=0), [None]):
+            for out in resampler.resample(frame):
+                parts.append(out.to_ndarray().reshape(-1))
+                size += len(parts[-1])
+                # Codec frames are ~1k samples: hand them on in BLOCK_SECONDS blocks
+                if size >= block:
+                    yield np.concatenate(parts).astype(np.int16, copy=False)
+                    parts, size = [], 0
+    if parts:
+        yield np.concatenate(parts).astype(np.int16, copy=False)
+
+
+def iter_pcm(path: str) -> Iterator[np.ndarray]:
+    """Decode to 16 kHz mono int16 blocks (WAV natively, anything else through PyAV)."""
+    try:
+        reader = _open_wav(path)
+    except (wave.Error, EOFError, ValueError):
+        if importlib.util.find_spec("av") is None:
+            raise
+        return _iter_av(path)
+    return _iter_wav(reader)
+
+
+def scan_energy(blocks: Iterable[np.ndarray]) -> Tuple[np.ndarray, int]:
+    """Frame energies of a stream of PCM blocks and its total sample count."""
+    frame = int(SAMPLE_RATE * FRAME_SECONDS)
+    parts = []
+    carry = np.zeros(0, dtype=np.int16)
+    total = 0
+    for block in blocks:
+        total += len(block)
+        if len(carry):
+            block = np.concatenate([carry, block])
+        usable = len(block) // frame * frame
+        if usable:
+            parts.append(frame_energy(block[:usable]))
+        carry = block[usable:]
+    return (np.concatenate(parts) if parts else np.zeros(0, dtype=np.float32)), total
+
+
+def frame_energy(samples: np.ndarray, block_frames: int = 3000) -> np.ndarray:
+    """Mean square amplitude per FRAME_SECONDS frame, computed block-wise to bound memory."""
+    frame = int(SAMPLE_RATE * FRAME_SECONDS)
+    n_frames = len(samples) // frame
+    energy = np.empty(n_frames, dtype=np.float32)
+    for first in range(0, n_frames, block_frames):
+        last = min(n_frames, first + block_frames)
+        block = samples[first * frame:last * frame].astype(np.float32).reshape(-1, frame)
+        energy[first:last] = np.mean(block * block, axis=1)
+    return energy
+
+
+def find_split_points(
+    samples: np.ndarray,
+    chunk_seconds: float = CHUNK_SECONDS,
+    search_seconds: float = CHUNK_SEARCH_SECONDS,
+) -> List[float]:
+    """Split times (seconds) for PCM already in memory; see split_points_from_energy."""
+    return split_points_from_energy(frame_energy(samples), len(samples) / SAMPLE_RATE, chunk_seconds, search_seconds)
+
+
+def split_points_from_energy(
+    energy: np.ndarray,
+    duration: float,
+    chunk_seconds: float = CHUNK_SECONDS,
+    search_seconds: float = CHUNK_SEARCH_SECONDS,
+) -> List[float]:
+    """Split times (seconds) near every chunk_seconds, each moved to the nearby quietest stretch."""
+    window = max(1, int(SILENCE_WINDOW_SECONDS / FRAME_SECONDS))
+    smoothed = np.convolve(energy, np.ones(window, dtype=np.float32) / window, mode="same")
+
+    splits = []
+    target = chunk_seconds
+    # Leave at least half a chunk after the last split
+    while target < duration - chunk_seconds / 2:
+        lo = max(0, int((target - search_seconds) / FRAME_SECONDS))
+        hi = min(len(smoothed), int((target + search_seconds) / FRAME_SECONDS) + 1)
+        if splits:
+            lo = max(lo, int((splits[-1] + chunk_seconds / 2) / FRAME_SECONDS))
+        if hi > lo:
+            best = lo + int(np.argmin(smoothed[lo:hi]))
+            splits.append(round(best * FRAME_SECONDS, 3))
+        else:
+            splits.append(target)
+        target = splits[-1] + chunk_seconds
+    return splits
+
+
+def plan_chunks(duration: float, splits: Sequence[float], overlap: float = CHUNK_OVERLAP_SECONDS) -> List[AudioChunk]:
+    bounds = [0.0, *splits, duration]
+    return [
+        AudioChunk(
+            index=i,
+            core_start=bounds[i],
+            core_end=bounds[i + 1],
+            start=max(0.0, bounds[i] - overlap),
+            end=min(duration, bounds[i + 1] + overlap),
+        )
+        for i in range(len(bounds) - 1)
+    ]
+
+
+def _open_chunk(path: str) -> wave.Wave_write:
+    writer = wave.open(path, "wb")
+    writer.setnchannels(1)
+    writer.setsampwidth(2)
+    writer.setframerate(SAMPLE_RATE)
+    return writer
+
+
+def write_chunks(
+    samples: Union[np.ndarray, Iterable[np.ndarray]], chunks: List[AudioChunk], directory: str
+) -> None:
+    """Write each chunk (with overlap) as a 16 kHz mono WAV in directory.
+
+    `samples` is the whole recording or a stream of consecutive blocks (iter_pcm);
+    each block is copied into the (at most two, given the overlap) chunks it
+    overlaps, and a chunk's file is closed as soon as the stream passes its end.
+    """
+    blocks = [samples] if isinstance(samples, np.ndarray) else samples
+    spans = [(int(c.start * SAMPLE_RATE), int(c.end * SAMPLE_RATE)) for c in chunks]
+    for chunk in chunks:
+        chunk.path = os.path.join(directory, f"chunk-{chunk.index:03d}.wav")
+    writers = {}
+    first_open = 0
+    position = 0
+    try:
+        for block in blocks:
+            block_end = position + len(block)
+            for i in range(first_open, len(chunks)):
+                lo, hi = spans[i]
+                if lo >= block_end:
+                    break
+                piece = block[max(lo - position, 0):max(min(hi, block_end) - position, 0)]
+                if len(piece):
+                    if i not in writers:
+                        writers[i] = _open_chunk(chunks[i].path)
+                    writers[i].writeframes(piece.tobytes())
+            while first_open < len(chunks) and spans[first_open][1] <= block_end:
+                (writers.pop(first_open, None) or _open_chunk(chunks[first_open].path)).close()
+                first_open += 1
+            position = block_end
+        # Chunks the stream never reached still get a (short or empty) file
+        for i in range(first_open, len(chunks)):
+            writers.setdefault(i, _open_chunk(chunks[i].path))
+    finally:
+        for writer in writers.values():
+            writer.close()
+
+
+def split_audio(path: str, directory: str, chunk_seconds: float = CHUNK_SECONDS) -> Tuple[List[AudioChunk], float]:
+    """Choose split points from one decoding pass, write the chunk files from a second; returns (chunks, duration)."""
+    energy, n_samples = scan_energy(iter_pcm(path))
+    duration = n_samples / SAMPLE_RATE
+    chunks = plan_chunks(duration, split_points_from_energy(energy, duration, chunk_seconds))
+    write_chunks(iter_pcm(path), chunks, directory)
+    return chunks, duration
+
+
+def _normalize(word: str) -> str:
+    return re.sub(r"[^\w']", "", word.lower())
+
+
+def merge_transcripts(chunks: List[AudioChunk], results: List[dict]) -> dict:
+    """Stitch per-chunk {"text", "confidence", "words"} results into one transcript.
+
+    Word times in results are relative to their chunk file; the merged words
+    are in recording time.
+    """
+    words: List[dict] = []
+    texts: List[str] = []
+    for chunk, result in zip(chunks, results):
+        kept = []
+        for w in result.get("words") or []:
+            start, end = w["start"] + chunk.start, w["end"] + chunk.start
+            midpoint = (start + end) / 2
+            if chunk.core_start <= midpoint < chunk.core_end or (
+                chunk is chunks[-1] and midpoint >= chunk.core_end
+            ):
+                kept.append({**w, "start": round(start, 3), "end": round(end, 3)})
+        # A word straddling the split can land on both sides with slightly different times
+        if kept and words and _normalize(kept[0]["word"]) == _normalize(words[-1]["word"]) \
+                and abs(kept[0]["start"] - words[-1]["start"]) < DUPLICATE_WORD_SECONDS:
+            kept = kept[1:]
+        words.extend(kept)
+        if not result.get("words") and result.get("text"):
+            # Backend without word timings: fall back to whole chunk texts
+            texts.append(result["text"].strip())
+
+    if words:
+        text = " ".join(w["word"] for w in words if w["word"])
+        scored = [w["confidence"] for w in words if w.get("confidence") is not None]
+        confidence = sum(scored) / len(scored) if scored else 0.0
+    else:
+        text = " ".join(texts)
+        spans = [(c.core_end - c.core_start, r.get("confidence") or 0.0) for c, r in zip(chunks, results)]
+        total = sum(s for s, _ in spans)
+        confidence = sum(s * c for s, c in spans) / total if total else 0.0
+    return {"text": text, "words": words, "confidence": round(confidence, 4)}
@@ -0,0 +1,178 @@
+"""
+Blob storage for data kept outside Firestore documents (large lecture
+artifacts, see app/services/lecture_artifacts.py).
+
+ARTIFACT_STORE selects the backend:
+  inline  no blob store; everything stays in the documents (default)
+  local   files under ARTIFACT_LOCAL_DIR, for development and tests
+  gcs     the Firebase Storage / Cloud Storage bucket ARTIFACT_BUCKET (the
+          project's default bucket when empty), same service account as Firestore
+
+The Cloud Storage client is blocking, so its calls run in a worker thread.
+Like the document store, the backend is created lazily in each process.
+"""
+
+import asyncio
+import os
+from pathlib import Path
+from typing import Optional
+
+ARTIFACT_STORE = os.getenv("ARTIFACT_STORE", "inline").lower()
+ARTIFACT_LOCAL_DIR = os.getenv("ARTIFACT_LOCAL_DIR", "artifact_blobs")
+ARTIFACT_BUCKET = os.getenv("ARTIFACT_BUCKET", "")
+
+
+class BlobNotFound(LookupError):
+    """Raised when reading a blob that does not exist."""
+
+
+class BlobStore:
+    """Async key -> bytes storage. Keys are "/"-separated paths."""
+
+    async def put(self, key: str, data: bytes) -> None:
+        raise NotImplementedError
+
+    async def get(self, key: str) -> bytes:
+        raise NotImplementedError
+
+    async def delete(self, key: str) -> bool:
+        """Delete one blob; returns False if it did not exist."""
+        raise NotImplementedError
+
+    async def delete_prefix(self, prefix: str) -> int:
+        """Delete every blob under prefix; returns how many were removed."""
+        raise NotImplementedError
+
+
+class LocalBlobStore(BlobStore):
+    def __init__(self, root: str = ARTIFACT_LOCAL_DIR):
+        self.root = Path(root).resolve()
+
+    def _path(self, key: str) -> Path:
+        path = (self.root / key).resolve()
+        if self.root not in path.parents:
+            raise ValueError(f"Blob key escapes the store: {key!r}")
+        return path
+
+    def _put(self, key: str, data: bytes) -> None:
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Write-then-rename so a reader never sees a partial blob
+        tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+        tmp.write_bytes(data)
+        os.replace(tmp, path)
+
+    def _get(self, key: str) -> bytes:
+        try:
+            return self._path(key).read_bytes()
+        except FileNotFoundError:
+            raise BlobNotFound(key) from None
+
+    def _delete(self, key: str) -> bool:
+        try:
+            self._path(key).unlink()
+            return True
+        except FileNotFoundError:
+            return False
+
+    def _delete_prefix(self, prefix: str) -> int:
+        base = self._path(prefix.rstrip("/"))
+        if not base.exists():
+            return 0
+        removed = 0
+        for path in sorted(base.rglob("*"), reverse=True):
+            if path.is_dir():
+                path.rmdir()
+            else:
+                path.unlink()
+                removed += 1
+        base.rmdir()
+        return removed
+
+    async def put(self, key: str, data: bytes) -> None:
+        await asyncio.to_thread(self._put, key, data)
+
+    async def get(self, key: str) -> bytes:
+        return await asyncio.to_thread(self._get, key)
+
+    async def delete(self, key: str) -> bool:
+        return await asyncio.to_thread(self._delete, key)
+
+    async def delete_prefix(self, prefix: str) -> int:
+        return await asyncio.to_thread(self._delete_prefix, prefix)
+
+
+class GCSBlobStore(BlobStore):
+    def __init__(self, bucket):
+        self._bucket = bucket
+
+    def _get(self, key: str) -> bytes:
+        from google.api_core.exceptions import NotFound
+
+        try:
+            return self._bucket.blob(key).download_as_bytes()
+        except NotFound:
+            raise BlobNotFound(key) from None
+
+    def _delete(self, key: str) -> bool:
+        from google.api_core.exceptions import NotFound
+
+        try:
+            self._bucket.blob(key).delete()
+            return True
+        except NotFound:
+            return False
+
+    def _delete_prefix(self, prefix: str) -> int:
+        blobs = list(self._bucket.list_blobs(prefix=prefix))
+        for blob in blobs:
+            blob.delete()
+        return len(blobs)
+
+    async def put(self, key: str, data: bytes) -> None:
+        await asyncio.to_thread(
+            self._bucket.blob(key).upload_from_string, data, content_type="application/octet-stream"
+        )
+
+    async def get(self, key: str) -> bytes:
+        return await asyncio.to_thread(self._get, key)
+
+    async def delete(self, key: str) -> bool:
+        return await asyncio.to_thread(self._delete, key)
+
+    async def delete_prefix(self, prefix: str) -> int:
+        return await asyncio.to_thread(self._delete_prefix, prefix)
+
+
+_blob_store: Optional[BlobStore] = None
+_blob_store_pid: Optional[int] = None
+
+
+def _gcs_bucket():
+    from firebase_admin import storage
+
+    from app.services.document_store import firebase_app
+
+    return storage.bucket(ARTIFACT_BUCKET or None, app=firebase_app())
+
+
+def get_blob_store() -> Optional[BlobStore]:
+    """Process-wide blob store, or None when ARTIFACT_STORE=inline."""
+    global _blob_store, _blob_store_pid
+    if _blob_store is None or (_blob_store_pid is not None and _blob_store_pid != os.getpid()):
+        if ARTIFACT_STORE == "inline":
+            return None
+        if ARTIFACT_STORE == "local":
+            _blob_store = LocalBlobStore()
+        else:
+            _blob_store = GCSBlobStore(_gcs_bucket())
+        _blob_store_pid = os.getpid()
+        print(f"🗄️ Artifact blob store: {ARTIFACT_STORE}")
+    return _blob_store
+
+
+def set_blob_store(store: BlobStore) -> None:
+    """Install a blob store explicitly (tests, benchmarks, migrations); kept across forks."""
+    global _blob_store, _blob_store_pid
+    _blob_store = store
+    _blob_store_pid = None
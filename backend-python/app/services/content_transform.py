@@ -0,0 +1,219 @@
+"""
+Prompts for /api/content/transform: turn study material into simplified notes,
+flashcards, a quiz and a mind map for dyslexic learners.
+
+build_fused_transform() asks for all four in one structured JSON response
+(see app/services/fused_generation.py); its renderers turn the JSON back into
+exactly the text formats the individual prompts ask for.
+"""
+
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.services.fused_generation import FusedField, render_text
+
+TRANSFORM_OUTPUTS = ("simplifiedNotes", "flashcards", "quiz", "mindMap")
+MIND_MAP_MARKERS = ("├─", "└─")
+
+
+def build_transform_prompts(text: str) -> Dict[str, tuple]:
+    """Return {output_name: (prompt, system)} for the four content formats."""
+    notes_prompt = f"""You are a teacher helping a dyslexic student understand this topic. Rewrite the content below in a way that is EASY to read and DETAILED enough to fully understand the topic.
+
+Rules:
+- Use simple, everyday words (no jargon)
+- Write in short, clear sentences (max 15 words each)
+- Use bullet points (start each point with a dash -)
+- DO NOT use any markdown symbols like # or * or **
+- Group related points under plain text headings (just capitalize the heading, no symbols)
+- Explain every key concept — do not skip anything
+- Add a brief "Why This Matters" section at the end
+- The output should be at least 300 words and cover ALL the main ideas from the text
+- Use line breaks between sections for easy reading
+
+Text:
+{text}
+
+Simplified notes:"""
+
+    flashcard_prompt = f"""Create 8-10 flashcards to help a dyslexic student learn this content.
+
+Rules:
+- Each question should test ONE key concept
+- Keep questions clear and simple (no trick questions)
+- Answers should be 1-2 sentences, easy to remember
+- Use simple vocabulary
+- Cover all the important topics in the text
+
+Format EXACTLY like this (no extra text):
+Q: What is photosynthesis?
+A: It is the process plants use to make food from sunlight, water, and carbon dioxide.
+
+Q: Why is photosynthesis important?
+A: It produces oxygen that all living things need to breathe.
+
+Text:
+{text}
+
+Flashcards:"""
+
+    quiz_prompt = f"""Create a 5-question multiple choice quiz from this content to help a dyslexic student review.
+
+Rules:
+- Use simple, clear language in questions and options
+- Each question should have exactly 4 options (A, B, C, D)
+- Only ONE option per question is correct
+- Mark the correct option by adding (correct) after it
+- Make wrong options believable but clearly wrong if you know the material
+- Cover different parts of the content
+
+Format EXACTLY like this:
+
+1. What does the heart do?
+A. It helps you breathe
+B. It pumps blood through your body (correct)
+C. It digests food
+D. It filters waste
+
+2. Where is the heart located?
+A. In your head
+B. In your stomach
+C. In your chest (correct)
+D. In your back
+
+Text:
+{text}
+
+Quiz:"""
+
+    mindmap_prompt = f"""Create a detailed text-based mind map from this content with at least 4-5 main categories and 2-3 details under each.
+
+Rules:
+- Use simple words a dyslexic student can easily read
+- Cover ALL the main topics from the text
+- Each detail should be a short phrase (not full sentences)
+- Use tree-drawing characters for the structure
+
+Format EXACTLY like this:
+
+Main Topic Name
+├─ Category 1
+│  ├─ Detail 1a
+│  └─ Detail 1b
+├─ Category 2
+│  ├─ Detail 2a
+│  ├─ Detail 2b
+│  └─ Detail 2c
+├─ Category 3
+│  ├─ Detail 3a
+│  └─ Detail 3b
+└─ Category 4
+   ├─ Detail 4a
+   └─ Detail 4b
+
+Text:
+{text}
+
+Mind Map:"""
+
+    return {
+        "simplifiedNotes": (
+            notes_prompt,
+            "You are a patient dyslexia specialist teacher. Write detailed, easy-to-read notes. NO markdown symbols (no # or * or **). Use plain text with dashes for bullets. Be thorough — cover every key point.",
+        ),
+        "flashcards": (
+            flashcard_prompt,
+            "Create flashcards using ONLY Q: and A: format. No numbering, no extra text. Keep answers clear and simple.",
+        ),
+        "quiz": (
+            quiz_prompt,
+            "Create a multiple choice quiz. Use simple language. Mark correct answer with (correct). Format exactly as shown.",
+        ),
+        "mindMap": (
+            mindmap_prompt,
+            "Create a detailed text mind map using tree characters (├─ │ └─). Use simple words. Be thorough.",
+        ),
+    }
+
+
+def render_flashcards(value: Any) -> Optional[str]:
+    """[{"question", "answer"}] -> "Q: ...\nA: ..." blocks; None if fewer than 3 usable cards."""
+    if not isinstance(value, list):
+        return None
+    cards = [
+        f"Q: {card['question'].strip()}\nA: {card['answer'].strip()}"
+        for card in value
+        if isinstance(card, dict)
+        and isinstance(card.get("question"), str) and card["question"].strip()
+        and isinstance(card.get("answer"), str) and card["answer"].strip()
+    ]
+    return "\n\n".join(cards) if len(cards) >= 3 else None
+
+
+def render_quiz(value: Any) -> Optional[str]:
+    """[{"question", "options"[4], "correctOption"}] -> numbered quiz marked with (correct)."""
+    if not isinstance(value, list):
+        return None
+    blocks: List[str] = []
+    for item in value:
+        if not isinstance(item, dict):
+            return None
+        options, correct = item.get("options"), item.get("correctOption")
+        if not isinstance(item.get("question"), str) or not isinstance(options, list) or len(options) != 4:
+            return None
+        if not isinstance(correct, int) or not 0 <= correct < 4:
+            return None
+        lines = [f"{len(blocks) + 1}. {item['question'].strip()}"]
+        for i, option in enumerate(options):
+            mark = " (correct)" if i == correct else ""
+            lines.append(f"{'ABCD'[i]}. {str(option).strip()}{mark}")
+        blocks.append("\n".join(lines))
+    return "\n\n".join(blocks) if len(blocks) >= 3 else None
+
+
+def build_fused_transform(text: str) -> Tuple[str, str, List[FusedField]]:
+    """(prompt, system, fields) for generating all four formats in one JSON response."""
+    individual = build_transform_prompts(text)
+    prompt = f"""You are a teacher helping a dyslexic student. From the study material below, produce four learning formats and return them as one JSON object.
+
+simplifiedNotes: detailed, easy-to-read notes of at least 300 words covering ALL main ideas. Simple everyday words, short sentences (max 15 words), bullet points starting with a dash -, plain capitalized headings, no markdown symbols (# * **), line breaks between sections, and a "Why This Matters" section at the end.
+
+flashcards: 8-10 cards, each testing ONE key concept with a clear question and a 1-2 sentence answer in simple vocabulary.
+
+quiz: 5 multiple choice questions covering different parts of the content, each with exactly 4 options and the index (0-3) of the single correct option. Simple, clear language; believable wrong options.
+
+mindMap: a text mind map with the main topic on the first line, at least 4-5 categories and 2-3 short details under each, drawn with tree characters:
+Main Topic Name
+├─ Category 1
+│  ├─ Detail 1a
+│  └─ Detail 1b
+└─ Category 2
+   ├─ Detail 2a
+   └─ Detail 2b
+
+Text:
+{text}"""
+    system = "You are a patient dyslexia specialist teacher. Respond with the JSON object only, matching the schema."
+
+    card = {
+        "type": "OBJECT",
+        "properties": {"question": {"type": "STRING"}, "answer": {"type": "STRING"}},
+        "required": ["question", "answer"],
+    }
+    question = {
+        "type": "OBJECT",
+        "properties": {
+            "question": {"type": "STRING"},
+            "options": {"type": "ARRAY", "items": {"type": "STRING"}},
+            "correctOption": {"type": "INTEGER"},
+        },
+        "required": ["question", "options", "correctOption"],
+    }
+    fields = [
+        FusedField("simplifiedNotes", {"type": "STRING"}, render_text(min_words=80), individual["simplifiedNotes"]),
+        FusedField("flashcards", {"type": "ARRAY", "items": card}, render_flashcards, individual["flashcards"]),
+        FusedField("quiz", {"type": "ARRAY", "items": question}, render_quiz, individual["quiz"]),
+        FusedField(
+            "mindMap", {"type": "STRING"}, render_text(min_words=5, must_contain=MIND_MAP_MARKERS), individual["mindMap"]
+        ),
+    ]
+    return prompt, system, fields
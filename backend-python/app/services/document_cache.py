@@ -0,0 +1,214 @@
+"""
+Per-process read-through cache for documents (lectures) and "first match"
+query results, in front of the document store.
+
+Documents are kept in an LRU bounded by their serialized size in bytes
+(LECTURE_CACHE_MAX_BYTES) rather than an entry count, because one lecture with
+a long transcription can be a hundred times larger than another. Entries
+expire after LECTURE_CACHE_TTL_SECONDS. Query results ("latest lecture of a
+user") are cached as a pointer to a document id, so they share the document
+entries and cost almost nothing.
+
+Repositories invalidate a document after every write to it, and every query
+pointer of the collection on any write (a new or deleted document can change
+which one is "latest"). A read that was already in flight when an
+invalidation happened does not store its result, so a slow read can never put
+an older version back after a write. Each gunicorn worker has its own cache:
+writes made in another worker are seen once the entry expires, which is why
+the TTL is short.
+
+Every entry carries an ETag (a hash of the serialized document) so handlers
+can answer If-None-Match with 304 Not Modified.
+"""
+
+import copy
+import hashlib
+import json
+import os
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Callable, Dict, Optional
+
+LECTURE_CACHE_MAX_BYTES = int(os.getenv("LECTURE_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+LECTURE_CACHE_TTL_SECONDS = float(os.getenv("LECTURE_CACHE_TTL_SECONDS", "5"))
+# Invalidation marks older than this are forgotten; reads that started earlier are not stored
+STALE_READ_SECONDS = 60.0
+_QUERY_ENTRY_BYTES = 128
+
+
+def serialize(doc: dict) -> bytes:
+    """Stable JSON encoding used for both the size estimate and the ETag."""
+    return json.dumps(doc, sort_keys=True, default=str, ensure_ascii=False).encode("utf-8")
+
+
+def make_etag(body: bytes) -> str:
+    return '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """True when an If-None-Match header (possibly a list, weak or "*") matches etag."""
+    if not if_none_match:
+        return False
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*" or candidate.removeprefix("W/") == etag:
+            return True
+    return False
+
+
+@dataclass
+class CachedDocument:
+    doc: dict
+    etag: str
+    size: int
+    created_at: float
+
+
+class DocumentCache:
+    """Byte-bounded LRU of documents plus query pointers, with TTL and hit/miss counters."""
+
+    def __init__(
+        self,
+        max_bytes: int = LECTURE_CACHE_MAX_BYTES,
+        ttl_seconds: float = LECTURE_CACHE_TTL_SECONDS,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self._clock = clock
+        self._docs: "OrderedDict[str, CachedDocument]" = OrderedDict()
+        self._queries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._invalidated: Dict[str, float] = {}
+        self._queries_invalidated = float("-inf")
+        self._forgotten_before = float("-inf")
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self.stale_reads_dropped = 0
+
+    def begin_read(self) -> float:
+        """Token to pass to store_*(): results are dropped if the key was invalidated since."""
+        return self._clock()
+
+    def _fresh(self, created_at: float) -> bool:
+        return self._clock() - created_at <= self.ttl_seconds
+
+    def _current(self, doc_id: str, token: float) -> bool:
+        return token > self._forgotten_before and self._invalidated.get(doc_id, float("-inf")) < token
+
+    def _evict(self) -> None:
+        while self.bytes > self.max_bytes and (self._docs or self._queries):
+            # Query pointers are cheap to rebuild only if their documents are cached; drop documents first
+            if self._docs:
+                _, entry = self._docs.popitem(last=False)
+                self.bytes -= entry.size
+            else:
+                self._queries.popitem(last=False)
+                self.bytes -= _QUERY_ENTRY_BYTES
+            self.evictions += 1
+
+    # Documents
+
+    def get(self, doc_id: str) -> Optional[CachedDocument]:
+        """A private copy of the cached document, or None on a miss or expired entry."""
+        entry = self._docs.get(doc_id)
+        if entry is not None:
+            if self._fresh(entry.created_at):
+                self._docs.move_to_end(doc_id)
+                self.hits += 1
+                return CachedDocument(copy.deepcopy(entry.doc), entry.etag, entry.size, entry.created_at)
+            self._discard(doc_id)
+        self.misses += 1
+        return None
+
+    def store(self, doc_id: str, doc: dict, token: float) -> CachedDocument:
+        """Cache a document read with `token`; always returns it with its ETag."""
+        body = serialize(doc)
+        entry = CachedDocument(doc, make_etag(body), len(body), self._clock())
+        if not self._current(doc_id, token):
+            self.stale_reads_dropped += 1
+            return entry
+        if entry.size > self.max_bytes:
+            return entry
+        self._discard(doc_id)
+        self._docs[doc_id] = CachedDocument(copy.deepcopy(doc), entry.etag, entry.size, entry.created_at)
+        self.bytes += entry.size
+        self.stores += 1
+        self._evict()
+        return entry
+
+    def _discard(self, doc_id: str) -> None:
+        entry = self._docs.pop(doc_id, None)
+        if entry is not None:
+            self.bytes -= entry.size
+
+    # Query pointers
+
+    def get_query(self, key: str) -> Optional[tuple]:
+        """(doc_id or None,) for a cached query result, None on a miss."""
+        entry = self._queries.get(key)
+        if entry is not None:
+            result, created_at = entry
+            if self._fresh(created_at):
+                self._queries.move_to_end(key)
+                return result
+            del self._queries[key]
+            self.bytes -= _QUERY_ENTRY_BYTES
+        return None
+
+    def store_query(self, key: str, doc_id: Optional[str], token: float) -> None:
+        if token <= self._queries_invalidated or token <= self._forgotten_before:
+            self.stale_reads_dropped += 1
+            return
+        if key not in self._queries:
+            self.bytes += _QUERY_ENTRY_BYTES
+        self._queries[key] = ((doc_id,), self._clock())
+        self._queries.move_to_end(key)
+        self._evict()
+
+    # Invalidation
+
+    def invalidate(self, doc_id: str) -> None:
+        """Forget a document and every query pointer (call after the write has committed)."""
+        now = self._clock()
+        self._discard(doc_id)
+        self._invalidated[doc_id] = now
+        self.bytes -= _QUERY_ENTRY_BYTES * len(self._queries)
+        self._queries.clear()
+        self._queries_invalidated = now
+        self.invalidations += 1
+        if len(self._invalidated) > 4096:
+            horizon = now - STALE_READ_SECONDS
+            self._invalidated = {k: t for k, t in self._invalidated.items() if t >= horizon}
+            self._forgotten_before = horizon
+
+    def clear(self) -> None:
+        """Drop every entry (counters are kept)."""
+        now = self._clock()
+        self._docs.clear()
+        self._queries.clear()
+        self._invalidated.clear()
+        self._queries_invalidated = now
+        self._forgotten_before = now
+        self.bytes = 0
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hitRate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "stores": self.stores,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+            "staleReadsDropped": self.stale_reads_dropped,
+            "entries": len(self._docs),
+            "queryEntries": len(self._queries),
+            "bytes": self.bytes,
+            "maxBytes": self.max_bytes,
+            "ttlSeconds": self.ttl_seconds,
+        }
@@ -0,0 +1,319 @@
+"""
+Document storage behind the repositories: the async Firestore client, or an
+in-memory fake with the same interface for offline tests and benchmarks.
+
+FIRESTORE_BACKEND selects it:
+  firestore  firebase_admin's async client, credentials from
+             FIREBASE_SERVICE_ACCOUNT_PATH. With FIRESTORE_EMULATOR_HOST set
+             (e.g. localhost:8080 from `firebase emulators:start`) it talks to
+             the local emulator instead, no credentials needed.
+  memory     MemoryStore: dicts in this process, optional simulated latency
+             (FIRESTORE_FAKE_LATENCY_MS) so batching effects are measurable.
+
+The client is created lazily on first use in each process, never at import,
+so a preloaded gunicorn master does not open gRPC channels that forked
+workers would inherit. Tests and benchmarks can install a store with set_store().
+"""
+
+import asyncio
+import copy
+import os
+import uuid
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+try:
+    from google.cloud.firestore import SERVER_TIMESTAMP
+except ImportError:  # memory backend without the Firestore SDK installed
+    SERVER_TIMESTAMP = object()
+
+FIRESTORE_BACKEND = os.getenv("FIRESTORE_BACKEND", "firestore").lower()
+FIREBASE_SERVICE_ACCOUNT_PATH = os.getenv("FIREBASE_SERVICE_ACCOUNT_PATH", "serviceAccountKey.json")
+FIRESTORE_EMULATOR_HOST = os.getenv("FIRESTORE_EMULATOR_HOST", "")
+FIRESTORE_PROJECT_ID = os.getenv("FIRESTORE_PROJECT_ID", "demo-simplified")
+FAKE_LATENCY_MS = float(os.getenv("FIRESTORE_FAKE_LATENCY_MS", "0"))
+# Concurrent RPCs the fake serves (a real client's channel is not unlimited); 0 = no limit
+FAKE_MAX_IN_FLIGHT = int(os.getenv("FIRESTORE_FAKE_MAX_IN_FLIGHT", "0"))
+
+# (field, op, value); only "==" is needed by the app
+Filter = Tuple[str, str, Any]
+# (order_by value, document id) of the last row already returned
+Cursor = Tuple[Any, str]
+
+
+class DocumentNotFound(LookupError):
+    """Raised when updating a document that does not exist."""
+
+
+@dataclass
+class WriteOp:
+    kind: str  # "set" | "update" | "delete"
+    collection: str
+    doc_id: str
+    data: Dict[str, Any] = field(default_factory=dict)
+
+
+class DocumentStore:
+    """Async document storage: point reads, simple queries and atomic batched writes."""
+
+    def new_id(self, collection: str) -> str:
+        raise NotImplementedError
+
+    async def get(self, collection: str, doc_id: str) -> Optional[dict]:
+        raise NotImplementedError
+
+    async def query(
+        self,
+        collection: str,
+        filters: Sequence[Filter] = (),
+        order_by: Optional[str] = None,
+        descending: bool = False,
+        limit: Optional[int] = None,
+        select: Optional[Sequence[str]] = None,
+        start_after: Optional[Cursor] = None,
+    ) -> List[Tuple[str, dict]]:
+        """Matching (id, doc) rows ordered by order_by, then document id.
+
+        select limits the returned fields (a Firestore projection, so unselected
+        fields never leave the server). start_after continues after the row with
+        that (order_by value, id), for cursor pagination.
+        """
+        raise NotImplementedError
+
+    async def commit(self, ops: List[WriteOp]) -> None:
+        """Apply all ops atomically (one Firestore batch, at most 500 ops)."""
+        raise NotImplementedError
+
+
+class FirestoreStore(DocumentStore):
+    def __init__(self, client):
+        self._client = client
+
+    def new_id(self, collection: str) -> str:
+        # Auto-ids are generated client-side; no round trip
+        return self._client.collection(collection).document().id
+
+    async def get(self, collection: str, doc_id: str) -> Optional[dict]:
+        snapshot = await self._client.collection(collection).document(doc_id).get()
+        return snapshot.to_dict() if snapshot.exists else None
+
+    async def query(
+        self, collection, filters=(), order_by=None, descending=False, limit=None, select=None, start_after=None
+    ):
+        from google.cloud.firestore import FieldPath, Query
+        from google.cloud.firestore_v1.base_query import FieldFilter
+
+        query = self._client.collection(collection)
+        for name, op, value in filters:
+            query = query.where(filter=FieldFilter(name, op, value))
+        if select is not None:
+            query = query.select(list(select))
+        if order_by:
+            # Same direction on the id as Firestore's implicit tie-break, so no extra index
+            direction = Query.DESCENDING if descending else Query.ASCENDING
+            query = query.order_by(order_by, direction=direction)
+            query = query.order_by(FieldPath.document_id(), direction=direction)
+        if start_after is not None:
+            if not order_by:
+                raise ValueError("start_after needs order_by")
+            value, doc_id = start_after
+            query = query.start_after({
+                order_by: value,
+                FieldPath.document_id(): self._client.collection(collection).document(doc_id),
+            })
+        if limit:
+            query = query.limit(limit)
+        return [(snapshot.id, snapshot.to_dict()) async for snapshot in query.stream()]
+
+    async def commit(self, ops: List[WriteOp]) -> None:
+        from google.api_core.exceptions import NotFound
+
+        batch = self._client.batch()
+        for op in ops:
+            ref = self._client.collection(op.collection).document(op.doc_id)
+            if op.kind == "set":
+                batch.set(ref, op.data)
+            elif op.kind == "update":
+                batch.update(ref, op.data)
+            else:
+                batch.delete(ref)
+        try:
+            await batch.commit()
+        except NotFound as e:
+            raise DocumentNotFound(str(e)) from e
+
+
+def _resolve(value: Any, now: datetime) -> Any:
+    """Copy containers (so stored docs never alias caller data) and fill server timestamps."""
+    if value is SERVER_TIMESTAMP:
+        return now
+    if isinstance(value, dict):
+        return {k: _resolve(v, now) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_resolve(v, now) for v in value]
+    return value
+
+
+def project(doc: dict, fields: Sequence[str]) -> dict:
+    """Only the given (possibly dotted) field paths of doc, like a Firestore select()."""
+    projected: Dict[str, Any] = {}
+    for path in fields:
+        source, target = doc, projected
+        *parents, leaf = path.split(".")
+        for name in parents:
+            source = source.get(name) if isinstance(source, dict) else None
+            target = target.setdefault(name, {})
+        if isinstance(source, dict) and leaf in source:
+            target[leaf] = source[leaf]
+    return projected
+
+
+def apply_update(doc: dict, fields: Dict[str, Any]) -> dict:
+    """Apply Firestore update() semantics (dotted field paths) to a plain dict, in place."""
+    now = datetime.now()
+    for path, value in fields.items():
+        target = doc
+        *parents, leaf = path.split(".")
+        for name in parents:
+            if not isinstance(target.get(name), dict):
+                target[name] = {}
+            target = target[name]
+        target[leaf] = _resolve(value, now)
+    return doc
+
+
+class MemoryStore(DocumentStore):
+    """In-process fake with Firestore's write semantics (update on a missing doc fails the batch).
+
+    discard_writes=True accepts writes without keeping them (long load tests).
+    """
+
+    def __init__(
+        self,
+        latency_ms: float = FAKE_LATENCY_MS,
+        discard_writes: bool = False,
+        max_in_flight: int = FAKE_MAX_IN_FLIGHT,
+    ):
+        self.latency = latency_ms / 1000.0
+        self.discard_writes = discard_writes
+        self.max_in_flight = max_in_flight
+        self._slots: Optional[asyncio.Semaphore] = None
+        self.collections: Dict[str, Dict[str, dict]] = {}
+        self.commits = 0
+        self.writes = 0
+        self.reads = 0
+
+    async def _round_trip(self) -> None:
+        if not self.max_in_flight:
+            await asyncio.sleep(self.latency)
+            return
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_in_flight)
+        async with self._slots:
+            await asyncio.sleep(self.latency)
+
+    def new_id(self, collection: str) -> str:
+        return uuid.uuid4().hex[:20]
+
+    async def get(self, collection: str, doc_id: str) -> Optional[dict]:
+        await self._round_trip()
+        self.reads += 1
+        doc = self.collections.get(collection, {}).get(doc_id)
+        return copy.deepcopy(doc) if doc is not None else None
+
+    async def query(
+        self, collection, filters=(), order_by=None, descending=False, limit=None, select=None, start_after=None
+    ):
+        await self._round_trip()
+        rows = [
+            (doc_id, doc) for doc_id, doc in self.collections.get(collection, {}).items()
+            if all(op == "==" and doc.get(name) == value for name, op, value in filters)
+        ]
+        if order_by:
+            # Firestore omits documents missing the order_by field
+            rows = [row for row in rows if order_by in row[1]]
+            rows.sort(key=lambda row: (row[1][order_by], row[0]), reverse=descending)
+        if start_after is not None:
+            if not order_by:
+                raise ValueError("start_after needs order_by")
+            value, doc_id = start_after
+            if descending:
+                rows = [row for row in rows if (row[1][order_by], row[0]) < (value, doc_id)]
+            else:
+                rows = [row for row in rows if (row[1][order_by], row[0]) > (value, doc_id)]
+        if limit:
+            rows = rows[:limit]
+        self.reads += len(rows)
+        if select is not None:
+            return [(doc_id, copy.deepcopy(project(doc, select))) for doc_id, doc in rows]
+        return [(doc_id, copy.deepcopy(doc)) for doc_id, doc in rows]
+
+    async def commit(self, ops: List[WriteOp]) -> None:
+        await self._round_trip()
+        self.commits += 1
+        self.writes += len(ops)
+        if self.discard_writes:
+            return
+        # Validate first so a failing batch changes nothing, like a Firestore commit
+        exists: Dict[Tuple[str, str], bool] = {}
+        for op in ops:
+            key = (op.collection, op.doc_id)
+            present = exists.get(key, op.doc_id in self.collections.get(op.collection, {}))
+            if op.kind == "update" and not present:
+                raise DocumentNotFound(f"No document to update: {op.collection}/{op.doc_id}")
+            exists[key] = op.kind != "delete"
+        for op in ops:
+            docs = self.collections.setdefault(op.collection, {})
+            if op.kind == "set":
+                docs[op.doc_id] = apply_update({}, op.data)
+            elif op.kind == "update":
+                apply_update(docs[op.doc_id], op.data)
+            else:
+                docs.pop(op.doc_id, None)
+
+
+_store: Optional[DocumentStore] = None
+_store_pid: Optional[int] = None
+
+
+def firebase_app():
+    """The default firebase_admin app, initialized from the service account on first use."""
+    import firebase_admin
+    from firebase_admin import credentials
+
+    if not firebase_admin._apps:
+        return firebase_admin.initialize_app(credentials.Certificate(FIREBASE_SERVICE_ACCOUNT_PATH))
+    return firebase_admin.get_app()
+
+
+def _firestore_client():
+    if FIRESTORE_EMULATOR_HOST:
+        # The Cloud SDK picks up FIRESTORE_EMULATOR_HOST and uses anonymous credentials
+        from google.cloud.firestore import AsyncClient
+
+        print(f"🧪 Using Firestore emulator at {FIRESTORE_EMULATOR_HOST}")
+        return AsyncClient(project=FIRESTORE_PROJECT_ID)
+
+    from firebase_admin import firestore_async
+
+    return firestore_async.client(firebase_app())
+
+
+def get_store() -> DocumentStore:
+    """Process-wide store, created on first use (and again after a fork)."""
+    global _store, _store_pid
+    if _store is None or (_store_pid is not None and _store_pid != os.getpid()):
+        if FIRESTORE_BACKEND == "memory":
+            _store = MemoryStore()
+        else:
+            _store = FirestoreStore(_firestore_client())
+        _store_pid = os.getpid()
+    return _store
+
+
+def set_store(store: DocumentStore) -> None:
+    """Install a store explicitly (tests, benchmarks, load-test app); kept across forks."""
+    global _store, _store_pid
+    _store = store
+    _store_pid = None
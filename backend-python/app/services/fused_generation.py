@@ -0,0 +1,157 @@
+"""
+Fused multi-output generation: one Gemini request with responseMimeType
+application/json and a response schema returns several outputs together, so
+the source text (input tokens), the round trip and the per-request quota are
+paid once instead of once per output.
+
+Each FusedField renders its JSON value to the same plain-text format the
+individual prompt produces, and returns None when the value is missing or
+malformed. Only those fields are then regenerated with their individual
+prompts (concurrently, through the key scheduler). If the fused request fails
+outright, every field falls back.
+
+Enabled with FUSED_GENERATION=true; the per-output prompts remain the default.
+"""
+
+import asyncio
+import json
+import os
+import time
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from app.services.gemini_client import generate_json, generate_with_gemini
+
+FUSED_GENERATION = os.getenv("FUSED_GENERATION", "false").lower() == "true"
+FUSED_MAX_OUTPUT_TOKENS = int(os.getenv("FUSED_MAX_OUTPUT_TOKENS", "8192"))
+
+OutputCallback = Callable[[str, str], Awaitable[None]]
+
+
+@dataclass
+class FusedField:
+    name: str
+    # Gemini responseSchema fragment (OpenAPI subset) for this field
+    schema: dict
+    # JSON value -> output text, or None when missing/malformed
+    render: Callable[[Any], Optional[str]]
+    # (prompt, system) for the individual fallback call
+    fallback: Tuple[str, str]
+
+
+@dataclass
+class FusedResult:
+    outputs: Dict[str, str] = field(default_factory=dict)
+    errors: Dict[str, str] = field(default_factory=dict)
+    fused_fields: List[str] = field(default_factory=list)
+    fallback_fields: List[str] = field(default_factory=list)
+    fused_ms: float = 0.0
+    fallback_ms: float = 0.0
+
+    def timings_summary(self) -> dict:
+        return {
+            "mode": "fused",
+            "fusedMs": self.fused_ms,
+            "fallbackMs": self.fallback_ms,
+            "fusedFields": self.fused_fields,
+            "fallbackFields": self.fallback_fields,
+        }
+
+
+def response_schema(fields: List[FusedField]) -> dict:
+    return {
+        "type": "OBJECT",
+        "properties": {f.name: f.schema for f in fields},
+        "required": [f.name for f in fields],
+        "propertyOrdering": [f.name for f in fields],
+    }
+
+
+def render_text(min_words: int = 1, must_contain: Tuple[str, ...] = ()) -> Callable[[Any], Optional[str]]:
+    """Renderer for a plain STRING field with a minimum length and optional required markers."""
+    def render(value: Any) -> Optional[str]:
+        if not isinstance(value, str):
+            return None
+        text = value.strip()
+        if len(text.split()) < min_words:
+            return None
+        if must_contain and not any(marker in text for marker in must_contain):
+            return None
+        return text
+    return render
+
+
+def parse_fused(text: str) -> Dict[str, Any]:
+    """Parse the fused JSON, tolerating code fences; {} when it is not a JSON object."""
+    cleaned = text.strip()
+    if cleaned.startswith("```"):
+        cleaned = cleaned.split("\n", 1)[1] if "\n" in cleaned else ""
+        cleaned = cleaned.rsplit("```", 1)[0]
+    try:
+        data = json.loads(cleaned)
+    except ValueError:
+        return {}
+    return data if isinstance(data, dict) else {}
+
+
+def render_fields(fields: List[FusedField], data: Dict[str, Any]) -> Dict[str, str]:
+    rendered = {}
+    for f in fields:
+        try:
+            text = f.render(data.get(f.name))
+        except Exception:
+            text = None
+        if text:
+            rendered[f.name] = text
+    return rendered
+
+
+async def generate_fused(
+    prompt: str,
+    system: str,
+    fields: List[FusedField],
+    on_output: Optional[OutputCallback] = None,
+) -> FusedResult:
+    """One structured call for all fields, then individual calls for any field it got wrong."""
+    result = FusedResult()
+    start = time.perf_counter()
+    try:
+        raw = await generate_json(
+            prompt, system, schema=response_schema(fields), max_output_tokens=FUSED_MAX_OUTPUT_TOKENS
+        )
+        data = parse_fused(raw)
+    except Exception as e:
+        print(f"⚠️ Fused generation failed, using individual prompts: {getattr(e, 'detail', None) or e}")
+        data = {}
+    result.fused_ms = round((time.perf_counter() - start) * 1000, 1)
+
+    for name, text in render_fields(fields, data).items():
+        result.outputs[name] = text
+        result.fused_fields.append(name)
+        if on_output is not None:
+            await on_output(name, text)
+
+    missing = [f for f in fields if f.name not in result.outputs]
+    if missing:
+        result.fallback_fields = [f.name for f in missing]
+        print(f"↩️ Fused response missing/malformed {result.fallback_fields}, regenerating individually")
+        start = time.perf_counter()
+
+        async def fallback(f: FusedField) -> None:
+            try:
+                text = await generate_with_gemini(*f.fallback)
+            except Exception as e:
+                result.errors[f.name] = getattr(e, "detail", None) or str(e)
+                return
+            result.outputs[f.name] = text
+            if on_output is not None:
+                await on_output(f.name, text)
+
+        await asyncio.gather(*(fallback(f) for f in missing))
+        result.fallback_ms = round((time.perf_counter() - start) * 1000, 1)
+
+    print(
+        f"🧬 Fused generation: {len(result.fused_fields)}/{len(fields)} fields in one call "
+        f"({result.fused_ms:.0f} ms), {len(result.fallback_fields)} fallback(s)"
+    )
+    return result
@@ -0,0 +1,286 @@
+"""
+Async Google Gemini REST client shared by every LLM endpoint.
+Holds one pooled httpx.AsyncClient (keep-alive, HTTP/2 when `h2` is installed)
+and backs off with asyncio.sleep so a rate-limited call never blocks the event loop.
+Calls are spread over every configured key by the per-key token-bucket scheduler.
+stream_with_gemini forwards streamGenerateContent tokens as they arrive (SSE).
+"""
+
+import asyncio
+import importlib.util
+import json
+import os
+import time
+from typing import AsyncIterator, List, Optional
+
+import httpx
+from fastapi import HTTPException
+
+from app.services.llm_cache import LLMCache, get_llm_cache
+from app.services.rate_limiter import KeyScheduler
+
+GEMINI_MODEL = "gemini-2.5-flash"  # Gemini model for text tasks
+GEMINI_VISION_MODEL = "gemini-2.5-flash"  # Vision model (supports image analysis)
+GEMINI_API_BASE = "https://generativelanguage.googleapis.com/v1beta/models"
+
+# Per-key budgets (free tier for 2.5-flash is roughly 10-15 RPM / 250k TPM per key)
+GEMINI_RPM = float(os.getenv("GEMINI_RPM", "15"))
+GEMINI_TPM = float(os.getenv("GEMINI_TPM", "250000"))
+MAX_RETRIES = 5
+MAX_BACKOFF_SECONDS = 90
+
+_client: Optional[httpx.AsyncClient] = None
+_gemini_keys: Optional[List[str]] = None
+_scheduler: Optional[KeyScheduler] = None
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """Return the process-wide pooled HTTP client (created on first use)."""
+    global _client
+    if _client is None or _client.is_closed:
+        _client = httpx.AsyncClient(
+            http2=importlib.util.find_spec("h2") is not None,
+            limits=httpx.Limits(max_connections=200, max_keepalive_connections=50),
+            timeout=httpx.Timeout(90.0, connect=10.0),
+        )
+    return _client
+
+
+async def close_http_client() -> None:
+    """Close the pooled HTTP client (called on app shutdown)."""
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+
+def _get_gemini_keys() -> List[str]:
+    """Read GEMINI_API_KEYS (comma-separated) or GEMINI_API_KEY once, after dotenv has loaded."""
+    global _gemini_keys
+    if _gemini_keys is None:
+        keys = [k.strip() for k in os.getenv("GEMINI_API_KEYS", "").split(",") if k.strip()]
+        if not keys:
+            # Fallback to single key
+            single_key = os.getenv("GEMINI_API_KEY", "")
+            if single_key:
+                keys = [single_key]
+        _gemini_keys = keys
+    return _gemini_keys
+
+
+def get_scheduler() -> KeyScheduler:
+    """Return the process-wide key scheduler (one token bucket pair per API key)."""
+    global _scheduler
+    if _scheduler is None:
+        keys = _get_gemini_keys()
+        if not keys:
+            raise HTTPException(status_code=500, detail="No Gemini API key configured")
+        _scheduler = KeyScheduler(keys, rpm=GEMINI_RPM, tpm=GEMINI_TPM)
+        print(f"🔑 Gemini scheduler ready: {len(keys)} key(s), {GEMINI_RPM:g} RPM / {GEMINI_TPM:g} TPM each")
+    return _scheduler
+
+
+def estimate_tokens(payload: dict) -> int:
+    """Rough input-token estimate (~4 chars per token) used to reserve TPM budget."""
+    chars = sum(
+        len(part.get("text", ""))
+        for content in payload.get("contents", [])
+        for part in content.get("parts", [])
+    )
+    return max(1, chars // 4)
+
+
+def _retry_after_seconds(response: httpx.Response, attempt: int) -> float:
+    """Honour Retry-After when present, otherwise 10s, 20s, 40s, 80s, 90s."""
+    retry_after = response.headers.get("Retry-After")
+    if retry_after:
+        try:
+            return min(float(retry_after), MAX_BACKOFF_SECONDS)
+        except ValueError:
+            pass
+    return min((2 ** attempt) * 10, MAX_BACKOFF_SECONDS)
+
+
+def extract_text(data: dict) -> str:
+    """Pull the generated text out of a generateContent response body."""
+    return data["candidates"][0]["content"]["parts"][0]["text"]
+
+
+async def generate_content(
+    payload: dict,
+    model: str = GEMINI_MODEL,
+    timeout: float = 90.0,
+    label: str = "Gemini",
+) -> dict:
+    """POST a generateContent payload on the least-loaded key, with async backoff on 429s."""
+    client = get_http_client()
+    scheduler = get_scheduler()
+    headers = {"Content-Type": "application/json"}
+    estimated = estimate_tokens(payload)
+
+    for attempt in range(MAX_RETRIES):
+        # Waits (without blocking the loop) for the key with the most headroom
+        key = await scheduler.acquire(estimated)
+        url = f"{GEMINI_API_BASE}/{model}:generateContent?key={key}"
+        try:
+            response = await client.post(url, headers=headers, json=payload, timeout=timeout)
+        except httpx.HTTPError as e:
+            print(f"⚠️ {label} request failed (attempt {attempt+1}/{MAX_RETRIES}): {e}")
+            if attempt < MAX_RETRIES - 1:
+                await asyncio.sleep(3)
+                continue
+            raise HTTPException(status_code=500, detail=f"{label} processing failed: {str(e)}")
+
+        if response.status_code == 429:
+            # Bench this key until its backoff expires; other keys keep serving
+            wait_time = _retry_after_seconds(response, attempt)
+            scheduler.penalize(key, wait_time)
+            print(f"⏳ {label} rate limited (attempt {attempt+1}/{MAX_RETRIES}), key cooling down {wait_time:.0f}s...")
+            continue
+
+        if response.status_code != 200:
+            print(f"❌ {label} API Error {response.status_code}: {response.text}")
+            raise HTTPException(status_code=500, detail=f"{label} API error: {response.text}")
+
+        data = response.json()
+        usage = data.get("usageMetadata", {})
+        if "totalTokenCount" in usage:
+            scheduler.record_usage(key, estimated, int(usage["totalTokenCount"]))
+        return data
+
+    raise HTTPException(status_code=429, detail="Gemini API rate limit exceeded. Please wait 1-2 minutes and try again.")
+
+
+DEFAULT_GENERATION_CONFIG = {
+    "temperature": 0.3,
+    "maxOutputTokens": 4096
+}
+
+
+def _text_payload(prompt: str, system: Optional[str], generation_config: dict) -> dict:
+    # Build contents array
+    if system:
+        prompt = f"{system}\n\n{prompt}"
+    return {
+        "contents": [{"role": "user", "parts": [{"text": prompt}]}],
+        "generationConfig": generation_config
+    }
+
+
+async def generate_with_gemini(
+    prompt: str, system: str = None, stream: bool = False, use_cache: bool = True
+) -> str:
+    """Generate text using Google Gemini native REST API with retry for rate limits"""
+    if stream:
+        return "".join([delta async for delta in stream_with_gemini(prompt, system, use_cache)])
+
+    return await _generate_cached(prompt, system, dict(DEFAULT_GENERATION_CONFIG), use_cache)
+
+
+async def _generate_cached(
+    prompt: str, system: Optional[str], generation_config: dict, use_cache: bool, timeout: float = 90.0
+) -> str:
+    cache = get_llm_cache()
+    cache_key = LLMCache.make_key(GEMINI_MODEL, system, prompt, generation_config)
+    if use_cache:
+        cached = await cache.aget(cache_key, prompt_chars=len(prompt) + len(system or ""))
+        if cached is not None:
+            return cached
+
+    payload = _text_payload(prompt, system, generation_config)
+    data = await generate_content(payload, model=GEMINI_MODEL, timeout=timeout)
+    text = extract_text(data)
+    await cache.aset(cache_key, text)
+    return text
+
+
+def json_generation_config(schema: dict, max_output_tokens: int = 8192) -> dict:
+    """generationConfig for structured output constrained to a response schema."""
+    return {
+        **DEFAULT_GENERATION_CONFIG,
+        "maxOutputTokens": max_output_tokens,
+        "responseMimeType": "application/json",
+        "responseSchema": schema,
+    }
+
+
+async def generate_json(
+    prompt: str, system: str = None, schema: dict = None, max_output_tokens: int = 8192, use_cache: bool = True
+) -> str:
+    """Generate a JSON document matching `schema`; returns the raw JSON text (parse and validate it)."""
+    generation_config = json_generation_config(schema, max_output_tokens)
+    return await _generate_cached(prompt, system, generation_config, use_cache, timeout=150.0)
+
+
+def _stream_delta(event: dict) -> str:
+    """Text carried by one streamGenerateContent SSE event (may be empty)."""
+    candidates = event.get("candidates") or [{}]
+    parts = candidates[0].get("content", {}).get("parts", [])
+    return "".join(part.get("text", "") for part in parts)
+
+
+async def stream_with_gemini(
+    prompt: str, system: str = None, use_cache: bool = True
+) -> AsyncIterator[str]:
+    """Yield text deltas from streamGenerateContent; the full text is cached once complete."""
+    generation_config = dict(DEFAULT_GENERATION_CONFIG)
+    cache = get_llm_cache()
+    cache_key = LLMCache.make_key(GEMINI_MODEL, system, prompt, generation_config)
+    if use_cache:
+        cached = await cache.aget(cache_key, prompt_chars=len(prompt) + len(system or ""))
+        if cached is not None:
+            yield cached
+            return
+
+    client = get_http_client()
+    scheduler = get_scheduler()
+    payload = _text_payload(prompt, system, generation_config)
+    estimated = estimate_tokens(payload)
+
+    for attempt in range(MAX_RETRIES):
+        key = await scheduler.acquire(estimated)
+        url = f"{GEMINI_API_BASE}/{GEMINI_MODEL}:streamGenerateContent?alt=sse&key={key}"
+        started = time.monotonic()
+        chunks: List[str] = []
+        try:
+            async with client.stream("POST", url, json=payload, timeout=90.0) as response:
+                if response.status_code == 429:
+                    wait_time = _retry_after_seconds(response, attempt)
+                    scheduler.penalize(key, wait_time)
+                    print(f"⏳ Gemini stream rate limited (attempt {attempt+1}/{MAX_RETRIES}), key cooling down {wait_time:.0f}s...")
+                    continue
+                if response.status_code != 200:
+                    body = (await response.aread()).decode("utf-8", "replace")
+                    print(f"❌ Gemini stream API Error {response.status_code}: {body}")
+                    raise HTTPException(status_code=500, detail=f"Gemini API error: {body}")
+
+                usage = {}
+                async for line in response.aiter_lines():
+                    if not line.startswith("data:"):
+                        continue
+                    try:
+                        event = json.loads(line[5:].strip())
+                    except ValueError as e:
+                        print(f"⚠️ Skipping malformed Gemini stream event: {e}")
+                        continue
+                    usage = event.get("usageMetadata", usage)
+                    delta = _stream_delta(event)
+                    if delta:
+                        if not chunks:
+                            print(f"⚡ First Gemini token after {time.monotonic() - started:.2f}s")
+                        chunks.append(delta)
+                        yield delta
+        except httpx.HTTPError as e:
+            # Only safe to retry if nothing has been forwarded yet
+            print(f"⚠️ Gemini stream failed (attempt {attempt+1}/{MAX_RETRIES}): {e}")
+            if not chunks and attempt < MAX_RETRIES - 1:
+                await asyncio.sleep(3)
+                continue
+            raise HTTPException(status_code=500, detail=f"Gemini processing failed: {str(e)}")
+
+        if "totalTokenCount" in usage:
+            scheduler.record_usage(key, estimated, int(usage["totalTokenCount"]))
+        await cache.aset(cache_key, "".join(chunks))
+        return
+
+    raise HTTPException(status_code=429, detail="Gemini API rate limit exceeded. Please wait 1-2 minutes and try again.")
@@ -0,0 +1,169 @@
+"""
+Handwriting image preparation for the Gemini vision call, run in a bounded
+process pool so decoding and enhancing a large photo never blocks the event loop.
+
+Pipeline (in the pool process): decode → downscale to IMAGE_MAX_DIMENSION →
+contrast/sharpness/brightness enhancement → JPEG encode → base64.
+Downscaling happens before the enhancers, so they run on the small image, and
+JPEGs are decoded at a reduced scale via Image.draft when possible. Anything
+larger than the vision model's working resolution only adds upload time.
+
+Backpressure: at most IMAGE_MAX_PENDING images are queued or processing per
+server process; further requests wait up to IMAGE_QUEUE_TIMEOUT seconds for a
+slot and then get ImagePipelineBusy (mapped to HTTP 503 by the endpoint).
+"""
+
+import asyncio
+import base64
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass, field
+from io import BytesIO
+from typing import Dict, Optional, Union
+
+IMAGE_WORKERS = int(os.getenv("IMAGE_WORKERS", "2"))
+IMAGE_MAX_PENDING = int(os.getenv("IMAGE_MAX_PENDING", str(IMAGE_WORKERS * 2)))
+IMAGE_QUEUE_TIMEOUT = float(os.getenv("IMAGE_QUEUE_TIMEOUT", "10"))
+# Longest side sent to the vision model, in pixels
+IMAGE_MAX_DIMENSION = int(os.getenv("IMAGE_MAX_DIMENSION", "2048"))
+IMAGE_JPEG_QUALITY = int(os.getenv("IMAGE_JPEG_QUALITY", "95"))
+
+_pool: Optional[ProcessPoolExecutor] = None
+_slots: Optional[asyncio.Semaphore] = None
+
+
+class ImagePipelineBusy(Exception):
+    """Raised when no processing slot frees up within IMAGE_QUEUE_TIMEOUT."""
+
+
+@dataclass
+class EnhancedImage:
+    base64_data: str
+    mime_type: str
+    width: int
+    height: int
+    original_size: tuple
+    bytes_in: int
+    bytes_out: int
+    timings_ms: Dict[str, float] = field(default_factory=dict)
+
+
+def enhance_image(source: Union[bytes, str], max_dimension: int, quality: int) -> EnhancedImage:
+    """Decode, downscale, enhance and re-encode one image (bytes or a file path). Runs in a pool process."""
+    from PIL import Image, ImageEnhance
+
+    timings: Dict[str, float] = {}
+    mark = time.perf_counter()
+
+    def lap(stage: str) -> None:
+        nonlocal mark
+        now = time.perf_counter()
+        timings[stage] = round((now - mark) * 1000, 1)
+        mark = now
+
+    # Large uploads arrive as a temp-file path so the bytes never cross the process boundary
+    if isinstance(source, str):
+        bytes_in = os.path.getsize(source)
+        img = Image.open(source)
+    else:
+        bytes_in = len(source)
+        img = Image.open(BytesIO(source))
+    original_size = img.size
+    # JPEG only: let the decoder skip detail we would throw away anyway
+    img.draft("RGB", (max_dimension, max_dimension))
+    # Convert to RGB if needed (handles RGBA, grayscale, etc.)
+    if img.mode != "RGB":
+        img = img.convert("RGB")
+    img.load()
+    lap("decode")
+
+    if max(img.size) > max_dimension:
+        img.thumbnail((max_dimension, max_dimension), Image.LANCZOS)
+    lap("resize")
+
+    # Increase contrast, sharpness, then a slight brightness boost
+    img = ImageEnhance.Contrast(img).enhance(1.5)
+    img = ImageEnhance.Sharpness(img).enhance(2.0)
+    img = ImageEnhance.Brightness(img).enhance(1.1)
+    lap("enhance")
+
+    buf = BytesIO()
+    img.save(buf, format="JPEG", quality=quality)
+    encoded = buf.getvalue()
+    lap("encode")
+
+    b64 = base64.b64encode(encoded).decode("utf-8")
+    lap("base64")
+
+    return EnhancedImage(
+        base64_data=b64,
+        mime_type="image/jpeg",
+        width=img.size[0],
+        height=img.size[1],
+        original_size=original_size,
+        bytes_in=bytes_in,
+        bytes_out=len(encoded),
+        timings_ms=timings,
+    )
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    # Created lazily so each server worker owns its pool (never inherited across fork);
+    # "spawn" avoids forking a process that already runs event-loop and HTTP threads
+    global _pool
+    if _pool is None:
+        _pool = ProcessPoolExecutor(
+            max_workers=IMAGE_WORKERS, mp_context=multiprocessing.get_context("spawn")
+        )
+    return _pool
+
+
+def _get_slots() -> asyncio.Semaphore:
+    global _slots
+    if _slots is None:
+        _slots = asyncio.Semaphore(IMAGE_MAX_PENDING)
+    return _slots
+
+
+async def enhance_for_vision(source: Union[bytes, str]) -> EnhancedImage:
+    """Run enhance_image in the process pool, waiting for a free slot first."""
+    slots = _get_slots()
+    start = time.perf_counter()
+    try:
+        await asyncio.wait_for(slots.acquire(), timeout=IMAGE_QUEUE_TIMEOUT)
+    except asyncio.TimeoutError:
+        raise ImagePipelineBusy(
+            f"Image pipeline busy ({IMAGE_MAX_PENDING} images pending for {IMAGE_QUEUE_TIMEOUT:.0f}s)"
+        )
+    try:
+        queued_ms = round((time.perf_counter() - start) * 1000, 1)
+        loop = asyncio.get_running_loop()
+        result = await loop.run_in_executor(
+            _get_pool(), enhance_image, source, IMAGE_MAX_DIMENSION, IMAGE_JPEG_QUALITY
+        )
+    except BrokenProcessPool:
+        # A pool process died (e.g. out of memory on a huge image); start fresh next time
+        shutdown_image_pool()
+        raise
+    finally:
+        slots.release()
+
+    total_ms = round((time.perf_counter() - start) * 1000, 1)
+    result.timings_ms = {"queue": queued_ms, **result.timings_ms, "total": total_ms}
+    stages = " ".join(f"{k}={v}ms" for k, v in result.timings_ms.items())
+    print(
+        f"🖼️ Image enhanced: {result.original_size[0]}x{result.original_size[1]} → "
+        f"{result.width}x{result.height}, {result.bytes_in} → {result.bytes_out} bytes | {stages}"
+    )
+    return result
+
+
+def shutdown_image_pool() -> None:
+    """Stop pool processes (called on app shutdown)."""
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
@@ -0,0 +1,389 @@
+"""
+Background job queue with a bounded asyncio worker pool.
+Long-running work (e.g. lecture processing) is enqueued and returns a job ID
+immediately; clients poll the job status instead of holding a request open.
+Job state lives in a pluggable backend — SQLite by default, so queued or
+interrupted jobs are picked up again after a worker restart.
+
+Under a multi-process server every worker runs its own queue on the shared
+SQLite file. Jobs record the pid of the worker that owns them, and a
+starting worker only recovers jobs whose owner is no longer alive.
+
+Backend calls block (SQLite waits up to 10 s on a locked file), so JobQueue
+runs every one of them through asyncio.to_thread; enqueue, get and finish are
+coroutines for that reason. The SQLite file is opened in WAL mode so status
+polls from other workers read while a job's progress is being written.
+
+Retries are deduplicated in the backend, not in process memory: a unique
+partial index allows one queued or running job per dedupe_key, so a retry
+that lands on another worker attaches to the job already in flight.
+"""
+
+import asyncio
+import contextlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from dataclasses import asdict, dataclass, field
+from typing import Awaitable, Callable, ContextManager, Dict, List, Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows: single-process development only
+    fcntl = None
+
+QUEUED = "queued"
+RUNNING = "running"
+COMPLETED = "completed"
+FAILED = "failed"
+ACTIVE_STATES = (QUEUED, RUNNING)
+_ACTIVE_SQL = "(" + ", ".join(f"'{state}'" for state in ACTIVE_STATES) + ")"
+
+
+class QueueFullError(Exception):
+    """Raised when the queue already holds its maximum number of pending jobs."""
+
+
+@dataclass
+class Job:
+    """One unit of background work and its progress."""
+
+    kind: str
+    payload: dict
+    id: str = field(default_factory=lambda: uuid.uuid4().hex)
+    status: str = QUEUED
+    progress: Dict[str, str] = field(default_factory=dict)
+    result: Optional[dict] = None
+    error: Optional[str] = None
+    attempts: int = 0
+    created_at: float = field(default_factory=time.time)
+    updated_at: float = field(default_factory=time.time)
+    # pid of the worker process whose in-memory queue holds this job
+    owner: Optional[int] = None
+
+    def to_dict(self) -> dict:
+        data = asdict(self)
+        data["jobId"] = data.pop("id")
+        return data
+
+
+class JobBackend:
+    """Storage interface for jobs; JobQueue calls it from worker threads, so it must be thread-safe."""
+
+    def save(self, job: Job) -> None:
+        raise NotImplementedError
+
+    def get(self, job_id: str) -> Optional[Job]:
+        raise NotImplementedError
+
+    def create(self, job: Job) -> Job:
+        """Store a new job, or return the active job that already holds its dedupe_key."""
+        raise NotImplementedError
+
+    def find_active(self, dedupe_key: str) -> Optional[Job]:
+        raise NotImplementedError
+
+    def list_unfinished(self) -> List[Job]:
+        raise NotImplementedError
+
+    def recovery_lock(self) -> ContextManager:
+        """Held while a starting worker claims orphaned jobs."""
+        return contextlib.nullcontext()
+
+
+class MemoryJobBackend(JobBackend):
+    """Process-local backend (jobs are lost on restart); handy for development."""
+
+    def __init__(self):
+        self._jobs: Dict[str, Job] = {}
+        self._lock = threading.Lock()
+
+    def save(self, job: Job) -> None:
+        self._jobs[job.id] = job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        return self._jobs.get(job_id)
+
+    def create(self, job: Job) -> Job:
+        with self._lock:
+            dedupe_key = job.payload.get("dedupe_key")
+            existing = self.find_active(dedupe_key) if dedupe_key else None
+            if existing is not None:
+                return existing
+            self._jobs[job.id] = job
+            return job
+
+    def find_active(self, dedupe_key: str) -> Optional[Job]:
+        for job in list(self._jobs.values()):
+            if job.status in ACTIVE_STATES and job.payload.get("dedupe_key") == dedupe_key:
+                return job
+        return None
+
+    def list_unfinished(self) -> List[Job]:
+        return [j for j in self._jobs.values() if j.status in ACTIVE_STATES]
+
+
+class SQLiteJobBackend(JobBackend):
+    """Local SQLite file backend so jobs survive a worker restart."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._pid: Optional[int] = None
+
+    def _connection(self) -> sqlite3.Connection:
+        # Connections must not cross fork(): each worker process opens its own
+        if self._conn is None or self._pid != os.getpid():
+            self._conn = sqlite3.connect(self.path, check_same_thread=False, timeout=10)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS jobs ("
+                "id TEXT PRIMARY KEY, status TEXT NOT NULL, data TEXT NOT NULL, created_at REAL NOT NULL, "
+                "dedupe_key TEXT)"
+            )
+            columns = {row[1] for row in self._conn.execute("PRAGMA table_info(jobs)")}
+            if "dedupe_key" not in columns:  # files written before dedupe moved into the backend
+                self._conn.execute("ALTER TABLE jobs ADD COLUMN dedupe_key TEXT")
+            self._conn.execute(
+                "CREATE UNIQUE INDEX IF NOT EXISTS jobs_active_dedupe ON jobs (dedupe_key) "
+                f"WHERE dedupe_key IS NOT NULL AND status IN {_ACTIVE_SQL}"
+            )
+            self._conn.commit()
+            self._pid = os.getpid()
+        return self._conn
+
+    @staticmethod
+    def _row(job: Job) -> tuple:
+        return (
+            job.id, job.status, json.dumps(asdict(job), default=str), job.created_at,
+            job.payload.get("dedupe_key"),
+        )
+
+    def save(self, job: Job) -> None:
+        # An upsert, not INSERT OR REPLACE: replacing would silently delete another
+        # active job that holds the same dedupe_key instead of raising
+        with self._lock:
+            conn = self._connection()
+            conn.execute(
+                "INSERT INTO jobs (id, status, data, created_at, dedupe_key) VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT (id) DO UPDATE SET status = excluded.status, data = excluded.data",
+                self._row(job),
+            )
+            conn.commit()
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            row = self._connection().execute("SELECT data FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return Job(**json.loads(row[0])) if row else None
+
+    def create(self, job: Job) -> Job:
+        while True:
+            with self._lock:
+                conn = self._connection()
+                try:
+                    conn.execute(
+                        "INSERT INTO jobs (id, status, data, created_at, dedupe_key) VALUES (?, ?, ?, ?, ?)",
+                        self._row(job),
+                    )
+                    conn.commit()
+                    return job
+                except sqlite3.IntegrityError:
+                    # Another worker queued the same dedupe_key between our lookup and insert
+                    conn.rollback()
+            existing = self.find_active(job.payload["dedupe_key"])
+            if existing is not None:
+                return existing
+            # ...and it has already finished: try the insert again
+
+    def find_active(self, dedupe_key: str) -> Optional[Job]:
+        with self._lock:
+            row = self._connection().execute(
+                f"SELECT data FROM jobs WHERE dedupe_key = ? AND status IN {_ACTIVE_SQL}",
+                (dedupe_key,),
+            ).fetchone()
+        return Job(**json.loads(row[0])) if row else None
+
+    def list_unfinished(self) -> List[Job]:
+        with self._lock:
+            rows = self._connection().execute(
+                "SELECT data FROM jobs WHERE status IN (?, ?) ORDER BY created_at",
+                ACTIVE_STATES,
+            ).fetchall()
+        return [Job(**json.loads(r[0])) for r in rows]
+
+    @contextlib.contextmanager
+    def recovery_lock(self):
+        if fcntl is None:
+            yield
+            return
+        with open(f"{self.path}.lock", "w") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def _process_alive(pid: Optional[int]) -> bool:
+    if not pid:
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+ProgressCallback = Callable[[str, str], Awaitable[None]]
+JobHandler = Callable[[Job, ProgressCallback], Awaitable[dict]]
+
+
+class JobQueue:
+    """Bounded worker pool pulling jobs from an asyncio queue backed by a JobBackend."""
+
+    def __init__(self, backend: JobBackend, workers: int = 4, max_pending: int = 100):
+        self.backend = backend
+        self.workers = workers
+        self.max_pending = max_pending
+        self._handlers: Dict[str, JobHandler] = {}
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+
+    def register(self, kind: str, handler: JobHandler) -> None:
+        """Register the coroutine that runs jobs of `kind`."""
+        self._handlers[kind] = handler
+
+    async def start(self) -> None:
+        """Spawn workers and re-enqueue jobs left unfinished by a previous process."""
+        if self._tasks:
+            return
+        self._queue = asyncio.Queue()
+        for job in await asyncio.to_thread(self._claim_orphans, os.getpid()):
+            self._queue.put_nowait(job.id)
+            print(f"♻️  Recovered job {job.id} ({job.kind})")
+        self._tasks = [asyncio.create_task(self._worker(i)) for i in range(self.workers)]
+        print(f"🧵 Job queue started with {self.workers} worker(s)")
+
+    async def stop(self) -> None:
+        """Cancel workers; in-flight jobs stay 'running' and are recovered on next start."""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def _claim_orphans(self, pid: int) -> List[Job]:
+        """Take over unfinished jobs whose owning worker is gone (runs in a thread)."""
+        claimed = []
+        with self.backend.recovery_lock():
+            for job in self.backend.list_unfinished():
+                if job.owner != pid and _process_alive(job.owner):
+                    continue  # still queued or running in another live worker
+                job.status = QUEUED
+                job.owner = pid
+                self.backend.save(job)
+                claimed.append(job)
+        return claimed
+
+    async def _save(self, job: Job) -> None:
+        await asyncio.to_thread(self.backend.save, job)
+
+    async def enqueue(self, kind: str, payload: dict, dedupe_key: Optional[str] = None) -> Job:
+        """Queue a job and return it; reuses the active job with the same dedupe_key."""
+        if kind not in self._handlers:
+            raise ValueError(f"No handler registered for job kind '{kind}'")
+        if dedupe_key:
+            # Looked up in the shared backend: the retry may reach a different worker
+            existing = await asyncio.to_thread(self.backend.find_active, dedupe_key)
+            if existing is not None:
+                return existing
+        if self._queue is None:
+            raise RuntimeError("Job queue has not been started")
+        if self._queue.qsize() >= self.max_pending:
+            raise QueueFullError(f"Job queue is full ({self.max_pending} pending)")
+
+        job = Job(kind=kind, payload={**payload, "dedupe_key": dedupe_key}, owner=os.getpid())
+        stored = await asyncio.to_thread(self.backend.create, job)
+        if stored.id == job.id:
+            self._queue.put_nowait(job.id)
+        return stored
+
+    async def get(self, job_id: str) -> Optional[Job]:
+        return await asyncio.to_thread(self.backend.get, job_id)
+
+    async def finish(self, job_id: str, result: Optional[dict] = None, error: Optional[str] = None) -> Optional[Job]:
+        """Record the outcome of an active job from outside its worker (e.g. a webhook
+        delivered to another process). The owning worker's handler saves the same outcome later."""
+        job = await self.get(job_id)
+        if job is None or job.status not in ACTIVE_STATES:
+            return job
+        job.status = FAILED if error else COMPLETED
+        job.result = result
+        job.error = error
+        job.updated_at = time.time()
+        await self._save(job)
+        return job
+
+    async def _worker(self, worker_id: int) -> None:
+        while True:
+            job_id = await self._queue.get()
+            try:
+                job = await self.get(job_id)
+                if job is not None:
+                    await self._run(job)
+            finally:
+                self._queue.task_done()
+
+    async def _run(self, job: Job) -> None:
+        handler = self._handlers[job.kind]
+        job.status = RUNNING
+        job.attempts += 1
+        job.updated_at = time.time()
+        await self._save(job)
+
+        async def report(step: str, state: str) -> None:
+            job.progress[step] = state
+            job.updated_at = time.time()
+            await self._save(job)
+
+        try:
+            job.result = await handler(job, report)
+            job.status = COMPLETED
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"❌ Job {job.id} ({job.kind}) failed: {e}")
+            job.status = FAILED
+            job.error = getattr(e, "detail", None) or str(e)
+        finally:
+            job.updated_at = time.time()
+            await self._save(job)
+
+
+def create_job_queue() -> JobQueue:
+    """Build the queue from env: JOB_QUEUE_BACKEND (sqlite|memory), JOB_QUEUE_DB, JOB_WORKERS."""
+    if os.getenv("JOB_QUEUE_BACKEND", "sqlite").lower() == "memory":
+        backend: JobBackend = MemoryJobBackend()
+    else:
+        backend = SQLiteJobBackend(os.getenv("JOB_QUEUE_DB", "jobs.sqlite3"))
+    return JobQueue(
+        backend,
+        workers=int(os.getenv("JOB_WORKERS", "4")),
+        max_pending=int(os.getenv("JOB_QUEUE_MAX_PENDING", "100")),
+    )
+
+
+_queue: Optional[JobQueue] = None
+
+
+def get_job_queue() -> JobQueue:
+    """Process-wide queue shared by main.py and the routers that register job kinds."""
+    global _queue
+    if _queue is None:
+        _queue = create_job_queue()
+    return _queue
@@ -0,0 +1,241 @@
+"""
+Large generated lecture outputs (simpleText, detailedSteps, mindMap, summary)
+kept out of the lecture document as compressed blobs.
+
+With a blob store configured (ARTIFACT_STORE, see blob_store.py), an output of
+at least ARTIFACT_MIN_BYTES is compressed (zstd when the zstandard package is
+installed, gzip otherwise) and stored under a content-addressed key. The
+document then holds only a short preview in the field itself and a reference
+in artifacts.<field>:
+
+    {"key": "lectures/<id>/mindMap/<sha>.zst", "codec": "zstd",
+     "bytes": 48213, "storedBytes": 9120, "sha256": "..."}
+
+Smaller outputs stay inline with artifacts.<field> set to None, so a field
+that is later rewritten inline never keeps a stale reference. Writers go
+through save_outputs(), which deletes the blob a rewritten field used to
+reference once the new document has been committed. Readers call hydrate()
+to put the full text back (only the fields they need, and only when they
+need them); documents without references pass through unchanged. With
+ARTIFACT_STORE=inline, updates are written exactly as given.
+
+The per-chunk results kept for incremental reprocessing (lectureChunks, see
+lecture_processing.ChunkMemo) are stored the same way by save_chunk_memo().
+"""
+
+import asyncio
+import gzip
+import hashlib
+import json
+import os
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional
+
+from app.services.blob_store import get_blob_store
+from app.services.lecture_processing import LECTURE_OUTPUTS
+from app.services.repositories import lecture_chunks, lectures
+
+try:
+    import zstandard
+except ImportError:  # gzip is always available
+    zstandard = None
+
+ARTIFACT_FIELDS = LECTURE_OUTPUTS
+ARTIFACT_MIN_BYTES = int(os.getenv("ARTIFACT_MIN_BYTES", "4096"))
+ARTIFACT_PREVIEW_CHARS = int(os.getenv("ARTIFACT_PREVIEW_CHARS", "280"))
+ARTIFACT_COMPRESSION = os.getenv("ARTIFACT_COMPRESSION", "zstd").lower()
+# Blob reads in flight per hydrate_many() call (full listings, exports)
+ARTIFACT_FETCH_CONCURRENCY = int(os.getenv("ARTIFACT_FETCH_CONCURRENCY", "16"))
+# Firestore documents are capped at 1 MiB
+CHUNK_MEMO_INLINE_MAX_BYTES = 900 * 1024
+
+_EXTENSIONS = {"zstd": "zst", "gzip": "gz"}
+
+
+def codec() -> str:
+    return "zstd" if ARTIFACT_COMPRESSION == "zstd" and zstandard is not None else "gzip"
+
+
+def compress(data: bytes, name: str) -> bytes:
+    if name == "zstd":
+        return zstandard.ZstdCompressor(level=6).compress(data)
+    return gzip.compress(data, compresslevel=6)
+
+
+def decompress(data: bytes, name: str) -> bytes:
+    if name == "zstd":
+        if zstandard is None:
+            raise RuntimeError("zstd artifact found but the zstandard package is not installed")
+        return zstandard.ZstdDecompressor().decompress(data)
+    return gzip.decompress(data)
+
+
+def preview(text: str) -> str:
+    if len(text) <= ARTIFACT_PREVIEW_CHARS:
+        return text
+    return text[:ARTIFACT_PREVIEW_CHARS].rstrip() + "…"
+
+
+def blob_prefix(lecture_id: str) -> str:
+    return f"lectures/{lecture_id}/"
+
+
+async def offload_fields(lecture_id: str, fields: Dict[str, Any]) -> Dict[str, Any]:
+    """Turn a lecture update into one that stores large outputs as blobs.
+
+    Blobs are written before the returned update is committed, so a document
+    never references a blob that does not exist yet.
+    """
+    store = get_blob_store()
+    update = dict(fields)
+    if store is None:
+        return update
+    for name in ARTIFACT_FIELDS:
+        text = fields.get(name)
+        if not isinstance(text, str):
+            continue
+        raw = text.encode("utf-8")
+        if len(raw) < ARTIFACT_MIN_BYTES:
+            update[f"artifacts.{name}"] = None
+            continue
+        update[name] = preview(text)
+        update[f"artifacts.{name}"] = await _put_blob(store, f"{blob_prefix(lecture_id)}{name}/", raw)
+    return update
+
+
+async def _put_blob(store, prefix: str, raw: bytes) -> dict:
+    """Compress raw and store it under prefix + its content hash; returns the reference."""
+    digest = hashlib.sha256(raw).hexdigest()
+    name_codec = codec()
+    stored = await asyncio.to_thread(compress, raw, name_codec)
+    key = f"{prefix}{digest[:24]}.{_EXTENSIONS[name_codec]}"
+    await store.put(key, stored)
+    return {
+        "key": key,
+        "codec": name_codec,
+        "bytes": len(raw),
+        "storedBytes": len(stored),
+        "sha256": digest,
+    }
+
+
+async def save_outputs(
+    lecture_id: str,
+    fields: Dict[str, Any],
+    write: Callable[[str, Dict[str, Any]], Awaitable[Any]],
+) -> Any:
+    """offload_fields(), commit with write(lecture_id, update), then delete the blobs it replaced.
+
+    Returns whatever write returns. The previous references are read from the
+    store (not the cache) just before the write.
+    """
+    update = await offload_fields(lecture_id, fields)
+    rewritten = [name for name in ARTIFACT_FIELDS if f"artifacts.{name}" in update]
+    previous = {}
+    if rewritten:
+        doc = await lectures.get(lecture_id, cached=False)
+        previous = {name: ref for name, ref in references(doc or {}).items() if name in rewritten}
+    result = await write(lecture_id, update)
+    for name, ref in previous.items():
+        new = update[f"artifacts.{name}"]
+        if new is None or new["key"] != ref["key"]:
+            await _delete_blob(ref["key"])
+    return result
+
+
+async def _delete_blob(key: str) -> None:
+    # Best effort: the document no longer points here, so a failure only leaks the blob
+    try:
+        await get_blob_store().delete(key)
+    except Exception as e:
+        print(f"⚠️ Could not delete replaced artifact {key}: {e}")
+
+
+def references(doc: dict) -> Dict[str, dict]:
+    """Fields of doc whose full text lives in a blob."""
+    refs = doc.get("artifacts") or {}
+    return {name: ref for name, ref in refs.items() if name in ARTIFACT_FIELDS and isinstance(ref, dict)}
+
+
+async def load_field(ref: dict) -> str:
+    store = get_blob_store()
+    if store is None:
+        raise RuntimeError("Lecture has out-of-document artifacts but ARTIFACT_STORE=inline")
+    stored = await store.get(ref["key"])
+    return (await asyncio.to_thread(decompress, stored, ref["codec"])).decode("utf-8")
+
+
+async def hydrate(doc: dict, names: Optional[Iterable[str]] = None) -> dict:
+    """doc with the full text of its offloaded fields (all of them, or only `names`), in place.
+
+    A blob that cannot be read leaves the preview in place and is reported in
+    doc["artifactErrors"] rather than failing the whole read.
+    """
+    refs = references(doc)
+    if names is not None:
+        wanted = set(names)
+        refs = {name: ref for name, ref in refs.items() if name in wanted}
+    if not refs:
+        return doc
+
+    async def fetch(name: str, ref: dict) -> None:
+        try:
+            doc[name] = await load_field(ref)
+        except Exception as e:
+            print(f"⚠️ Could not load {name} of lecture {doc.get('id')}: {e}")
+            doc.setdefault("artifactErrors", {})[name] = str(e)
+
+    await asyncio.gather(*(fetch(name, ref) for name, ref in refs.items()))
+    return doc
+
+
+async def hydrate_many(docs: List[dict]) -> List[dict]:
+    """hydrate() every doc with at most ARTIFACT_FETCH_CONCURRENCY documents loading at once."""
+    slots = asyncio.Semaphore(ARTIFACT_FETCH_CONCURRENCY)
+
+    async def one(doc: dict) -> dict:
+        async with slots:
+            return await hydrate(doc)
+
+    return list(await asyncio.gather(*(one(doc) for doc in docs)))
+
+
+async def load_chunk_memo(lecture_id: str) -> Optional[dict]:
+    """ChunkMemo data saved by save_chunk_memo(), or None (also when it cannot be read)."""
+    doc = await lecture_chunks.get(lecture_id)
+    if doc is None or not isinstance(doc.get("blob"), dict):
+        return doc
+    try:
+        return json.loads(await load_field(doc["blob"]))
+    except Exception as e:
+        print(f"⚠️ Could not load chunk results of lecture {lecture_id}, reprocessing in full: {e}")
+        return None
+
+
+async def save_chunk_memo(lecture_id: str, data: dict) -> None:
+    """Keep a ChunkMemo (to_dict()) for the next run of this lecture.
+
+    With a blob store the memo is one compressed blob and the lectureChunks
+    document holds only its reference. Inline, a memo too large for a
+    Firestore document is not saved and the next run reprocesses in full.
+    """
+    raw = json.dumps(data, ensure_ascii=False).encode("utf-8")
+    store = get_blob_store()
+    if store is None:
+        if len(raw) > CHUNK_MEMO_INLINE_MAX_BYTES:
+            print(f"⚠️ Chunk results of lecture {lecture_id} are {len(raw) / 1024:.0f} KiB, too large to keep inline")
+            return
+        await lecture_chunks.put(lecture_id, data)
+        return
+    previous = await lecture_chunks.get(lecture_id)
+    ref = await _put_blob(store, f"{blob_prefix(lecture_id)}chunkMemo/", raw)
+    await lecture_chunks.put(lecture_id, {"version": data.get("version"), "blob": ref})
+    old = (previous or {}).get("blob")
+    if isinstance(old, dict) and old["key"] != ref["key"]:
+        await _delete_blob(old["key"])
+
+
+async def delete_artifacts(lecture_id: str) -> int:
+    store = get_blob_store()
+    if store is None:
+        return 0
+    return await store.delete_prefix(blob_prefix(lecture_id))
@@ -0,0 +1,510 @@
+"""
+Lecture processing pipeline: turns a transcription into the four study outputs
+(simpleText, detailedSteps, mindMap, summary) via Gemini.
+Used by the background job that backs /api/lectures/{id}/process.
+
+The syllable breakdown (simpleText) goes through Gemini unless SYLLABIFIER=local,
+in which case the deterministic in-process syllabifier produces it. The LLM stays
+the default until the local engine passes `python -m benchmarks.check_syllabifier`
+in the deployed environment.
+
+Long transcriptions are processed map-reduce style: the LLM syllable breakdown
+runs per chunk in parallel and is stitched back in order, while steps, mind map
+and summary are built from per-chunk notes that are condensed level by level
+until they fit in one prompt. Peak prompt size stays bounded at any lecture length.
+
+With FUSED_GENERATION=true, steps, mind map and summary come from one
+structured JSON request over the same source, with per-field fallback to
+their individual prompts (app/services/fused_generation.py).
+
+Reprocessing an edited transcription is incremental when the caller passes the
+ChunkMemo of the previous run. Chunk boundaries are content-defined (a chunk
+ends at an "anchor" sentence picked by its hash), so an edit changes only the
+chunks around it instead of shifting every boundary after it. Per-chunk notes
+and breakdowns are reused by chunk hash, and steps, mind map and summary are
+reused outright when the combined notes did not change.
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import re
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
+
+from fastapi import HTTPException
+
+from app.services.fused_generation import FUSED_GENERATION, FusedField, generate_fused, render_text
+from app.services.gemini_client import GEMINI_MODEL, generate_with_gemini, stream_with_gemini
+from app.services.sse import merge_streams, ordered_stream
+from app.services.syllabifier import syllabify_text
+
+LECTURE_OUTPUTS = ("simpleText", "detailedSteps", "mindMap", "summary")
+
+# Max characters of transcription per map-step prompt
+CHUNK_CHARS = int(os.getenv("LECTURE_CHUNK_CHARS", "3000"))
+# Max characters of combined notes fed to a single reduce prompt
+REDUCE_CHARS = int(os.getenv("LECTURE_REDUCE_CHARS", "6000"))
+MAX_REDUCE_LEVELS = 6
+# On average one sentence in this many ends a chunk (once it is three quarters full)
+CHUNK_ANCHOR_EVERY = 4
+# "llm" (Gemini breakdown prompt) or "local" (rule/dictionary syllabifier, no quota)
+SYLLABIFIER = os.getenv("SYLLABIFIER", "llm").lower()
+
+OutputCallback = Callable[[str, str], Awaitable[None]]
+
+
+def chunk_text(text: str, max_chunk_size: int = 500) -> list:
+    """Split text into chunks of whole sentences, keeping the original punctuation"""
+    sentences = [s.strip() for s in re.split(r"(?<=[.!?])\s+", text) if s.strip()]
+
+    chunks = []
+    current_chunk = []
+    current_length = 0
+
+    for sentence in _split_long_sentences(sentences, max_chunk_size):
+        sentence_length = len(sentence)
+        if current_length + sentence_length > max_chunk_size and current_chunk:
+            chunks.append(" ".join(current_chunk))
+            current_chunk = [sentence]
+            current_length = sentence_length
+        else:
+            current_chunk.append(sentence)
+            current_length += sentence_length
+
+    if current_chunk:
+        chunks.append(" ".join(current_chunk))
+
+    return chunks
+
+
+def _is_anchor(sentence: str) -> bool:
+    digest = hashlib.sha1(sentence.encode("utf-8")).digest()
+    return int.from_bytes(digest[:4], "big") % CHUNK_ANCHOR_EVERY == 0
+
+
+def content_chunks(text: str, max_chunk_size: int = 500) -> List[str]:
+    """Like chunk_text, but boundaries depend on the sentences themselves, not on offsets.
+
+    A chunk ends after an anchor sentence once it holds three quarters of
+    max_chunk_size (or when the next sentence would not fit), so after an edit
+    the chunks before it are unchanged and the ones after it line up again at
+    the next anchor. Chunks average about 10% smaller than chunk_text's, so a
+    lecture needs about 10% more map calls.
+    """
+    sentences = [s.strip() for s in re.split(r"(?<=[.!?])\s+", text) if s.strip()]
+    min_size = max_chunk_size * 3 // 4
+
+    chunks = []
+    current_chunk: List[str] = []
+    current_length = 0
+
+    for sentence in _split_long_sentences(sentences, max_chunk_size):
+        if current_chunk and current_length + len(sentence) > max_chunk_size:
+            chunks.append(" ".join(current_chunk))
+            current_chunk, current_length = [], 0
+        current_chunk.append(sentence)
+        current_length += len(sentence)
+        if current_length >= min_size and _is_anchor(sentence):
+            chunks.append(" ".join(current_chunk))
+            current_chunk, current_length = [], 0
+
+    if current_chunk:
+        chunks.append(" ".join(current_chunk))
+
+    return chunks
+
+
+def content_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()[:32]
+
+
+def _split_long_sentences(sentences: List[str], max_size: int) -> List[str]:
+    """Break unpunctuated run-ons (common in speech transcripts) at word boundaries."""
+    pieces = []
+    for sentence in sentences:
+        while len(sentence) > max_size:
+            cut = sentence.rfind(" ", 0, max_size)
+            if cut <= 0:
+                cut = max_size
+            pieces.append(sentence[:cut].strip())
+            sentence = sentence[cut:].strip()
+        if sentence:
+            pieces.append(sentence)
+    return pieces
+
+
+# ⚡ OPTIMIZED PROMPTS - SHORTER = FASTER
+def breakdown_prompt(text: str) -> tuple:
+    return (
+        f"""Break down by splitting words into syllables with hyphens. Keep sentences intact.
+
+Example: "Photosynthesis is the process" → "Pho-to-syn-the-sis is the pro-cess"
+
+Text to process:
+{text}
+
+Output only the syllable breakdown, no explanations:""",
+        "Break words into syllables. Output only the result.",
+    )
+
+
+def steps_prompt(text: str) -> tuple:
+    return (
+        f"""Break this lecture into clear, numbered steps (max 5-7 steps). Each step should be concise and actionable.
+
+Text:
+{text}
+
+Output only the numbered steps, no extra text:""",
+        "Create numbered steps. Be concise.",
+    )
+
+
+def mindmap_prompt(text: str) -> tuple:
+    return (
+        f"""Create a brief mind map with main topic and 3-4 key points only.
+
+Text:
+{text}
+
+Format:
+Main Topic
+├─ Point 1
+├─ Point 2
+└─ Point 3
+
+Keep it short:""",
+        "Create a brief mind map. Keep it very short.",
+    )
+
+
+def summary_prompt(text: str) -> tuple:
+    return (
+        f"""Summarize in 2-3 sentences: main topic, key points, and conclusion.
+
+Text:
+{text}
+
+Summary:""",
+        "Write a 2-3 sentence summary.",
+    )
+
+
+def notes_prompt(text: str) -> tuple:
+    """Map step: compact, ordered key points for one part of the lecture.
+
+    The prompt does not say which part it is, so notes can be reused by chunk
+    hash when earlier chunks change.
+    """
+    return (
+        f"""This is one part of a lecture transcript. List its key points in order as short bullet lines starting with "- ". Keep names, numbers and definitions. At most 8 bullets.
+
+Text:
+{text}
+
+Key points:""",
+        "Extract key points as short bullets. Output only the bullets.",
+    )
+
+
+def condense_prompt(text: str) -> tuple:
+    """Reduce step: merge consecutive notes into a shorter ordered list."""
+    return (
+        f"""These are key points from consecutive parts of one lecture. Merge them into at most 10 short bullet lines starting with "- ", keeping the original order and removing repetition.
+
+Key points:
+{text}
+
+Merged key points:""",
+        "Merge key points. Output only the bullets.",
+    )
+
+
+# Outputs built from the (reduced) lecture notes in map-reduce mode
+REDUCE_PROMPTS = {
+    "detailedSteps": steps_prompt,
+    "mindMap": mindmap_prompt,
+    "summary": summary_prompt,
+}
+
+
+def render_steps(value: Any) -> Optional[str]:
+    """["step", ...] -> "1. step" lines; None unless there are at least two steps."""
+    if not isinstance(value, list):
+        return None
+    steps = [re.sub(r"^\s*\d+[.)]\s*", "", str(step)).strip() for step in value]
+    steps = [step for step in steps if step]
+    if len(steps) < 2:
+        return None
+    return "\n".join(f"{i + 1}. {step}" for i, step in enumerate(steps))
+
+
+def fused_prompt(text: str) -> Tuple[str, str, List[FusedField]]:
+    """(prompt, system, fields) for steps, mind map and summary in one JSON response."""
+    prompt = f"""From this lecture, return one JSON object with:
+
+detailedSteps: the lecture broken into 5-7 clear, concise, actionable steps, in order (no numbering inside the strings).
+
+mindMap: a brief mind map with the main topic and 3-4 key points only, in this format:
+Main Topic
+├─ Point 1
+├─ Point 2
+└─ Point 3
+
+summary: 2-3 sentences covering the main topic, key points and conclusion.
+
+Text:
+{text}"""
+    system = "Summarize lectures for students. Be concise. Respond with the JSON object only."
+    fields = [
+        FusedField(
+            "detailedSteps", {"type": "ARRAY", "items": {"type": "STRING"}}, render_steps, steps_prompt(text)
+        ),
+        FusedField(
+            "mindMap", {"type": "STRING"}, render_text(min_words=3, must_contain=("├─", "└─")), mindmap_prompt(text)
+        ),
+        FusedField("summary", {"type": "STRING"}, render_text(min_words=8), summary_prompt(text)),
+    ]
+    return prompt, system, fields
+
+
+def pipeline_version() -> str:
+    """Changes whenever prompts or settings change, so results of older runs are not reused."""
+    prompts = [breakdown_prompt(""), notes_prompt(""), condense_prompt("")]
+    prompts += [build("") for build in REDUCE_PROMPTS.values()] + [fused_prompt("")[:2]]
+    return content_hash(json.dumps(
+        [GEMINI_MODEL, CHUNK_CHARS, REDUCE_CHARS, CHUNK_ANCHOR_EVERY, SYLLABIFIER, FUSED_GENERATION, prompts]
+    ))
+
+
+@dataclass
+class ChunkMemo:
+    """Results of an earlier run, reused for the parts of a transcription that did not change.
+
+    notes and breakdowns are keyed by chunk hash; reduced holds steps, mind
+    map and summary built from the notes whose hash is source_hash.
+    """
+
+    version: str = field(default_factory=pipeline_version)
+    notes: Dict[str, str] = field(default_factory=dict)
+    breakdowns: Dict[str, str] = field(default_factory=dict)
+    source_hash: str = ""
+    reduced: Dict[str, str] = field(default_factory=dict)
+    reused: int = 0
+    generated: int = 0
+
+    @classmethod
+    def from_dict(cls, data: Optional[dict]) -> "ChunkMemo":
+        """Memo saved by to_dict(); empty when there is none or it is from another pipeline version."""
+        memo = cls()
+        if data and data.get("version") == memo.version:
+            memo.notes = dict(data.get("notes") or {})
+            memo.breakdowns = dict(data.get("breakdowns") or {})
+            memo.source_hash = data.get("sourceHash", "")
+            memo.reduced = dict(data.get("reduced") or {})
+        return memo
+
+    def to_dict(self) -> dict:
+        return {
+            "version": self.version,
+            "notes": self.notes,
+            "breakdowns": self.breakdowns,
+            "sourceHash": self.source_hash,
+            "reduced": self.reduced,
+        }
+
+    def keep(self, hashes: Iterable[str]) -> None:
+        """Drop results of chunks that are no longer in the transcription."""
+        current = set(hashes)
+        self.notes = {h: text for h, text in self.notes.items() if h in current}
+        self.breakdowns = {h: text for h, text in self.breakdowns.items() if h in current}
+
+    async def get_or_generate(self, table: Dict[str, str], key: str, generate: Callable[[], Awaitable[str]]) -> str:
+        if key in table:
+            self.reused += 1
+            return table[key]
+        text = await generate()
+        table[key] = text
+        self.generated += 1
+        return text
+
+
+def _batch_by_size(parts: List[str], max_chars: int) -> List[List[str]]:
+    """Group consecutive parts so each group's combined size stays under max_chars."""
+    batches: List[List[str]] = [[]]
+    size = 0
+    for part in parts:
+        if batches[-1] and size + len(part) > max_chars:
+            batches.append([])
+            size = 0
+        batches[-1].append(part)
+        size += len(part)
+    return batches
+
+
+async def _reduce_notes(partials: List[str]) -> str:
+    """Condense per-chunk notes level by level until they fit in one prompt."""
+    level = 0
+    while sum(len(p) for p in partials) > REDUCE_CHARS and len(partials) > 1:
+        if level >= MAX_REDUCE_LEVELS:
+            break
+        batches = _batch_by_size(partials, REDUCE_CHARS)
+        print(f"🔁 Reduce level {level + 1}: {len(partials)} partials → {len(batches)}")
+        partials = await asyncio.gather(
+            *(generate_with_gemini(*condense_prompt("\n".join(batch))) for batch in batches)
+        )
+        level += 1
+    return _fit_notes(list(partials), REDUCE_CHARS * 2)
+
+
+def _fit_notes(partials: List[str], max_chars: int) -> str:
+    """Join notes, trimming each one evenly when they overflow so no part of the lecture is dropped."""
+    joined = "\n".join(partials)
+    if len(joined) <= max_chars:
+        return joined
+    share = max(1, max_chars // len(partials) - 1)
+    print(
+        f"⚠️ Notes still {len(joined)} chars after {MAX_REDUCE_LEVELS} reduce levels; "
+        f"trimming each of {len(partials)} partials to {share} chars"
+    )
+    return "\n".join(p[:share].rstrip() for p in partials)
+
+
+async def _chunk_notes(chunks: List[str], memo: ChunkMemo) -> List[str]:
+    """Map step: key points per chunk (reused from memo for unchanged chunks)."""
+    partials = await asyncio.gather(
+        *(
+            memo.get_or_generate(
+                memo.notes, content_hash(chunk), lambda chunk=chunk: generate_with_gemini(*notes_prompt(chunk))
+            )
+            for chunk in chunks
+        )
+    )
+    return [p.strip() for p in partials]
+
+
+async def _map_reduce_notes(chunks: List[str]) -> str:
+    """Map: key points per chunk; reduce: condense them into one bounded set of notes."""
+    return await _reduce_notes(await _chunk_notes(chunks, ChunkMemo(version="")))
+
+
+async def process_transcription(
+    transcription: str, on_output: Optional[OutputCallback] = None, memo: Optional[ChunkMemo] = None
+) -> Dict[str, str]:
+    """Generate all four outputs concurrently; `on_output(name, text)` fires as each one lands.
+
+    With the memo of an earlier run only changed chunks are sent to Gemini;
+    the memo is updated in place for the caller to save.
+    """
+    incremental = memo is not None
+    memo = memo if incremental else ChunkMemo(version="")
+    chunks = content_chunks(transcription, max_chunk_size=CHUNK_CHARS)
+    hashes = [content_hash(chunk) for chunk in chunks]
+    print(f"📊 Split into {len(chunks)} chunks for processing")
+
+    async def emit(name: str, text: str) -> str:
+        if on_output is not None:
+            await on_output(name, text)
+        return text
+
+    async def run(name: str, prompt: str, system: str) -> str:
+        return await emit(name, await generate_with_gemini(prompt, system))
+
+    async def breakdown() -> str:
+        if SYLLABIFIER != "llm":
+            return await emit("simpleText", syllabify_text(transcription))
+        # Map: syllable breakdown per chunk, stitched back in the original order
+        parts = await asyncio.gather(
+            *(
+                memo.get_or_generate(
+                    memo.breakdowns, h, lambda chunk=chunk: generate_with_gemini(*breakdown_prompt(chunk))
+                )
+                for chunk, h in zip(chunks, hashes)
+            )
+        )
+        return await emit("simpleText", "\n\n".join(p.strip() for p in parts))
+
+    async def structured() -> Dict[str, str]:
+        if len(chunks) <= 1:
+            # Short lecture: each output straight from the transcription
+            source, partials = transcription, None
+            source_hash = content_hash(transcription)
+        else:
+            print(f"⚙️ Map-reduce over {len(chunks)} chunks...")
+            partials = await _chunk_notes(chunks, memo)
+            source_hash = content_hash("\n".join(partials))
+        if source_hash == memo.source_hash and all(name in memo.reduced for name in REDUCE_PROMPTS):
+            print("♻️ Notes unchanged, reusing steps, mind map and summary")
+            return {name: await emit(name, memo.reduced[name]) for name in REDUCE_PROMPTS}
+        if partials is not None:
+            source = await _reduce_notes(partials)
+
+        if FUSED_GENERATION:
+            fused = await generate_fused(*fused_prompt(source), on_output=emit)
+            if fused.errors:
+                name, detail = next(iter(fused.errors.items()))
+                raise HTTPException(status_code=500, detail=f"{name} generation failed: {detail}")
+            outputs = {name: fused.outputs[name] for name in REDUCE_PROMPTS}
+        else:
+            texts = await asyncio.gather(
+                *(run(name, *build(source)) for name, build in REDUCE_PROMPTS.items())
+            )
+            outputs = dict(zip(REDUCE_PROMPTS.keys(), texts))
+        memo.source_hash, memo.reduced = source_hash, outputs
+        return outputs
+
+    print("⚙️ Starting parallel processing of 4 outputs...")
+
+    # All calls share the pooled async Gemini client and are spread
+    # across API keys by the scheduler, so they genuinely run in parallel
+    simple_text, others = await asyncio.gather(breakdown(), structured())
+    if incremental:
+        memo.keep(hashes)
+        print(f"♻️ Incremental run: {memo.reused} chunk result(s) reused, {memo.generated} generated")
+    return {"simpleText": simple_text, **others}
+
+
+async def _single(text: str) -> AsyncIterator[str]:
+    yield text
+
+
+async def stream_transcription(transcription: str) -> AsyncIterator[Tuple[str, str, str]]:
+    """Stream the four outputs as (kind, output_name, payload) events; see sse.merge_streams."""
+    chunks = content_chunks(transcription, max_chunk_size=CHUNK_CHARS)
+
+    if SYLLABIFIER != "llm":
+        simple_text = _single(syllabify_text(transcription))
+    else:
+        # Per-chunk breakdowns run concurrently but are emitted in transcript order
+        simple_text = ordered_stream(
+            [stream_with_gemini(*breakdown_prompt(chunk)) for chunk in chunks], separator="\n\n"
+        )
+
+    if len(chunks) <= 1:
+        streams = {
+            "simpleText": simple_text,
+            **{name: stream_with_gemini(*build(transcription)) for name, build in REDUCE_PROMPTS.items()},
+        }
+        async for event in merge_streams(streams):
+            yield event
+        return
+
+    # Notes are shared by the three reduce outputs, so compute them once
+    notes_task = asyncio.create_task(_map_reduce_notes(chunks))
+
+    async def from_notes(build) -> AsyncIterator[str]:
+        notes = await notes_task
+        async for delta in stream_with_gemini(*build(notes)):
+            yield delta
+
+    streams = {
+        "simpleText": simple_text,
+        **{name: from_notes(build) for name, build in REDUCE_PROMPTS.items()},
+    }
+    try:
+        async for event in merge_streams(streams):
+            yield event
+    finally:
+        notes_task.cancel()
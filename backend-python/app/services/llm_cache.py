@@ -0,0 +1,192 @@
+"""
+Content-addressed cache for LLM responses.
+Keys are a SHA-256 of (model, system prompt, prompt, generation config), so
+re-processing the same lecture or text never pays for a second Gemini call.
+Two tiers: an in-memory LRU with TTL, and an optional SQLite file that
+survives restarts (enabled by LLM_CACHE_DB). Async callers use aget()/aset(),
+which run the SQLite tier in a worker thread so disk I/O never blocks the loop;
+the SQLite connection has its own lock, so memory hits never wait on a disk
+read, write or commit in progress.
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Optional, Tuple
+
+DEFAULT_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "512"))
+DEFAULT_TTL_SECONDS = float(os.getenv("LLM_CACHE_TTL_SECONDS", str(7 * 24 * 3600)))
+
+_cache: Optional["LLMCache"] = None
+
+
+class LLMCache:
+    """Two-tier (memory LRU + optional SQLite) response cache with hit/miss counters."""
+
+    def __init__(
+        self,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+        ttl_seconds: float = DEFAULT_TTL_SECONDS,
+        db_path: Optional[str] = None,
+        clock: Callable[[], float] = time.time,
+    ):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._clock = clock
+        self._memory: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+        # _lock guards the memory tier and counters only; _db_lock serializes the SQLite connection
+        self._lock = threading.Lock()
+        self._db_lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+        if db_path:
+            self._db = sqlite3.connect(db_path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS llm_cache ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, created_at REAL NOT NULL)"
+            )
+            self._db.commit()
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.chars_saved = 0
+
+    @staticmethod
+    def make_key(model: str, system: Optional[str], prompt: str, generation_config: dict) -> str:
+        """Stable content hash for one LLM request."""
+        material = json.dumps(
+            {"model": model, "system": system or "", "prompt": prompt, "config": generation_config},
+            sort_keys=True,
+            ensure_ascii=False,
+        )
+        return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+    def _expired(self, created_at: float) -> bool:
+        return self._clock() - created_at > self.ttl_seconds
+
+    def _remember(self, key: str, created_at: float, value: str) -> None:
+        self._memory[key] = (created_at, value)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def _memory_get(self, key: str, prompt_chars: int) -> Optional[str]:
+        # Caller holds the lock
+        entry = self._memory.get(key)
+        if entry is not None:
+            created_at, value = entry
+            if not self._expired(created_at):
+                self._memory.move_to_end(key)
+                self.memory_hits += 1
+                self.chars_saved += prompt_chars + len(value)
+                return value
+            del self._memory[key]
+        return None
+
+    def get(self, key: str, prompt_chars: int = 0) -> Optional[str]:
+        """Return the cached response for `key`, or None on a miss/expired entry."""
+        with self._lock:
+            value = self._memory_get(key, prompt_chars)
+        if value is not None:
+            return value
+        return self._disk_get(key, prompt_chars)
+
+    def _disk_get(self, key: str, prompt_chars: int) -> Optional[str]:
+        # The SQLite lookup holds only the connection lock, so memory lookups never wait on disk
+        row = None
+        if self._db is not None:
+            with self._db_lock:
+                row = self._db.execute(
+                    "SELECT value, created_at FROM llm_cache WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None and self._expired(row[1]):
+                    self._db.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+                    self._db.commit()
+                    row = None
+        with self._lock:
+            if row is None:
+                self.misses += 1
+                return None
+            value, created_at = row
+            self._remember(key, created_at, value)
+            self.disk_hits += 1
+            self.chars_saved += prompt_chars + len(value)
+            return value
+
+    def set(self, key: str, value: str) -> None:
+        """Store a response in both tiers."""
+        now = self._clock()
+        with self._lock:
+            self._remember(key, now, value)
+            self.stores += 1
+        self._disk_set(key, value, now)
+
+    def _disk_set(self, key: str, value: str, created_at: float) -> None:
+        if self._db is None:
+            return
+        with self._db_lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, value, created_at) VALUES (?, ?, ?)",
+                (key, value, created_at),
+            )
+            self._db.commit()
+
+    async def aget(self, key: str, prompt_chars: int = 0) -> Optional[str]:
+        """get() for the event loop: memory hits return inline, the SQLite lookup runs in a thread."""
+        with self._lock:
+            value = self._memory_get(key, prompt_chars)
+        if value is not None:
+            return value
+        if self._db is None:
+            with self._lock:
+                self.misses += 1
+            return None
+        return await asyncio.to_thread(self._disk_get, key, prompt_chars)
+
+    async def aset(self, key: str, value: str) -> None:
+        """set() for the event loop: the SQLite write and commit run in a thread."""
+        now = self._clock()
+        with self._lock:
+            self._remember(key, now, value)
+            self.stores += 1
+        if self._db is not None:
+            await asyncio.to_thread(self._disk_set, key, value, now)
+
+    def clear(self) -> None:
+        """Drop every entry from both tiers (counters are kept)."""
+        with self._lock:
+            self._memory.clear()
+        if self._db is not None:
+            with self._db_lock:
+                self._db.execute("DELETE FROM llm_cache")
+                self._db.commit()
+
+    def stats(self) -> dict:
+        """Hit/miss counters for measuring how much quota the cache saves."""
+        hits = self.memory_hits + self.disk_hits
+        lookups = hits + self.misses
+        return {
+            "hits": hits,
+            "memoryHits": self.memory_hits,
+            "diskHits": self.disk_hits,
+            "misses": self.misses,
+            "stores": self.stores,
+            "hitRate": round(hits / lookups, 4) if lookups else 0.0,
+            "entries": len(self._memory),
+            "diskEnabled": self._db is not None,
+            # ~4 chars per token, prompt + response
+            "estimatedTokensSaved": self.chars_saved // 4,
+        }
+
+
+def get_llm_cache() -> LLMCache:
+    """Return the process-wide LLM cache (configured from the environment on first use)."""
+    global _cache
+    if _cache is None:
+        _cache = LLMCache(db_path=os.getenv("LLM_CACHE_DB") or None)
+    return _cache
@@ -0,0 +1,138 @@
+"""
+Memory-mappable sidecar format for the severity model.
+
+The pickle needs joblib + sklearn to load and gives every worker process its
+own private copy of the trees. The sidecar directory stores the compiled
+forest (see forest_engine) as uncompressed .npy files plus a meta.json with
+the feature names and metrics. Loading it is np.load(mmap_mode="r") per
+array: no sklearn import, no unpickling, and all workers on a host share the
+same page-cache pages.
+
+    python -m app.services.model_store export [--model path/to/model.pkl]
+
+Sidecars record the SHA-256 of the pickle they came from; stale sidecars are
+ignored so an updated pickle is never silently shadowed.
+"""
+
+import argparse
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+
+from app.services.forest_engine import CompiledForest, CompiledScaler
+
+FORMAT_VERSION = 1
+FOREST_ARRAYS = ("roots", "feature", "threshold", "left", "right", "value")
+
+
+def sidecar_dir(model_path: Path) -> Path:
+    """dyslexai_severity_model.pkl -> dyslexai_severity_model.arrays/"""
+    return model_path.with_suffix(".arrays")
+
+
+def file_sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def export_sidecars(pkg: dict, model_path: Path, compiled: CompiledForest) -> Path:
+    """Write the compiled forest and package metadata next to the pickle."""
+    out = sidecar_dir(model_path)
+    out.mkdir(parents=True, exist_ok=True)
+    for name in FOREST_ARRAYS:
+        np.save(out / f"{name}.npy", np.ascontiguousarray(getattr(compiled, name)))
+    if compiled.scaler is not None:
+        np.save(out / "scaler_mean.npy", compiled.scaler.mean)
+        np.save(out / "scaler_scale.npy", compiled.scaler.scale)
+
+    meta = {
+        "format": FORMAT_VERSION,
+        "source_sha256": file_sha256(model_path),
+        "model_name": type(pkg["model"]).__name__,
+        "feature_names": list(pkg["feature_names"]),
+        "metrics": {k: float(v) for k, v in pkg.get("metrics", {}).items() if isinstance(v, (int, float))},
+        "needs_scaling": bool(pkg.get("needs_scaling")),
+        "has_scaler": compiled.scaler is not None,
+        "classes": np.asarray(compiled.classes).tolist(),
+        "max_depth": int(compiled.max_depth),
+        "n_features": int(compiled.n_features),
+        # Set for gradient boosting only (see CompiledForest)
+        "learning_rate": compiled.learning_rate,
+        "init_raw": float(compiled.init_raw),
+    }
+    # meta.json goes last: a directory without it is an incomplete export and is ignored
+    with open(out / "meta.json", "w", encoding="utf-8") as f:
+        json.dump(meta, f, indent=2)
+    return out
+
+
+def load_sidecars(model_path: Path, verify: bool = True) -> Optional[dict]:
+    """Package dict backed by memory-mapped arrays, or None if sidecars are missing or stale.
+
+    The dict carries feature_names, metrics, needs_scaling, model_name and
+    "compiled" (a CompiledForest); it has no "model" key.
+    """
+    directory = sidecar_dir(model_path)
+    meta_path = directory / "meta.json"
+    if not meta_path.exists():
+        return None
+    with open(meta_path, encoding="utf-8") as f:
+        meta = json.load(f)
+    if meta.get("format") != FORMAT_VERSION:
+        print(f"[WARN] Ignoring model sidecars with format {meta.get('format')} at {directory}")
+        return None
+    if verify and model_path.exists() and file_sha256(model_path) != meta["source_sha256"]:
+        print(f"[WARN] Model sidecars at {directory} are stale; re-run the export")
+        return None
+
+    arrays = {name: np.load(directory / f"{name}.npy", mmap_mode="r") for name in FOREST_ARRAYS}
+    scaler = None
+    if meta["has_scaler"]:
+        scaler = CompiledScaler(
+            np.load(directory / "scaler_mean.npy", mmap_mode="r"),
+            np.load(directory / "scaler_scale.npy", mmap_mode="r"),
+        )
+    compiled = CompiledForest(
+        **arrays,
+        max_depth=meta["max_depth"],
+        n_features=meta["n_features"],
+        classes=np.asarray(meta["classes"]),
+        scaler=scaler,
+        learning_rate=meta.get("learning_rate"),
+        init_raw=meta.get("init_raw", 0.0),
+    )
+    return {
+        "feature_names": meta["feature_names"],
+        "metrics": meta["metrics"],
+        "needs_scaling": meta["needs_scaling"],
+        "model_name": meta["model_name"],
+        "compiled": compiled,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export the severity model as memory-mappable sidecars")
+    parser.add_argument("command", choices=["export"])
+    parser.add_argument("--model", help="path to the model pickle (defaults to the service's MODEL_PATH)")
+    args = parser.parse_args()
+
+    import joblib
+
+    from app.services.severity_model import MODEL_PATH, compile_model
+
+    model_path = Path(args.model) if args.model else MODEL_PATH
+    pkg = joblib.load(model_path)
+    out = export_sidecars(pkg, model_path, compile_model(pkg))
+    size = sum(os.path.getsize(p) for p in out.iterdir())
+    print(f"✅ Wrote {out} ({size / 1024:.0f} KiB)")
+
+
+if __name__ == "__main__":
+    main()
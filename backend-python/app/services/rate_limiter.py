@@ -0,0 +1,207 @@
+"""
+Per-key token-bucket rate limiting for the Gemini API.
+Each API key gets its own requests-per-minute and tokens-per-minute bucket, and
+KeyScheduler hands every call to the key with the most headroom, so throughput
+scales with the number of keys in GEMINI_API_KEYS.
+
+The clock and sleep functions are injectable; FakeClock drives the scheduler in
+virtual time so limits can be checked deterministically without waiting.
+"""
+
+import asyncio
+import math
+import time
+from typing import Awaitable, Callable, Dict, List, Optional
+
+Clock = Callable[[], float]
+Sleep = Callable[[float], Awaitable[None]]
+
+
+class TokenBucket:
+    """Classic token bucket: holds up to `capacity` tokens, refilled continuously."""
+
+    def __init__(self, capacity: float, refill_per_second: float, clock: Clock = time.monotonic):
+        self.capacity = float(capacity)
+        self.refill_per_second = float(refill_per_second)
+        self._clock = clock
+        self._tokens = float(capacity)
+        self._updated = clock()
+
+    def _refill(self) -> None:
+        now = self._clock()
+        elapsed = now - self._updated
+        if elapsed > 0:
+            self._tokens = min(self.capacity, self._tokens + elapsed * self.refill_per_second)
+            self._updated = now
+
+    def available(self) -> float:
+        """Tokens that could be consumed right now."""
+        self._refill()
+        return self._tokens
+
+    def time_until(self, amount: float) -> float:
+        """Seconds until `amount` tokens are available (0 if already available)."""
+        amount = min(amount, self.capacity)
+        missing = amount - self.available()
+        if missing <= 0:
+            return 0.0
+        if self.refill_per_second <= 0:
+            return math.inf
+        return missing / self.refill_per_second
+
+    def consume(self, amount: float) -> None:
+        """Take tokens; the balance may go negative when correcting an under-estimate."""
+        self._refill()
+        self._tokens -= amount
+
+    def refund(self, amount: float) -> None:
+        """Give back tokens that were over-reserved, never above capacity."""
+        self._refill()
+        self._tokens = min(self.capacity, self._tokens + amount)
+
+
+class KeyScheduler:
+    """Routes requests across API keys using one RPM and one TPM bucket per key."""
+
+    def __init__(
+        self,
+        keys: List[str],
+        rpm: float = 15,
+        tpm: float = 250_000,
+        clock: Clock = time.monotonic,
+        sleep: Sleep = asyncio.sleep,
+    ):
+        if not keys:
+            raise ValueError("KeyScheduler needs at least one API key")
+        self.keys = list(keys)
+        self.rpm = rpm
+        self.tpm = tpm
+        self._clock = clock
+        self._sleep = sleep
+        self._request_buckets: Dict[str, TokenBucket] = {
+            k: TokenBucket(rpm, rpm / 60.0, clock) for k in self.keys
+        }
+        self._token_buckets: Dict[str, TokenBucket] = {
+            k: TokenBucket(tpm, tpm / 60.0, clock) for k in self.keys
+        }
+        self._cooldown_until: Dict[str, float] = {k: 0.0 for k in self.keys}
+        self.calls: Dict[str, int] = {k: 0 for k in self.keys}
+
+    def headroom(self, key: str) -> float:
+        """Fraction (0-1) of the tighter of the two budgets left for `key`."""
+        if self._clock() < self._cooldown_until[key]:
+            return 0.0
+        req = self._request_buckets[key].available() / self._request_buckets[key].capacity
+        tok = self._token_buckets[key].available() / self._token_buckets[key].capacity
+        return max(0.0, min(req, tok))
+
+    def _wait_for(self, key: str, tokens: int) -> float:
+        cooldown = max(0.0, self._cooldown_until[key] - self._clock())
+        return max(
+            cooldown,
+            self._request_buckets[key].time_until(1),
+            self._token_buckets[key].time_until(tokens),
+        )
+
+    def try_acquire(self, tokens: int = 0) -> Optional[str]:
+        """Reserve a slot on the key with the most headroom, or return None if all are busy."""
+        ready = [k for k in self.keys if self._wait_for(k, tokens) == 0]
+        if not ready:
+            return None
+        key = max(ready, key=self.headroom)
+        self._request_buckets[key].consume(1)
+        self._token_buckets[key].consume(tokens)
+        self.calls[key] += 1
+        return key
+
+    async def acquire(self, tokens: int = 0) -> str:
+        """Wait (without blocking the loop) until some key can take the request."""
+        while True:
+            key = self.try_acquire(tokens)
+            if key is not None:
+                return key
+            wait = min(self._wait_for(k, tokens) for k in self.keys)
+            print(f"🕐 All Gemini keys at budget, waiting {wait:.1f}s...")
+            await self._sleep(wait)
+
+    def record_usage(self, key: str, estimated_tokens: int, actual_tokens: int) -> None:
+        """Correct the TPM bucket once the response reports real token usage."""
+        delta = actual_tokens - estimated_tokens
+        if delta > 0:
+            self._token_buckets[key].consume(delta)
+        elif delta < 0:
+            self._token_buckets[key].refund(-delta)
+
+    def penalize(self, key: str, seconds: float) -> None:
+        """Take a key out of rotation after a 429 until its backoff expires."""
+        self._cooldown_until[key] = max(self._cooldown_until[key], self._clock() + seconds)
+
+    def available_requests(self) -> int:
+        """Requests that could start right now across all keys."""
+        return sum(
+            int(self._request_buckets[k].available())
+            for k in self.keys
+            if self._clock() >= self._cooldown_until[k]
+        )
+
+    def stats(self) -> dict:
+        """Per-key headroom and call counts (keys are masked)."""
+        return {
+            f"key_{i + 1}": {
+                "calls": self.calls[k],
+                "headroom": round(self.headroom(k), 3),
+                "cooling_down": self._clock() < self._cooldown_until[k],
+            }
+            for i, k in enumerate(self.keys)
+        }
+
+
+class FakeClock:
+    """Virtual clock for driving KeyScheduler deterministically in tests and simulations."""
+
+    def __init__(self, start: float = 0.0):
+        self.now = start
+
+    def __call__(self) -> float:
+        return self.now
+
+    def advance(self, seconds: float) -> None:
+        self.now += seconds
+
+    async def sleep(self, seconds: float) -> None:
+        self.advance(seconds)
+        await asyncio.sleep(0)
+
+
+async def _simulate(num_keys: int, num_requests: int, rpm: float) -> float:
+    """Return the virtual seconds needed to push `num_requests` through `num_keys` keys."""
+    clock = FakeClock()
+    scheduler = KeyScheduler(
+        [f"key-{i}" for i in range(num_keys)], rpm=rpm, clock=clock, sleep=clock.sleep
+    )
+    for _ in range(num_requests):
+        await scheduler.acquire(tokens=1_000)
+    return clock.now
+
+
+def _check_refund_is_capped() -> None:
+    clock = FakeClock()
+    scheduler = KeyScheduler(["key"], tpm=10_000, clock=clock, sleep=clock.sleep)
+    key = scheduler.try_acquire(tokens=4_000)
+    scheduler.record_usage(key, estimated_tokens=4_000, actual_tokens=500)
+    assert scheduler._token_buckets[key].available() == 9_500
+    # Over-estimates never lift the bucket above its capacity
+    scheduler.record_usage(key, estimated_tokens=20_000, actual_tokens=0)
+    assert scheduler._token_buckets[key].available() == 10_000
+
+
+if __name__ == "__main__":
+    # python -m app.services.rate_limiter  — checks throughput scaling with key count
+    for n in (1, 2, 4, 8):
+        elapsed = asyncio.run(_simulate(n, num_requests=120, rpm=15))
+        # 15 requests per key start at once, the rest arrive at 15/min per key
+        expected = max(0, 120 - 15 * n) * 60 / (15 * n)
+        print(f"{n} key(s): 120 requests in {elapsed:6.1f} virtual seconds (expected {expected:.1f})")
+        assert abs(elapsed - expected) < 1e-6, (n, elapsed, expected)
+    _check_refund_is_capped()
+    print("✅ Schedule and refund cap as expected")
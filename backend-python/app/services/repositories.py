@@ -0,0 +1,382 @@
+"""
+Async repositories over the document store (app/services/document_store.py).
+
+Handlers call these instead of the blocking firebase_admin client, so a
+Firestore round trip never stalls the event loop. Single-document writes go
+through WriteBatcher: writes issued within FIRESTORE_BATCH_WINDOW_MS of each
+other are committed as one batch, and several writes to the same document in
+that window are coalesced into one (update + update = one merged update, set +
+update = one set). Every caller still awaits its own write. If a shared batch
+fails (e.g. one update targets a deleted document), its writes are retried one
+by one, so only the bad write reports an error.
+"""
+
+import asyncio
+import base64
+import binascii
+import json
+import os
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict, List, Optional, Sequence, Set, Tuple
+
+from app.services.document_cache import DocumentCache
+from app.services.document_store import Cursor, DocumentNotFound, Filter, WriteOp, get_store
+
+BATCH_WINDOW_MS = float(os.getenv("FIRESTORE_BATCH_WINDOW_MS", "10"))
+# Firestore allows at most 500 writes per batch commit
+FIRESTORE_BATCH_LIMIT = 500
+
+
+def set_path(doc: dict, path: str, value: Any) -> None:
+    """Set a dotted field path in a nested dict (Firestore update() semantics).
+
+    Maps along the path are copied, never edited in place, so callers' data is not touched.
+    """
+    *parents, leaf = path.split(".")
+    for name in parents:
+        doc[name] = dict(doc[name]) if isinstance(doc.get(name), dict) else {}
+        doc = doc[name]
+    doc[leaf] = value
+
+
+def merge_update_fields(base: Dict[str, Any], new: Dict[str, Any]) -> Dict[str, Any]:
+    """Combine two update() field maps into one that Firestore accepts (no path and sub-path together)."""
+    merged = dict(base)
+    for path, value in new.items():
+        # A new value for a path replaces everything already queued below it
+        for existing in [k for k in merged if k.startswith(path + ".")]:
+            del merged[existing]
+        parent = next((k for k in merged if path.startswith(k + ".")), None)
+        if parent is None:
+            merged[path] = value
+            continue
+        # Writing inside a map queued whole: edit a copy of that map
+        container = dict(merged[parent]) if isinstance(merged[parent], dict) else {}
+        set_path(container, path[len(parent) + 1:], value)
+        merged[parent] = container
+    return merged
+
+
+def coalesce(first: WriteOp, second: WriteOp) -> WriteOp:
+    """One write equivalent to applying `first` then `second` to the same document."""
+    if second.kind in ("set", "delete"):
+        return second
+    if first.kind == "delete":
+        raise DocumentNotFound(f"No document to update: {second.collection}/{second.doc_id}")
+    if first.kind == "set":
+        data = dict(first.data)
+        for path, value in second.data.items():
+            set_path(data, path, value)
+        return WriteOp("set", first.collection, first.doc_id, data)
+    return WriteOp("update", first.collection, first.doc_id, merge_update_fields(first.data, second.data))
+
+
+def encode_cursor(cursor: Cursor) -> str:
+    """Opaque, URL-safe page token for (order_by value, document id)."""
+    value, doc_id = cursor
+    if isinstance(value, datetime):
+        token = ["dt", value.isoformat(), doc_id]
+    else:
+        token = ["v", value, doc_id]
+    return base64.urlsafe_b64encode(json.dumps(token).encode()).decode().rstrip("=")
+
+
+def decode_cursor(token: str) -> Cursor:
+    """Inverse of encode_cursor; ValueError for anything that is not one of our tokens."""
+    try:
+        kind, value, doc_id = json.loads(base64.urlsafe_b64decode(token + "=" * (-len(token) % 4)))
+        if kind == "dt":
+            value = datetime.fromisoformat(value)
+        elif kind != "v":
+            raise ValueError(kind)
+    except (binascii.Error, TypeError, ValueError) as e:
+        raise ValueError(f"Invalid cursor: {token!r}") from e
+    if not isinstance(doc_id, str):
+        raise ValueError(f"Invalid cursor: {token!r}")
+    return value, doc_id
+
+
+@dataclass
+class _Pending:
+    op: WriteOp
+    futures: List[asyncio.Future] = field(default_factory=list)
+
+
+class WriteBatcher:
+    """Collects writes for a short window and commits them as one batch."""
+
+    def __init__(self, window_ms: float = BATCH_WINDOW_MS, max_ops: int = FIRESTORE_BATCH_LIMIT):
+        self.window = window_ms / 1000.0
+        self.max_ops = max_ops
+        self._pending: Dict[Tuple[str, str], _Pending] = {}
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        # Commits in flight; asyncio only holds weak references to tasks
+        self._tasks: Set[asyncio.Task] = set()
+        self.writes = 0
+        self.coalesced = 0
+        self.commits = 0
+
+    async def write(self, op: WriteOp) -> None:
+        self.writes += 1
+        if self.window <= 0:
+            self.commits += 1
+            await get_store().commit([op])
+            return
+
+        loop = asyncio.get_running_loop()
+        self._loop = loop
+        future = loop.create_future()
+        key = (op.collection, op.doc_id)
+        pending = self._pending.get(key)
+        if pending is None:
+            self._pending[key] = _Pending(op, [future])
+        else:
+            pending.op = coalesce(pending.op, op)
+            pending.futures.append(future)
+            self.coalesced += 1
+
+        if len(self._pending) >= self.max_ops:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.window, self._flush)
+        await future
+
+    def _flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = list(self._pending.values()), {}
+        if batch:
+            task = self._loop.create_task(self._commit(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def flush_all(self) -> None:
+        """Commit whatever is pending now and wait for every commit in flight (shutdown)."""
+        self._flush()
+        while self._tasks:
+            await asyncio.gather(*list(self._tasks), return_exceptions=True)
+
+    async def _commit(self, batch: List[_Pending]) -> None:
+        self.commits += 1
+        try:
+            await get_store().commit([p.op for p in batch])
+        except Exception as e:
+            if len(batch) > 1:
+                # Isolate the failing write instead of failing everyone in the batch
+                await asyncio.gather(*(self._commit([p]) for p in batch))
+                return
+            for future in batch[0].futures:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for pending in batch:
+            for future in pending.futures:
+                if not future.done():
+                    future.set_result(None)
+
+    def stats(self) -> dict:
+        return {
+            "writes": self.writes,
+            "coalesced": self.coalesced,
+            "commits": self.commits,
+            "windowMs": self.window * 1000,
+        }
+
+
+_batcher: Optional[WriteBatcher] = None
+_batcher_pid: Optional[int] = None
+
+
+def get_batcher() -> WriteBatcher:
+    global _batcher, _batcher_pid
+    if _batcher is None or _batcher_pid != os.getpid():
+        _batcher = WriteBatcher()
+        _batcher_pid = os.getpid()
+    return _batcher
+
+
+def set_batcher(batcher: WriteBatcher) -> None:
+    """Install a batcher with other settings (benchmarks)."""
+    global _batcher, _batcher_pid
+    _batcher = batcher
+    _batcher_pid = os.getpid()
+
+
+class Repository:
+    """Documents of one collection as plain dicts with their "id".
+
+    With a DocumentCache, get()/first() are read-through and every write
+    invalidates the cache once it has committed.
+    """
+
+    def __init__(self, collection: str, cache: Optional[DocumentCache] = None):
+        self.collection = collection
+        self.cache = cache
+
+    def _invalidate(self, doc_id: str) -> None:
+        if self.cache is not None:
+            self.cache.invalidate(doc_id)
+
+    async def _write(self, op: WriteOp) -> None:
+        try:
+            await get_batcher().write(op)
+        finally:
+            # Also after a failed write: it may have been applied before the error surfaced
+            self._invalidate(op.doc_id)
+
+    async def create(self, data: dict) -> dict:
+        doc_id = get_store().new_id(self.collection)
+        await self._write(WriteOp("set", self.collection, doc_id, data))
+        return {"id": doc_id, **data}
+
+    async def put(self, doc_id: str, data: dict) -> None:
+        """Create or replace the document with this id."""
+        await self._write(WriteOp("set", self.collection, doc_id, data))
+
+    async def create_many(self, docs: List[dict]) -> List[str]:
+        """Insert many documents in as few commits as Firestore allows."""
+        store = get_store()
+        ids = [store.new_id(self.collection) for _ in docs]
+        try:
+            for start in range(0, len(docs), FIRESTORE_BATCH_LIMIT):
+                await store.commit([
+                    WriteOp("set", self.collection, doc_id, data)
+                    for doc_id, data in zip(ids[start:start + FIRESTORE_BATCH_LIMIT], docs[start:start + FIRESTORE_BATCH_LIMIT])
+                ])
+        finally:
+            if self.cache is not None:
+                for doc_id in ids:
+                    self.cache.invalidate(doc_id)
+        return ids
+
+    async def get(self, doc_id: str, cached: bool = True) -> Optional[dict]:
+        """The document, or None; cached=False always reads the store."""
+        if self.cache is None or not cached:
+            data = await get_store().get(self.collection, doc_id)
+            return {"id": doc_id, **data} if data is not None else None
+        found = await self.get_tagged(doc_id)
+        return found[0] if found is not None else None
+
+    async def get_tagged(self, doc_id: str) -> Optional[Tuple[dict, str]]:
+        """(document, ETag) through the cache, or None when it does not exist."""
+        cache = self.cache or DocumentCache(max_bytes=0)
+        entry = cache.get(doc_id)
+        if entry is None:
+            token = cache.begin_read()
+            data = await get_store().get(self.collection, doc_id)
+            if data is None:
+                return None
+            entry = cache.store(doc_id, {"id": doc_id, **data}, token)
+        return entry.doc, entry.etag
+
+    async def first_tagged(
+        self, filters: Sequence[Filter], order_by: str, descending: bool = False
+    ) -> Optional[Tuple[dict, str]]:
+        """(first matching document, ETag), caching which document that is."""
+        cache = self.cache or DocumentCache(max_bytes=0)
+        key = json.dumps([list(f) for f in filters] + [order_by, descending], default=str)
+        pointer = cache.get_query(key)
+        if pointer is not None:
+            doc_id, = pointer
+            return await self.get_tagged(doc_id) if doc_id is not None else None
+
+        token = cache.begin_read()
+        rows = await get_store().query(self.collection, filters, order_by, descending, 1)
+        if not rows:
+            cache.store_query(key, None, token)
+            return None
+        doc_id, data = rows[0]
+        cache.store_query(key, doc_id, token)
+        entry = cache.store(doc_id, {"id": doc_id, **data}, token)
+        return entry.doc, entry.etag
+
+    async def update(self, doc_id: str, fields: Dict[str, Any]) -> None:
+        await self._write(WriteOp("update", self.collection, doc_id, fields))
+
+    async def update_and_get(self, doc_id: str, fields: Dict[str, Any]) -> dict:
+        """Update and return the merged document; the read runs alongside the write, not after it."""
+        current, written = await asyncio.gather(
+            get_store().get(self.collection, doc_id),
+            self.update(doc_id, fields),
+            return_exceptions=True,
+        )
+        if isinstance(current, BaseException):
+            raise current
+        if current is None:
+            raise DocumentNotFound(f"No document to update: {self.collection}/{doc_id}")
+        if isinstance(written, BaseException):
+            raise written
+        for path, value in fields.items():
+            set_path(current, path, value)
+        return {"id": doc_id, **current}
+
+    async def delete(self, doc_id: str) -> None:
+        await self._write(WriteOp("delete", self.collection, doc_id))
+
+    async def find(
+        self,
+        filters: Sequence[Filter] = (),
+        order_by: Optional[str] = None,
+        descending: bool = False,
+        limit: Optional[int] = None,
+    ) -> List[dict]:
+        rows = await get_store().query(self.collection, filters, order_by, descending, limit)
+        return [{"id": doc_id, **data} for doc_id, data in rows]
+
+    async def page(
+        self,
+        filters: Sequence[Filter],
+        order_by: str,
+        descending: bool = False,
+        limit: int = 20,
+        start_after: Optional[Cursor] = None,
+        fields: Optional[Sequence[str]] = None,
+    ) -> Tuple[List[dict], Optional[Cursor]]:
+        """One page of documents and the cursor of the next page (None on the last one).
+
+        fields projects the documents server-side; order_by is always fetched
+        because the cursor is built from it.
+        """
+        select = None
+        if fields is not None:
+            select = [f for f in fields if f != "id"]
+            if order_by not in select:
+                select.append(order_by)
+        # One extra row tells whether another page exists without a second query
+        rows = await get_store().query(
+            self.collection, filters, order_by, descending, limit + 1, select=select, start_after=start_after
+        )
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            last_id, last = rows[-1]
+            next_cursor = (last[order_by], last_id)
+        return [{"id": doc_id, **data} for doc_id, data in rows], next_cursor
+
+    async def iter_all(
+        self,
+        filters: Sequence[Filter],
+        order_by: str,
+        descending: bool = False,
+        fields: Optional[Sequence[str]] = None,
+        page_size: int = 100,
+    ) -> AsyncIterator[dict]:
+        """Every matching document, fetched a page at a time so at most one page is held in memory."""
+        cursor = None
+        while True:
+            docs, cursor = await self.page(filters, order_by, descending, page_size, cursor, fields)
+            for doc in docs:
+                yield doc
+            if cursor is None:
+                return
+
+
+# Lectures are polled while processing runs, so reads go through a cache
+lectures = Repository("lectures", cache=DocumentCache())
+assessments = Repository("assessments")
+handwriting_uploads = Repository("handwritingUploads")
+# Per-chunk results of the last processing run, keyed by lecture id (incremental reprocessing)
+lecture_chunks = Repository("lectureChunks")
@@ -1,40 +1,120 @@
 """
 Dyslexia severity prediction service using pre-trained Random Forest classifier.
 Loads dyslexai_severity_model.pkl and provides prediction + recommendation functions.
+
+Predictions use a FeatureLayout compiled once at load time from the model's
+feature_names: features are written straight into a preallocated float64
+matrix instead of building a pandas DataFrame per request. build_feature_vector
+keeps the original DataFrame construction as the reference implementation.
+
+SEVERITY_ENGINE selects how the forest is evaluated: "sklearn" (default) calls
+predict_proba on the unpickled model, "compiled" runs the flattened NumPy
+forest from forest_engine and falls back to sklearn if the model type is not
+supported. With the pickle loaded, batches of SEVERITY_COMPILED_MAX_ROWS rows
+or more still go to sklearn, which is faster there (see forest_engine).
+
+SEVERITY_MODEL_LOADER=mmap loads the memory-mapped sidecars written by
+`python -m app.services.model_store export` instead of the pickle, which
+implies the compiled engine. joblib, sklearn and pandas are imported only on
+first use, so a sidecar-loaded service never imports them at all.
 """
 
-import joblib
+import os
+import warnings
+
 import numpy as np
-import pandas as pd
 from pathlib import Path
-from typing import List, Dict, Any, Optional
+from typing import TYPE_CHECKING, List, Dict, Any, Optional, Tuple
+
+from app.services.forest_engine import CompiledForest
+from app.services.model_store import load_sidecars
+
+if TYPE_CHECKING:
+    import pandas as pd
 
 MODEL_PATH = Path(__file__).parent.parent / "ml" / "models" / "dyslexai_severity_model.pkl"
+# "sklearn" or "compiled"
+SEVERITY_ENGINE = os.getenv("SEVERITY_ENGINE", "sklearn").lower()
+# Batch size from which sklearn beats the compiled engine (0 keeps every batch compiled)
+SEVERITY_COMPILED_MAX_ROWS = int(os.getenv("SEVERITY_COMPILED_MAX_ROWS", "256"))
+# "pickle" or "mmap" (falls back to the pickle if sidecars are missing or stale)
+SEVERITY_MODEL_LOADER = os.getenv("SEVERITY_MODEL_LOADER", "pickle").lower()
 _package: Optional[dict] = None
+_sklearn_package: Optional[dict] = None
+_layout: Optional["FeatureLayout"] = None
+_compiled: Optional[CompiledForest] = None
+_compile_attempted = False
 
 
 def load_model() -> dict:
     """Load the pre-trained severity model from disk (cached after first call)."""
-    global _package
+    global _package, _layout
     if _package is not None:
         return _package
 
-    if not MODEL_PATH.exists():
-        raise FileNotFoundError(
-            f"Model not found at {MODEL_PATH}. Place dyslexai_severity_model.pkl in app/ml/models/"
-        )
+    pkg = load_sidecars(MODEL_PATH) if SEVERITY_MODEL_LOADER == "mmap" else None
+    if pkg is None:
+        pkg = _load_pickle()
+    else:
+        print(f"[OK] Severity model memory-mapped from {MODEL_PATH.with_suffix('.arrays')}")
 
-    pkg = joblib.load(MODEL_PATH)
     metrics = pkg.get("metrics", {})
     f1 = metrics.get("f1", 0.0)
     auc = metrics.get("auc", 0.0)
-    model_name = type(pkg["model"]).__name__
+    model_name = pkg.get("model_name") or type(pkg["model"]).__name__
     print(f"[OK] Severity model loaded: {model_name} | F1={f1:.3f} | AUC={auc:.3f}")
 
+    _layout = FeatureLayout(pkg["feature_names"])
+    if SEVERITY_ENGINE == "compiled":
+        _get_compiled(pkg)
     _package = pkg
     return _package
 
 
+def _load_pickle() -> dict:
+    if not MODEL_PATH.exists():
+        raise FileNotFoundError(
+            f"Model not found at {MODEL_PATH}. Place dyslexai_severity_model.pkl in app/ml/models/"
+        )
+    import joblib
+
+    return joblib.load(MODEL_PATH)
+
+
+def _get_sklearn_package() -> dict:
+    """Package holding the sklearn model; unpickles it on demand after a sidecar load."""
+    global _sklearn_package
+    pkg = load_model()
+    if "model" in pkg:
+        return pkg
+    if _sklearn_package is None:
+        _sklearn_package = _load_pickle()
+    return _sklearn_package
+
+
+def compile_model(pkg: dict) -> CompiledForest:
+    """Flatten the package's forest (and scaler, if used) for the compiled engine."""
+    if "compiled" in pkg:
+        return pkg["compiled"]
+    scaler = pkg.get("scaler") if pkg.get("needs_scaling") else None
+    return CompiledForest.from_sklearn(pkg["model"], scaler)
+
+
+def model_info() -> dict:
+    """How (and whether) this process has loaded the model, without triggering a load."""
+    return {
+        "loaded": _package is not None,
+        "loader": "mmap" if _package is not None and "model" not in _package else "pickle",
+        "engine": "compiled" if _compiled is not None else "sklearn",
+    }
+
+
+def get_layout() -> "FeatureLayout":
+    """Feature layout compiled for the loaded model."""
+    load_model()
+    return _layout
+
+
 def _fix_accuracy(val: Any) -> float:
     """Fix accuracy/missrate values that may be encoded as decimal * 1000."""
     if val is None:
@@ -64,14 +144,18 @@ COGNITIVE_GROUPS: Dict[str, List[int]] = {
     "rapid_naming": [31, 32],
 }
 
+N_TASKS = 32
+TOP_DISC_TASKS = [23, 26, 4, 19, 25, 22, 5, 6, 24, 20]
+_TASK_INDEX: Dict[int, int] = {i: i - 1 for i in range(1, N_TASKS + 1)}
 
-def build_feature_vector(
+
+def _feature_row(
     task_results: List[Dict],
     age: int,
     gender: str,
     native_english: bool,
-) -> pd.DataFrame:
-    """Build a 188-feature DataFrame row from raw task results + demographics."""
+) -> Dict[str, float]:
+    """Compute the raw feature dict (per-task, group, summary, demographic) for one child."""
     task_lookup: Dict[int, Dict] = {t["task_number"]: t for t in task_results}
     row: Dict[str, float] = {}
 
@@ -110,18 +194,22 @@ def build_feature_vector(
     row["tasks_zero_accuracy"] = sum(1 for a in all_accs if a == 0)
 
     # Step E — top discriminative task aggregates
-    top_disc = [23, 26, 4, 19, 25, 22, 5, 6, 24, 20]
-    row["top_disc_mean_acc"] = float(np.mean([row[f"acc_t{t}"] for t in top_disc]))
-    row["top_disc_mean_miss"] = float(np.mean([row[f"miss_t{t}"] for t in top_disc]))
+    row["top_disc_mean_acc"] = float(np.mean([row[f"acc_t{t}"] for t in TOP_DISC_TASKS]))
+    row["top_disc_mean_miss"] = float(np.mean([row[f"miss_t{t}"] for t in TOP_DISC_TASKS]))
 
     # Step F — demographics
     row["age"] = float(age)
     row["is_male"] = 1 if gender.lower() == "male" else 0
     row["is_native"] = 1 if native_english else 0
     row["other_lang"] = 0
+    return row
+
 
-    # Step G — build DataFrame aligned to model's expected columns
-    df = pd.DataFrame([row])
+def _align_features(rows: List[Dict[str, float]]) -> "pd.DataFrame":
+    """Step G — build a DataFrame aligned to the model's expected columns."""
+    import pandas as pd
+
+    df = pd.DataFrame(rows)
     pkg = load_model()
     for col in pkg["feature_names"]:
         if col not in df.columns:
@@ -131,23 +219,204 @@ def build_feature_vector(
     return df
 
 
-def predict_severity(
+def build_feature_vector(
     task_results: List[Dict],
-    age: int = 10,
-    gender: str = "unknown",
-    native_english: bool = True,
-) -> dict:
-    """Run the full prediction pipeline and return a structured result dict."""
+    age: int,
+    gender: str,
+    native_english: bool,
+) -> "pd.DataFrame":
+    """Build a 188-feature DataFrame row from raw task results + demographics."""
+    return _align_features([_feature_row(task_results, age, gender, native_english)])
+
+
+# Indices into the per-task block returned by _task_arrays
+_ACC, _MISS, _SCORE, _CLICKS, _HITS = range(5)
+
+
+def _task_arrays(task_results: List[Dict]) -> np.ndarray:
+    """Per-task accuracy, missrate, score, clicks and hits as a (5, 32) float64 block."""
+    block = np.zeros((5, N_TASKS))
+    # Later duplicates of a task overwrite earlier ones, like the dict lookup above
+    for t in task_results:
+        idx = _TASK_INDEX.get(t["task_number"])
+        if idx is None:
+            continue
+        block[_ACC, idx] = _fix_accuracy(t.get("accuracy", 0))
+        block[_MISS, idx] = _fix_accuracy(t.get("missrate", 0))
+        block[_SCORE, idx] = float(t.get("score", 0))
+        block[_CLICKS, idx] = float(t.get("clicks", 0))
+        block[_HITS, idx] = float(t.get("hits", 0))
+    return block
+
+
+Pairs = Tuple[np.ndarray, np.ndarray]
+
+
+class FeatureLayout:
+    """Fixed column-index map from computed features to the model's feature_names order."""
+
+    def __init__(self, feature_names: List[str]):
+        self.feature_names = list(feature_names)
+        self.n_features = len(self.feature_names)
+        self._index = {name: i for i, name in enumerate(self.feature_names)}
+
+        tasks = range(1, N_TASKS + 1)
+        self.acc = self._pairs([f"acc_t{i}" for i in tasks])
+        self.miss = self._pairs([f"miss_t{i}" for i in tasks])
+        self.score = self._pairs([f"score_t{i}" for i in tasks])
+        self.clicks = self._pairs([f"clicks_t{i}" for i in tasks])
+
+        # Cognitive groups as one flat gather + reduceat segment starts
+        groups = list(COGNITIVE_GROUPS.items())
+        self.group_tasks = np.array([t - 1 for _, ts in groups for t in ts], dtype=np.intp)
+        self.group_starts = np.cumsum([0] + [len(ts) for _, ts in groups[:-1]]).astype(np.intp)
+        self.group_sizes = np.array([len(ts) for _, ts in groups], dtype=np.float64)
+        self.group_mean_acc = self._pairs([f"{g}_mean_acc" for g, _ in groups])
+        self.group_min_acc = self._pairs([f"{g}_min_acc" for g, _ in groups])
+        self.group_mean_miss = self._pairs([f"{g}_mean_miss" for g, _ in groups])
+        self.group_total_score = self._pairs([f"{g}_total_score" for g, _ in groups])
+
+        self.top_disc_tasks = np.array([t - 1 for t in TOP_DISC_TASKS], dtype=np.intp)
+
+    def _pairs(self, names: List[str]) -> Pairs:
+        """(source positions, destination columns) for the names the model actually uses."""
+        src = [i for i, name in enumerate(names) if name in self._index]
+        dst = [self._index[names[i]] for i in src]
+        return np.array(src, dtype=np.intp), np.array(dst, dtype=np.intp)
+
+    @staticmethod
+    def _put(X: np.ndarray, pairs: Pairs, values: np.ndarray) -> None:
+        src, dst = pairs
+        if len(src):
+            X[:, dst] = values[:, src]
+
+    def _put_column(self, X: np.ndarray, name: str, values: np.ndarray) -> None:
+        col = self._index.get(name)
+        if col is not None:
+            X[:, col] = values
+
+    def build(
+        self,
+        tasks: np.ndarray,
+        age: np.ndarray,
+        is_male: np.ndarray,
+        is_native: np.ndarray,
+    ) -> np.ndarray:
+        """Assemble the (n, n_features) float64 matrix from stacked (n, 5, 32) task blocks."""
+        n = tasks.shape[0]
+        X = np.zeros((n, self.n_features), dtype=np.float64)
+        acc, miss, score = tasks[:, _ACC], tasks[:, _MISS], tasks[:, _SCORE]
+        clicks, hits = tasks[:, _CLICKS], tasks[:, _HITS]
+
+        # Step B — per-task features
+        self._put(X, self.acc, acc)
+        self._put(X, self.miss, miss)
+        self._put(X, self.score, score)
+        self._put(X, self.clicks, clicks)
+
+        # Step C — cognitive group aggregates via one gather per array
+        g_acc = acc[:, self.group_tasks]
+        self._put(X, self.group_mean_acc, np.add.reduceat(g_acc, self.group_starts, axis=1) / self.group_sizes)
+        self._put(X, self.group_min_acc, np.minimum.reduceat(g_acc, self.group_starts, axis=1))
+        self._put(
+            X, self.group_mean_miss,
+            np.add.reduceat(miss[:, self.group_tasks], self.group_starts, axis=1) / self.group_sizes,
+        )
+        self._put(X, self.group_total_score, np.add.reduceat(score[:, self.group_tasks], self.group_starts, axis=1))
+
+        # Step D — overall summary features
+        total_hits = hits.sum(axis=1)
+        total_clicks = clicks.sum(axis=1)
+        self._put_column(X, "overall_mean_accuracy", acc.mean(axis=1))
+        self._put_column(X, "overall_std_accuracy", acc.std(axis=1))
+        self._put_column(X, "overall_min_accuracy", acc.min(axis=1))
+        self._put_column(X, "overall_max_accuracy", acc.max(axis=1))
+        self._put_column(X, "overall_mean_missrate", miss.mean(axis=1))
+        self._put_column(X, "overall_total_hits", total_hits)
+        self._put_column(X, "overall_total_clicks", total_clicks)
+        hit_rate = np.zeros(n)
+        np.divide(total_hits, total_clicks, out=hit_rate, where=total_clicks > 0)
+        self._put_column(X, "global_hit_rate", hit_rate)
+        self._put_column(X, "tasks_zero_accuracy", (acc == 0).sum(axis=1))
+
+        # Step E — top discriminative task aggregates
+        self._put_column(X, "top_disc_mean_acc", acc[:, self.top_disc_tasks].mean(axis=1))
+        self._put_column(X, "top_disc_mean_miss", miss[:, self.top_disc_tasks].mean(axis=1))
+
+        # Step F — demographics ("other_lang" is always 0, already zero-filled)
+        self._put_column(X, "age", age)
+        self._put_column(X, "is_male", is_male)
+        self._put_column(X, "is_native", is_native)
+
+        return np.nan_to_num(X, copy=False, nan=0.0, posinf=0.0, neginf=0.0)
+
+
+def _demographics(sub: Dict[str, Any]) -> Tuple[float, float, float]:
+    """(age, is_male, is_native) for one submission, as in Step F."""
+    return (
+        float(sub.get("age", 10)),
+        1.0 if sub.get("gender", "unknown").lower() == "male" else 0.0,
+        1.0 if sub.get("native_english", True) else 0.0,
+    )
+
+
+def _assemble(tasks: List[np.ndarray], demographics: List[Tuple[float, float, float]]) -> np.ndarray:
+    age, is_male, is_native = np.array(demographics, dtype=np.float64).reshape(-1, 3).T
+    return get_layout().build(np.stack(tasks), age, is_male, is_native)
+
+
+def build_feature_matrix(submissions: List[Dict[str, Any]]) -> np.ndarray:
+    """NumPy-native equivalent of build_feature_vector for one or many submissions.
+
+    Each submission is a dict with task_results, age, gender and native_english;
+    columns follow pkg["feature_names"].
+    """
+    return _assemble(
+        [_task_arrays(sub["task_results"]) for sub in submissions],
+        [_demographics(sub) for sub in submissions],
+    )
+
+
+def _predict_proba(X: np.ndarray, engine: Optional[str] = None) -> np.ndarray:
+    """Positive-class probability for every row of an aligned feature matrix.
+
+    `engine` overrides SEVERITY_ENGINE ("sklearn" or "compiled") and the
+    large-batch routing.
+    """
     pkg = load_model()
-    X_df = build_feature_vector(task_results, age, gender, native_english)
-
-    if pkg.get("needs_scaling") and pkg.get("scaler") is not None:
-        X_input = pkg["scaler"].transform(X_df)
-    else:
-        X_input = X_df.values
-
-    prob = float(pkg["model"].predict_proba(X_input)[0][1])
-
+    if engine is None:
+        # Sidecar-loaded packages have no sklearn model, so they default to the compiled engine
+        engine = SEVERITY_ENGINE if "model" in pkg else "compiled"
+        if engine == "compiled" and "model" in pkg and 0 < SEVERITY_COMPILED_MAX_ROWS <= len(X):
+            engine = "sklearn"
+    if engine == "compiled":
+        compiled = _get_compiled(pkg)
+        if compiled is not None:
+            return compiled.predict_proba(X)[:, 1]
+    pkg = _get_sklearn_package()
+    with warnings.catch_warnings():
+        # The scaler and model were fitted on a DataFrame; a column-aligned plain array is fine here
+        warnings.filterwarnings("ignore", message="X does not have valid feature names", category=UserWarning)
+        if pkg.get("needs_scaling") and pkg.get("scaler") is not None:
+            X = pkg["scaler"].transform(X)
+        return pkg["model"].predict_proba(X)[:, 1]
+
+
+def _get_compiled(pkg: dict) -> Optional[CompiledForest]:
+    """Compiled forest for the package, built on first use; None if the model is unsupported."""
+    global _compiled, _compile_attempted
+    if not _compile_attempted:
+        _compile_attempted = True
+        try:
+            _compiled = compile_model(pkg)
+            print(f"[OK] Compiled forest: {_compiled.n_trees} trees, {_compiled.n_nodes} nodes")
+        except ValueError as e:
+            print(f"[WARN] Compiled engine unavailable, using sklearn: {e}")
+    return _compiled
+
+
+def _build_result(prob: float, task_results: List[Dict]) -> dict:
+    """Turn a model probability into the structured severity result."""
     # Map probability to severity tier
     if prob < 0.30:
         label, display, color = "none", "No Indicators", "#10B981"
@@ -183,6 +452,53 @@ def predict_severity(
     }
 
 
+def predict_severity(
+    task_results: List[Dict],
+    age: int = 10,
+    gender: str = "unknown",
+    native_english: bool = True,
+) -> dict:
+    """Run the full prediction pipeline and return a structured result dict."""
+    X = build_feature_matrix([{
+        "task_results": task_results,
+        "age": age,
+        "gender": gender,
+        "native_english": native_english,
+    }])
+    prob = float(_predict_proba(X)[0])
+    return _build_result(prob, task_results)
+
+
+def predict_severity_batch(submissions: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Score many children with one feature matrix and a single predict_proba call.
+
+    Each submission is a dict with task_results, age, gender and native_english.
+    Returns one entry per submission, in order: the result dict, or
+    {"error": "..."} for submissions whose features could not be built.
+    """
+    outputs: List[Dict[str, Any]] = [{} for _ in submissions]
+    tasks: List[np.ndarray] = []
+    demographics: List[Tuple[float, float, float]] = []
+    row_owners: List[int] = []
+
+    for i, sub in enumerate(submissions):
+        try:
+            block, demo = _task_arrays(sub["task_results"]), _demographics(sub)
+        except Exception as e:
+            outputs[i] = {"error": f"Invalid task results: {e}"}
+            continue
+        tasks.append(block)
+        demographics.append(demo)
+        row_owners.append(i)
+
+    if tasks:
+        probs = _predict_proba(_assemble(tasks, demographics))
+        for i, prob in zip(row_owners, probs):
+            outputs[i] = _build_result(float(prob), submissions[i]["task_results"])
+
+    return outputs
+
+
 def _get_recommendations(severity: str, weak_groups: List[str]) -> List[str]:
     """Return up to 5 actionable recommendations based on severity + weak cognitive groups."""
     base: Dict[str, List[str]] = {
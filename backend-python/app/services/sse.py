@@ -0,0 +1,82 @@
+"""
+Server-Sent Events helpers: formatting and merging several token streams
+(one per output type) into a single event stream for the client.
+"""
+
+import asyncio
+import json
+from typing import AsyncIterator, Dict, List, Tuple
+
+_END = object()
+
+SSE_HEADERS = {
+    "Cache-Control": "no-cache",
+    "Connection": "keep-alive",
+    # Stop nginx/Render proxies from buffering the stream
+    "X-Accel-Buffering": "no",
+}
+
+
+def format_sse(event: str, data: dict) -> str:
+    """Encode one SSE frame."""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False, default=str)}\n\n"
+
+
+async def merge_streams(
+    streams: Dict[str, AsyncIterator[str]],
+) -> AsyncIterator[Tuple[str, str, str]]:
+    """Interleave named streams as (kind, name, payload) tuples.
+
+    kind is "delta" (payload = text), "done" (payload = "") or "error"
+    (payload = message). One failing stream does not stop the others.
+    """
+    queue: asyncio.Queue = asyncio.Queue()
+
+    async def pump(name: str, stream: AsyncIterator[str]) -> None:
+        try:
+            async for delta in stream:
+                await queue.put(("delta", name, delta))
+            await queue.put(("done", name, ""))
+        except Exception as e:
+            await queue.put(("error", name, getattr(e, "detail", None) or str(e)))
+
+    tasks = [asyncio.create_task(pump(name, stream)) for name, stream in streams.items()]
+    remaining = len(tasks)
+    try:
+        while remaining:
+            item = await queue.get()
+            if item[0] != "delta":
+                remaining -= 1
+            yield item
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+async def ordered_stream(streams: List[AsyncIterator[str]], separator: str = "") -> AsyncIterator[str]:
+    """Run streams concurrently but emit them in list order, buffering the ones ahead."""
+    queues: List[asyncio.Queue] = [asyncio.Queue() for _ in streams]
+
+    async def pump(index: int, stream: AsyncIterator[str]) -> None:
+        try:
+            async for delta in stream:
+                await queues[index].put(delta)
+            await queues[index].put(_END)
+        except Exception as e:
+            await queues[index].put(e)
+
+    tasks = [asyncio.create_task(pump(i, s)) for i, s in enumerate(streams)]
+    try:
+        for index, queue in enumerate(queues):
+            if index and separator:
+                yield separator
+            while True:
+                item = await queue.get()
+                if item is _END:
+                    break
+                if isinstance(item, Exception):
+                    raise item
+                yield item
+    finally:
+        for task in tasks:
+            task.cancel()
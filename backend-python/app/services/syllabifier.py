@@ -0,0 +1,614 @@
+"""
+Deterministic, in-process syllabifier for the lecture "simpleText" output.
+Produces the same hyphenated format the LLM breakdown prompt asked for
+("Pho-to-syn-the-sis is the pro-cess") in milliseconds and without API quota.
+
+Lookup order per word (results are memoized):
+1. Explicit syllabifications — the bundled exceptions below plus an optional
+   SYLLABLE_DICT_PATH file ("word syl-la-bles").
+2. Compounds of two dictionary words whose pronunciations add up to the
+   word's (sun-light, ev-er-y-one) are split between the parts.
+3. Rule-based orthographic splitter over vowel nuclei and consonant clusters.
+   Inflections (-s, -es, -ed, -ing) are split off first so the stem keeps its
+   own silent e; a prefix is split off only when the rest is a dictionary word
+   pronounced the same way (re-act, but pres-ent); -tion, -cial, -ture and
+   similar endings stay whole wherever they sit (na-tion-al, re-la-tion-ships).
+
+Two dictionaries sharpen step 3 when installed (see requirements.txt):
+- the CMU Pronouncing Dictionary (`cmudict`, or a CMUDICT_PATH file) gives the
+  syllable count — which vowel pairs are two syllables (cre-at-ed), where an
+  inner e is silent (nine-ty) — and marks short stressed vowels, which keep the
+  next consonant (hab-i-tat) where long ones do not (pa-per);
+- pyphen's en_US TeX hyphenation patterns place the cut inside consonant
+  clusters (con-scious, es-pe-cial-ly).
+Without them the rules run on spelling alone and are less accurate;
+`python -m benchmarks.check_syllabifier` measures both against a few hundred
+common lecture words.
+"""
+
+import importlib.util
+import os
+import re
+import sys
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+VOWELS = set("aeiou")
+# Consonant pairs that always stay together (single sound)
+DIGRAPHS = {"ch", "sh", "th", "ph", "wh", "gh", "ck", "ng", "qu", "gu"}
+# Consonant clusters that can start a syllable
+BLENDS = {
+    "bl", "br", "cl", "cr", "dr", "fl", "fr", "gl", "gr", "pl", "pr", "sc", "sk",
+    "sl", "sm", "sn", "sp", "st", "sw", "tr", "tw", "wr", "scr", "spl", "spr",
+    "str", "thr", "chr", "shr", "sch",
+}
+# Vowel pairs pronounced as one sound
+VOWEL_TEAMS = {
+    "ai", "ay", "au", "aw", "ea", "ee", "ei", "ey", "eu", "ew", "ie", "oa", "oe",
+    "oi", "oo", "ou", "ow", "oy", "ue", "ui", "uy",
+}
+# Teams that are two syllables in some words (so-ci-e-ty, cre-at-ed, flu-id)
+SPLITTABLE_TEAMS = {"ie", "ea", "eu", "ue", "ui", "ei", "oe", "oo"}
+# Derivational endings that form their own syllable after a dictionary stem
+# (move-ment, re-la-tion-ship, a-vail-a-ble); the "-ness" in "business" is not one
+SUFFIXES = ("ment", "ness", "less", "ful", "ly", "ship", "able")
+# Doubled consonants that stay with the stem before -ing/-ed (tell-ing, pass-ing)
+# when no word list is available to check the stem
+KEEP_DOUBLED = set("lsfz")
+# Prefixes and their syllables
+PREFIXES: Dict[str, List[str]] = {
+    "inter": ["in", "ter"], "trans": ["trans"], "under": ["un", "der"], "over": ["o", "ver"],
+    "pre": ["pre"], "dis": ["dis"], "mis": ["mis"], "non": ["non"], "sub": ["sub"],
+    "un": ["un"], "re": ["re"],
+}
+# Stressed vowels that are short, so a single consonant after them closes the syllable
+LAX_VOWELS = {"AE", "EH", "IH", "AH", "UH"}
+
+# Words the rules get wrong (irregular spelling/pronunciation)
+EXCEPTIONS: Dict[str, str] = {
+    "every": "ev-er-y", "different": "dif-fer-ent", "business": "busi-ness",
+    "people": "peo-ple", "science": "sci-ence", "create": "cre-ate",
+    "area": "ar-e-a", "idea": "i-de-a", "being": "be-ing", "going": "go-ing",
+    "doing": "do-ing", "seeing": "see-ing", "really": "re-al-ly",
+    "photosynthesis": "pho-to-syn-the-sis", "process": "pro-cess",
+    "evaporation": "e-vap-o-ra-tion", "energy": "en-er-gy", "oxygen": "ox-y-gen",
+    "chlorophyll": "chlo-ro-phyll", "molecule": "mol-e-cule", "organism": "or-gan-ism",
+    "chemistry": "chem-is-try", "biology": "bi-ol-o-gy", "history": "his-to-ry",
+    "family": "fam-i-ly", "animal": "an-i-mal", "important": "im-por-tant",
+    "because": "be-cause", "before": "be-fore", "become": "be-come",
+    "water": "wa-ter", "over": "o-ver", "very": "ver-y", "many": "man-y",
+    "only": "on-ly", "other": "oth-er", "another": "an-oth-er", "together": "to-geth-er",
+    "something": "some-thing", "sometimes": "some-times", "everything": "ev-er-y-thing",
+    "there": "there", "where": "where", "were": "were", "here": "here",
+    "little": "lit-tle", "table": "ta-ble", "simple": "sim-ple", "example": "ex-am-ple",
+    "question": "ques-tion", "answer": "an-swer", "listen": "lis-ten",
+    "lecture": "lec-ture", "student": "stu-dent", "teacher": "teach-er",
+    "reading": "read-ing", "learning": "learn-ing", "understand": "un-der-stand",
+    "information": "in-for-ma-tion", "education": "ed-u-ca-tion",
+    "dyslexia": "dys-lex-i-a", "syllable": "syl-la-ble", "computer": "com-put-er",
+    "number": "num-ber", "system": "sys-tem", "government": "gov-ern-ment",
+    "material": "ma-te-ri-al", "natural": "nat-u-ral", "general": "gen-er-al",
+    "several": "sev-er-al", "interest": "in-ter-est", "interesting": "in-ter-est-ing",
+    "actually": "ac-tu-al-ly", "usually": "u-su-al-ly", "probably": "prob-a-bly",
+    "hundred": "hun-dred", "early": "ear-ly", "react": "re-act", "reaction": "re-ac-tion",
+    "reuse": "re-use", "evening": "eve-ning", "chocolate": "choc-o-late",
+    "perimeter": "pe-rim-e-ter", "medieval": "me-di-e-val", "theory": "the-o-ry",
+    "presentation": "pres-en-ta-tion",
+}
+
+_WORD_RE = re.compile(r"[A-Za-z]+(?:'[A-Za-z]+)?")
+
+_dictionary: Optional[Dict[str, str]] = None
+_pronunciations: Optional[Dict[str, Tuple[str, ...]]] = None
+_hyphenator = None
+_hyphenator_loaded = False
+
+
+def _load_dictionary() -> Dict[str, str]:
+    """Bundled exceptions plus an optional "word syl-la-bles" file."""
+    global _dictionary
+    if _dictionary is None:
+        entries = dict(EXCEPTIONS)
+        path = os.getenv("SYLLABLE_DICT_PATH")
+        if path and os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    parts = line.strip().split()
+                    if len(parts) == 2 and not line.startswith("#"):
+                        entries[parts[0].lower()] = parts[1].lower()
+        _dictionary = entries
+    return _dictionary
+
+
+def _cmudict_path() -> Optional[str]:
+    """CMUDICT_PATH, or the dictionary file shipped with the `cmudict` package."""
+    path = os.getenv("CMUDICT_PATH")
+    if path:
+        return path
+    spec = importlib.util.find_spec("cmudict")
+    if spec is None or not spec.origin:
+        return None
+    return os.path.join(os.path.dirname(spec.origin), "data", "cmudict.dict")
+
+
+def _load_pronunciations() -> Dict[str, Tuple[str, ...]]:
+    """Vowel phonemes with stress (e.g. ("EH1", "ER0", "IY0")) of each cmudict word."""
+    global _pronunciations
+    if _pronunciations is None:
+        entries: Dict[str, Tuple[str, ...]] = {}
+        path = _cmudict_path()
+        if path and os.path.exists(path):
+            with open(path, encoding="latin-1") as f:
+                for line in f:
+                    if line.startswith(";;;"):
+                        continue
+                    parts = line.split("#", 1)[0].split()
+                    if len(parts) < 2:
+                        continue
+                    word = parts[0].lower()
+                    # Keep the first pronunciation listed; "word(2)" lines are variants
+                    if not word.isalpha() or word in entries:
+                        continue
+                    entries[word] = tuple(sys.intern(p) for p in parts[1:] if p[-1].isdigit())
+        else:
+            print("⚠️ No cmudict file found; syllabifier uses spelling rules without pronunciations")
+        _pronunciations = entries
+    return _pronunciations
+
+
+def _load_hyphenator():
+    """pyphen's en_US hyphenator, or None when pyphen is not installed."""
+    global _hyphenator, _hyphenator_loaded
+    if not _hyphenator_loaded:
+        try:
+            import pyphen
+
+            _hyphenator = pyphen.Pyphen(lang="en_US")
+        except ImportError:
+            print("⚠️ pyphen not installed; syllabifier uses spelling rules without hyphenation patterns")
+            _hyphenator = None
+        _hyphenator_loaded = True
+    return _hyphenator
+
+
+def _vowels(word: str) -> Optional[Tuple[str, ...]]:
+    return _load_pronunciations().get(word)
+
+
+def _bases(vowels: Iterable[str]) -> Tuple[str, ...]:
+    """Vowel phonemes without their stress digit."""
+    return tuple(v[:-1] for v in vowels)
+
+
+def _is_word(word: str) -> bool:
+    return word in _load_pronunciations() or word in _load_dictionary()
+
+
+def _hyphen_points(word: str) -> Set[int]:
+    """Letter offsets where the TeX patterns allow a hyphen."""
+    hyphenator = _load_hyphenator()
+    return set(hyphenator.positions(word)) if hyphenator is not None else set()
+
+
+def _units(word: str) -> List[str]:
+    """Split a lowercase word into letters, keeping consonant digraphs together."""
+    units = []
+    i = 0
+    while i < len(word):
+        pair = word[i:i + 2]
+        # A soft g after n starts the next syllable (en-gine, dan-ger, lan-guage),
+        # and so does a hard g before l/r (an-gle, an-gry)
+        if pair == "ng" and word[i + 2:i + 3] in ("e", "i", "y", "u", "l", "r"):
+            units.append("n")
+            i += 1
+        elif pair == "gu" and word[i + 2:i + 3] not in VOWELS:
+            # gu is one sound only before a vowel (guess, lan-guage; not reg-u-lar)
+            units.append("g")
+            i += 1
+        elif pair in DIGRAPHS:
+            units.append(pair)
+            i += 2
+        else:
+            units.append(word[i])
+            i += 1
+    return units
+
+
+def _is_vowel(units: List[str], i: int) -> bool:
+    u = units[i]
+    if u in VOWELS:
+        return True
+    # w closes "ow"/"ew" before a vowel (pow-er, jew-el), but not "aw" (a-way)
+    if u == "w":
+        return 0 < i < len(units) - 1 and units[i - 1] in ("o", "e") and units[i + 1] in ("e", "i")
+    # y is a vowel except at the start of a word or before a vowel
+    if u == "y":
+        return i > 0 and not (i + 1 < len(units) and units[i + 1] in VOWELS)
+    return False
+
+
+def _binding(units: List[str], vowel: List[bool], hard: Set[int]) -> List[bool]:
+    """Vowels that pull the consonant before them into their syllable.
+
+    The i/e of -tion, -sion, -cial, -cious, -gion, -geous (also inside a word:
+    na-tion-al) and the u of a final -ture/-sure.
+    """
+    n = len(units)
+    bound = [False] * n
+    for i in range(2, n - 1):
+        if not any(vowel[:i - 1]):
+            continue
+        u, before, after = units[i], units[i - 1], units[i + 1]
+        if u == "i" and before in ("t", "c", "s", "g", "x") and after in ("a", "o", "u") and i + 2 < n:
+            bound[i] = True
+        elif u == "e" and before in ("c", "g") and after in ("o", "a") and i + 2 < n:
+            bound[i] = True
+        elif u == "u" and before in ("t", "s") and units[i + 1:i + 3] == ["r", "e"] and (i + 3 == n or i + 3 in hard):
+            bound[i] = True
+    return bound
+
+
+def _keeps_consonant(phone: str, letters: str, consonant: str) -> bool:
+    """Whether a single consonant closes the syllable of the vowel before it.
+
+    Short stressed vowels do (hab-it, mod-el, pres-ent), long and unstressed
+    ones do not (pa-per, pre-dict); "er" keeps its r (av-er-age).
+    """
+    base, stress = phone[:-1], phone[-1]
+    if base == "ER":
+        return letters == "e" and consonant == "r"
+    # Secondary-stressed IH is mostly a reduced vowel in cmudict (hos-pi-tal, e-lec-tron)
+    if stress == "0" or (base == "IH" and stress == "2") or len(letters) != 1:
+        return False
+    if base == "IH" and consonant == "r":
+        return False
+    return base in LAX_VOWELS or (base in ("AA", "AO") and letters == "o")
+
+
+def _fit_nuclei(
+    word: str, units: List[str], starts: List[int], nuclei: List[List[int]], vowels: Tuple[str, ...],
+    hard: Set[int], soft: Set[int], final_e: bool,
+) -> None:
+    """Split vowel teams or voice or drop e's until the nuclei match the dictionary's count."""
+    target = len(vowels)
+    while len(nuclei) < target:
+        candidates = [
+            (idx, j) for idx, (start, end) in enumerate(nuclei)
+            for j in range(start, end) if units[j] + units[j + 1] in SPLITTABLE_TEAMS
+        ]
+        if not candidates:
+            if final_e:
+                # A final e that is pronounced (sim-i-le, a-pos-tro-phe)
+                nuclei.append([len(units) - 1, len(units) - 1])
+                final_e = False
+                continue
+            break
+        # Prefer the pair the hyphenation patterns split (cre-at-ed)
+        idx, j = next(((idx, j) for idx, j in candidates if j + 1 in soft), candidates[0])
+        start, end = nuclei[idx]
+        nuclei[idx:idx + 1] = [[start, j], [j + 1, end]]
+    while len(nuclei) > target:
+        for idx, (start, end) in enumerate(nuclei[:-1]):
+            following = nuclei[idx + 1][0]
+            if units[end] == "i" and following == end + 1:
+                # i before a vowel as a y-glide (mil-lion, o-pin-ion)
+                nuclei[idx:idx + 2] = [[start, nuclei[idx + 1][1]]]
+                break
+            if (
+                idx > 0 and start == end and units[start] == "e" and following > start + 1
+                and _has_stem(word[:starts[start] + 1], vowels)
+            ):
+                # Silent e ending an inner word (nine-ty, safe-ty)
+                del nuclei[idx]
+                hard.add(start + 1)
+                break
+        else:
+            return
+
+
+def _split_core(word: str, vowels: Optional[Tuple[str, ...]] = None, soft: Iterable[int] = (), hard: Iterable[int] = ()) -> List[str]:
+    """Rule-based syllabification of a lowercase word without known prefixes.
+
+    `vowels` are the word's dictionary vowel phonemes, `soft` the letter
+    offsets the hyphenation patterns allow and `hard` offsets where a
+    suffix starts.
+    """
+    units = _units(word)
+    n = len(units)
+    starts = []
+    offset = 0
+    for u in units:
+        starts.append(offset)
+        offset += len(u)
+    unit_at = {s: i for i, s in enumerate(starts)}
+    hard_units = {unit_at[c] for c in hard if c in unit_at}
+    soft_units = {unit_at[c] for c in soft if c in unit_at}
+    vowel = [_is_vowel(units, i) for i in range(n)]
+
+    # Silent final e (but not consonant + "le", which is its own syllable)
+    final_e = False
+    if n > 2 and units[-1] == "e" and not vowel[-2]:
+        if not (units[-2] == "l" and n > 3 and not vowel[-3]):
+            vowel[-1] = False
+            final_e = units[-2] != "r"  # -ire/-ure may count twice in cmudict (em-pire)
+    # Silent e closing the stem before a suffix (move-ment, care-ful)
+    for cut in hard_units:
+        if cut >= 3 and units[cut - 1] == "e" and not vowel[cut - 2] and any(vowel[:cut - 2]):
+            if not (units[cut - 2] == "l" and not vowel[cut - 3]):
+                vowel[cut - 1] = False
+
+    bound = _binding(units, vowel, hard_units)
+
+    # Vowel nuclei as (start, end) unit ranges; split pairs that are not teams
+    nuclei: List[List[int]] = []
+    i = 0
+    while i < n:
+        if not vowel[i]:
+            i += 1
+            continue
+        start = i
+        if bound[i] and units[i] in ("i", "e"):
+            # -tion, -cial, -cious, -geous: the vowels after i/e are one nucleus
+            i += 1
+            if i + 1 < n and units[i] + units[i + 1] == "ou":
+                i += 1
+        else:
+            while (
+                i + 1 < n and vowel[i + 1] and units[i] + units[i + 1] in VOWEL_TEAMS
+                and i + 1 not in hard_units
+            ):
+                i += 1
+        nuclei.append([start, i])
+        i += 1
+
+    if vowels:
+        _fit_nuclei(word, units, starts, nuclei, vowels, hard_units, soft_units, final_e)
+    if len(nuclei) <= 1:
+        return [word]
+    aligned = vowels is not None and len(vowels) == len(nuclei)
+
+    boundaries = []
+    for idx, ((prev_start, prev_end), (next_start, _)) in enumerate(zip(nuclei, nuclei[1:])):
+        cluster = units[prev_end + 1:next_start]
+        k = len(cluster)
+        gap = range(prev_end + 1, next_start + 1)
+        forced = sorted(c for c in hard_units if c in gap)
+        allowed = sorted(c for c in soft_units if c in gap)
+        letters = "".join(units[prev_start:prev_end + 1])
+        phone = vowels[idx] if aligned else None
+        if forced:
+            cut = forced[0]
+        elif k == 0:
+            cut = next_start
+        elif k == 1:
+            if cluster[0] in ("x", "ng") or bound[prev_start]:
+                # x, ng and -tion close the syllable (ex-it, sing-er, na-tion-al)
+                cut = next_start
+            elif bound[next_start]:
+                cut = prev_end + 1
+            elif allowed:
+                cut = allowed[0]
+            elif phone is not None:
+                cut = next_start if _keeps_consonant(phone, letters, cluster[0]) else prev_end + 1
+            else:
+                # V-CV (open syllable)
+                cut = prev_end + 1
+        else:
+            joined = "".join(cluster)
+            if allowed:
+                cut = allowed[0]
+            elif cluster[:2] == ["t", "ch"]:
+                cut = prev_end + 3
+            elif bound[next_start]:
+                cut = next_start - 1
+            elif "".join(cluster[-3:]) in BLENDS and k > 3:
+                cut = next_start - 3
+            elif "".join(cluster[-2:]) in BLENDS and k > 2:
+                cut = next_start - 2
+            elif cluster[-1] == "l" and next_start == n - 1 and units[-1] == "e":
+                # Consonant + "le" ending: the consonant starts the final syllable (ta-ble)
+                cut = next_start - 2
+            elif k == 2 and joined in BLENDS and (
+                cluster[1] == "r" if phone is None else not _keeps_consonant(phone, letters, cluster[0])
+            ):
+                # Blends open the next syllable after a long or unstressed vowel (hy-dro-gen)
+                cut = prev_end + 1
+            else:
+                # VC-CV: only the last consonant opens the next syllable (hap-py, work-shop)
+                cut = next_start - 1
+        boundaries.append(cut)
+
+    syllables = []
+    last = 0
+    for cut in boundaries:
+        syllables.append("".join(units[last:cut]))
+        last = max(last, cut)
+    syllables.append("".join(units[last:]))
+    return [s for s in syllables if s]
+
+
+def _has_stem(stem: str, vowels: Optional[Tuple[str, ...]]) -> bool:
+    """Whether `stem` (or stem-y for -i, stem-e) is a word pronounced like the start of `vowels`."""
+    for candidate in (stem, stem[:-1] + "y" if stem.endswith("i") else "", stem + "e"):
+        own = _vowels(candidate) if candidate else None
+        if own and vowels and _bases(own) == _bases(vowels[:len(own)]):
+            return True
+    return False
+
+
+def _is_suffix_chain(tail: str) -> bool:
+    return not tail or any(tail.startswith(s) and _is_suffix_chain(tail[len(s):]) for s in SUFFIXES)
+
+
+def _suffix_cuts(word: str, vowels: Optional[Tuple[str, ...]]) -> Set[int]:
+    """Letter offsets where a derivational suffix follows a real stem (care-ful-ly)."""
+    if not _load_pronunciations():
+        # No word list: trust a word-final suffix after any two letters
+        suffix = next((s for s in SUFFIXES[:-2] if word.endswith(s) and len(word) - len(s) >= 2), "")
+        return {len(word) - len(suffix)} if suffix else set()
+    cuts = set()
+    for suffix in SUFFIXES:
+        start = word.find(suffix, 2)
+        while start != -1:
+            if _is_suffix_chain(word[start + len(suffix):]) and _has_stem(word[:start], vowels):
+                cuts.add(start)
+            start = word.find(suffix, start + 1)
+    return cuts
+
+
+def _prefix(word: str, vowels: Optional[Tuple[str, ...]]) -> str:
+    checked = bool(_load_pronunciations())
+    for p in PREFIXES:
+        if not word.startswith(p) or len(word) - len(p) < 3:
+            continue
+        rest = word[len(p):]
+        # Not a prefix when its vowel pairs up with the next one (rea-son),
+        # or for uni- words (u-nite, u-ni-verse)
+        if p[-1] + rest[0] in VOWEL_TEAMS or (p == "un" and rest[0] == "i"):
+            continue
+        if checked:
+            # Only before a real word pronounced as it is here, or hyphenated
+            # there by the patterns (re-act, mis-take, un-u-su-al; not pres-ent)
+            own = _vowels(rest)
+            if not own or not vowels:
+                continue
+            if _bases(own) != _bases(vowels[-len(own):]) and len(p) not in _hyphen_points(word):
+                continue
+        return p
+    return ""
+
+
+def _split_stem(word: str, vowels: Optional[Tuple[str, ...]], points: Set[int]) -> List[str]:
+    """Syllables of an uninflected word: known prefix + rule-based core."""
+    known = _load_dictionary().get(word)
+    if known is not None:
+        return known.split("-")
+    prefix = _prefix(word, vowels)
+    if prefix:
+        head = PREFIXES[prefix]
+        rest_vowels = vowels[len(head):] if vowels and len(vowels) > len(head) else None
+        rest_points = {p - len(prefix) for p in points if p > len(prefix)}
+        return head + _split_stem(word[len(prefix):], rest_vowels, rest_points)
+    return _split_core(word, vowels, points, _suffix_cuts(word, vowels))
+
+
+def _compound(word: str, vowels: Optional[Tuple[str, ...]]) -> Optional[Tuple[str, str]]:
+    """Two dictionary words, at least three letters each, that sound like `word` together.
+
+    Where the hyphenation patterns are available the split must also be one of
+    their points (work-shops, not works-hops), and the parts may have more
+    vowels than the word's own, often shortened, pronunciation (ev-er-y-one).
+    """
+    if not vowels:
+        return None
+    points = _hyphen_points(word) if _load_hyphenator() is not None else None
+    target = _bases(vowels)
+    for i in range(len(word) - 3, 2, -1):
+        if points is not None and i not in points:
+            continue
+        head, tail = word[:i], word[i:]
+        head_vowels, tail_vowels = _vowels(head), _vowels(tail)
+        if not head_vowels or not tail_vowels:
+            continue
+        joined = _bases(head_vowels + tail_vowels)
+        shortened = (
+            points is not None and len(joined) > len(target) and joined[0] == target[0]
+            and joined[-len(tail_vowels):] == target[-len(tail_vowels):]
+        )
+        if joined == target or shortened:
+            return head, tail
+    return None
+
+
+def _inflection(word: str) -> tuple:
+    """(stem, ending, ending is its own syllable) for -ing, -ed, -es and -s words."""
+    if word.endswith("ing") and len(word) > 4 and any(c in VOWELS for c in word[:-3]):
+        return word[:-3], "ing", True
+    if word.endswith("ed") and not word.endswith("eed") and len(word) > 3 and any(c in VOWELS for c in word[:-2]):
+        # -ed is silent unless it follows t/d (jumped vs. want-ed)
+        return word[:-2], "ed", word[-3] in "td"
+    if word.endswith("es") and len(word) > 4 and (word[-3] in "sxzcg" or word[-4:-2] in ("ch", "sh")):
+        return word[:-2], "es", True
+    if word.endswith("s") and not word.endswith(("ss", "us", "is")) and len(word) > 4:
+        return word[:-1], "s", False
+    return word, "", False
+
+
+def _attach(syllables: List[str], ending: str, syllabic: bool, stem: str, vowels: Optional[Tuple[str, ...]]) -> List[str]:
+    if not syllabic:
+        syllables[-1] += ending
+        return syllables
+    last = syllables[-1]
+    if len(last) > 2 and last[-1] == last[-2] and last[-1] not in VOWELS:
+        # Doubled consonant splits between the pair (run-ning, ad-mit-ted) unless
+        # the stem is spelled that way (add-ing, tell-ing)
+        keep = _is_word(stem) if _load_pronunciations() else last[-1] in KEEP_DOUBLED
+        if not keep:
+            syllables[-1], ending = last[:-1], last[-1] + ending
+    elif ending == "es" and any(c in VOWELS for c in last[:-1]) and (
+        last[-1] in "cg"
+        or (
+            last[-1] in "sz" and last[-2] in VOWELS
+            and not (vowels and _keeps_consonant(vowels[-1], last[-2], last[-1]))
+        )
+    ):
+        # Soft c/g and s after a long vowel stay with -es (chan-ges, pla-ces, cau-ses; bus-es)
+        syllables[-1], ending = last[:-1], last[-1] + ending
+    syllables.append(ending)
+    return syllables
+
+
+def _split_word(word: str) -> List[str]:
+    known = _load_dictionary().get(word)
+    if known is not None:
+        return known.split("-")
+    vowels = _vowels(word)
+    if len(word) <= 3 and (not vowels or len(vowels) <= 1):
+        return [word]
+
+    parts = _compound(word, vowels)
+    if parts:
+        return _split_word(parts[0]) + _split_word(parts[1])
+
+    stem, ending, syllabic = _inflection(word)
+    stem_vowels = vowels
+    if vowels and ending and syllabic:
+        stem_vowels = vowels[:-1] or None
+    points = {p for p in _hyphen_points(word) if p < len(stem)}
+    syllables = _split_stem(stem, stem_vowels, points)
+    if ending:
+        syllables = _attach(syllables, ending, syllabic, stem, stem_vowels)
+    return syllables
+
+
+@lru_cache(maxsize=50_000)
+def _syllabify_lower(word: str) -> str:
+    return "-".join(_split_word(word))
+
+
+def syllabify_word(word: str) -> str:
+    """Hyphenate one word into syllables, preserving its capitalisation."""
+    if "'" in word:
+        base, _, tail = word.partition("'")
+        return f"{syllabify_word(base)}'{tail}"
+    hyphenated = _syllabify_lower(word.lower())
+    # Re-apply the original letter case position by position
+    out = []
+    letters = iter(word)
+    for ch in hyphenated:
+        if ch == "-":
+            out.append(ch)
+        else:
+            orig = next(letters, ch)
+            out.append(ch.upper() if orig.isupper() else ch)
+    return "".join(out)
+
+
+def syllabify_text(text: str) -> str:
+    """Hyphenate every word in `text`, leaving spacing and punctuation intact."""
+    return _WORD_RE.sub(lambda m: syllabify_word(m.group(0)), text)
+
+
+def cache_info():
+    """Word-cache statistics (hits, misses, size)."""
+    return _syllabify_lower.cache_info()
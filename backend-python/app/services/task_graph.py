@@ -0,0 +1,143 @@
+"""
+Small DAG executor for fan-out LLM work such as /api/content/transform.
+
+Nodes run as soon as their dependencies have succeeded, limited by a budget
+function consulted every time a slot frees up. For Gemini work the budget is
+KeyScheduler.available_requests(): with several keys (or a fresh bucket) every
+ready node starts at once, and only when the quota is down to one request does
+execution fall back to one node at a time. A failing node does not stop its
+siblings; nodes that depend on it are skipped. The result carries partial
+outputs, per-node errors and per-node timings.
+"""
+
+import asyncio
+import time
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence
+
+Budget = Callable[[], int]
+
+# How often a ready node held back by the budget re-checks it while others run
+BUDGET_RECHECK_SECONDS = 1.0
+
+
+@dataclass
+class Node:
+    name: str
+    # Receives the results of its dependencies by name
+    run: Callable[[Dict[str, Any]], Awaitable[Any]]
+    deps: Sequence[str] = ()
+
+
+@dataclass
+class GraphResult:
+    results: Dict[str, Any] = field(default_factory=dict)
+    errors: Dict[str, str] = field(default_factory=dict)
+    # name -> {"waitMs": ready → started, "startMs": offset from graph start, "durationMs"}
+    timings: Dict[str, Dict[str, float]] = field(default_factory=dict)
+    peak_concurrency: int = 0
+    elapsed: float = 0.0
+
+    def timings_summary(self) -> dict:
+        return {"outputs": self.timings, "peakConcurrency": self.peak_concurrency}
+
+
+def _validate(nodes: List[Node]) -> None:
+    names = {node.name for node in nodes}
+    if len(names) != len(nodes):
+        raise ValueError("Duplicate node names in task graph")
+    for node in nodes:
+        missing = set(node.deps) - names
+        if missing:
+            raise ValueError(f"Node {node.name!r} depends on unknown nodes {sorted(missing)}")
+    # Kahn's algorithm: every node must eventually become ready
+    remaining = {node.name: set(node.deps) for node in nodes}
+    while remaining:
+        ready = [name for name, deps in remaining.items() if not deps]
+        if not ready:
+            raise ValueError(f"Task graph has a cycle among {sorted(remaining)}")
+        for name in ready:
+            del remaining[name]
+        for deps in remaining.values():
+            deps.difference_update(ready)
+
+
+async def run_graph(
+    nodes: List[Node],
+    budget: Optional[Budget] = None,
+    max_concurrency: Optional[int] = None,
+) -> GraphResult:
+    """Run every node, starting ready nodes while the budget allows (at least one at a time)."""
+    _validate(nodes)
+    by_name = {node.name: node for node in nodes}
+    order = {node.name: i for i, node in enumerate(nodes)}
+    outcome = GraphResult()
+    pending = {node.name for node in nodes}
+    ready_at: Dict[str, float] = {}
+    running: Dict[asyncio.Task, str] = {}
+    start = time.perf_counter()
+
+    def ms(seconds: float) -> float:
+        return round(seconds * 1000, 1)
+
+    def refresh_ready(now: float) -> List[str]:
+        ready = []
+        for name in sorted(pending, key=order.get):
+            deps = by_name[name].deps
+            failed = [d for d in deps if d in outcome.errors]
+            if failed:
+                pending.discard(name)
+                outcome.errors[name] = f"Skipped: {', '.join(failed)} failed"
+                continue
+            if all(d in outcome.results for d in deps):
+                ready_at.setdefault(name, now)
+                ready.append(name)
+        return ready
+
+    async def execute(node: Node, started: float) -> Any:
+        try:
+            return await node.run({d: outcome.results[d] for d in node.deps})
+        finally:
+            outcome.timings[node.name] = {
+                "waitMs": ms(started - ready_at[node.name]),
+                "startMs": ms(started - start),
+                "durationMs": ms(time.perf_counter() - started),
+            }
+
+    try:
+        while pending or running:
+            ready = refresh_ready(time.perf_counter())
+            # Nodes already running have taken their share of the budget
+            allowed = budget() if budget is not None else len(ready)
+            if max_concurrency is not None:
+                allowed = min(allowed, max_concurrency - len(running))
+            if not running:
+                allowed = max(allowed, 1)
+            held_back = len(ready) > max(0, allowed)
+            for name in ready[:max(0, allowed)]:
+                pending.discard(name)
+                task = asyncio.create_task(execute(by_name[name], time.perf_counter()))
+                running[task] = name
+            outcome.peak_concurrency = max(outcome.peak_concurrency, len(running))
+            if not running:
+                break
+
+            # Quota refills over time, so held-back nodes re-check the budget periodically
+            done, _ = await asyncio.wait(
+                running,
+                timeout=BUDGET_RECHECK_SECONDS if held_back else None,
+                return_when=asyncio.FIRST_COMPLETED,
+            )
+            for task in done:
+                name = running.pop(task)
+                try:
+                    outcome.results[name] = task.result()
+                except Exception as e:
+                    outcome.errors[name] = getattr(e, "detail", None) or str(e)
+                    print(f"⚠️ {name} failed: {outcome.errors[name]}")
+    finally:
+        for task in running:
+            task.cancel()
+
+    outcome.elapsed = time.perf_counter() - start
+    return outcome
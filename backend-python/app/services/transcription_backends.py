@@ -0,0 +1,378 @@
+"""
+Pluggable transcription backends and the policy that picks one per recording.
+
+- "assemblyai": the hosted API (upload, queue, per-minute cost).
+- "local": faster-whisper (a CTranslate2 Whisper port, int8-quantized on CPU)
+  running in a process pool, one model instance per pool process. Optional:
+  only available when the faster-whisper package is installed.
+
+TRANSCRIPTION_ROUTING chooses between them:
+  assemblyai | local   always that backend
+  short-local          clips up to TRANSCRIPTION_LOCAL_MAX_SECONDS run locally, longer ones remotely
+  short-remote         the reverse: short clips remotely, long recordings locally
+If the chosen backend is unavailable the other one is used.
+
+transcribe_path() is the entry point for audio on disk: recordings longer
+than TRANSCRIPTION_CHUNK_MIN_SECONDS are split at silences
+(app/services/audio_chunking.py), the chunks transcribed in parallel on the
+chosen backend and the results stitched back together with word timestamps.
+
+Every backend records latency, audio seconds and real-time factor
+(processing time / audio duration) in BackendMetrics, exposed at
+/api/transcription/metrics.
+"""
+
+import asyncio
+import importlib.util
+import multiprocessing
+import os
+import shutil
+import tempfile
+import time
+import wave
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass, field
+from typing import AsyncIterator, Deque, Dict, List, Optional
+
+from app.services import assemblyai, audio_chunking
+from app.services.uploads import iter_file
+
+TRANSCRIPTION_ROUTING = os.getenv("TRANSCRIPTION_ROUTING", "assemblyai").lower()
+LOCAL_MAX_SECONDS = float(os.getenv("TRANSCRIPTION_LOCAL_MAX_SECONDS", "120"))
+
+WHISPER_MODEL = os.getenv("WHISPER_MODEL", "base.en")
+WHISPER_COMPUTE_TYPE = os.getenv("WHISPER_COMPUTE_TYPE", "int8")
+WHISPER_WORKERS = int(os.getenv("WHISPER_WORKERS", "1"))
+WHISPER_CPU_THREADS = int(os.getenv("WHISPER_CPU_THREADS", "4"))
+
+# Used to estimate duration when the container format cannot be probed
+FALLBACK_BYTES_PER_SECOND = 16_000  # ~128 kbps compressed audio
+
+
+@dataclass
+class TranscriptionResult:
+    text: str
+    confidence: float
+    backend: str
+    duration_seconds: Optional[float] = None
+    processing_seconds: float = 0.0
+    # [{"word", "start", "end", "confidence"}], seconds from the start of the audio
+    words: List[dict] = field(default_factory=list)
+    chunks: int = 1
+
+    def summary(self) -> dict:
+        """Response shape of /api/transcribe-audio."""
+        return {
+            "transcription": self.text,
+            "confidence": self.confidence,
+            "words": len(self.text.split()),
+        }
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+
+class BackendMetrics:
+    """Per-backend counters and a window of recent latencies / real-time factors."""
+
+    def __init__(self, window: int = 200):
+        self.requests = 0
+        self.failures = 0
+        self.audio_seconds = 0.0
+        self.processing_seconds = 0.0
+        self._latencies: Deque[float] = deque(maxlen=window)
+        self._rtfs: Deque[float] = deque(maxlen=window)
+
+    def record(self, processing_seconds: float, audio_seconds: Optional[float]) -> None:
+        self.requests += 1
+        self.processing_seconds += processing_seconds
+        self._latencies.append(processing_seconds)
+        if audio_seconds:
+            self.audio_seconds += audio_seconds
+            self._rtfs.append(processing_seconds / audio_seconds)
+
+    def record_failure(self) -> None:
+        self.requests += 1
+        self.failures += 1
+
+    @staticmethod
+    def _percentile(values: List[float], q: float) -> Optional[float]:
+        if not values:
+            return None
+        ordered = sorted(values)
+        return round(ordered[min(len(ordered) - 1, int(q * len(ordered)))], 3)
+
+    def snapshot(self) -> dict:
+        latencies, rtfs = list(self._latencies), list(self._rtfs)
+        return {
+            "requests": self.requests,
+            "failures": self.failures,
+            "audioSeconds": round(self.audio_seconds, 1),
+            "processingSeconds": round(self.processing_seconds, 1),
+            # Audio seconds transcribed per wall-clock second of processing
+            "throughput": round(self.audio_seconds / self.processing_seconds, 2) if self.processing_seconds else None,
+            "latencyP50": self._percentile(latencies, 0.5),
+            "latencyP95": self._percentile(latencies, 0.95),
+            "rtfP50": self._percentile(rtfs, 0.5),
+            "rtfP95": self._percentile(rtfs, 0.95),
+        }
+
+
+class TranscriptionBackend:
+    """Interface: transcribe an audio file on disk."""
+
+    name = "base"
+
+    def __init__(self):
+        self.metrics = BackendMetrics()
+
+    def available(self) -> bool:
+        return True
+
+    async def _transcribe(self, path: str, language: str) -> TranscriptionResult:
+        raise NotImplementedError
+
+    async def transcribe_file(self, path: str, language: str = "en") -> TranscriptionResult:
+        """Transcribe and record metrics (failures included)."""
+        start = time.perf_counter()
+        try:
+            result = await self._transcribe(path, language)
+        except Exception:
+            self.metrics.record_failure()
+            raise
+        result.processing_seconds = time.perf_counter() - start
+        self.metrics.record(result.processing_seconds, result.duration_seconds)
+        rtf = f", RTF {result.processing_seconds / result.duration_seconds:.2f}" if result.duration_seconds else ""
+        print(f"🎙️ [{self.name}] transcribed in {result.processing_seconds:.1f}s{rtf}")
+        return result
+
+
+class AssemblyAIBackend(TranscriptionBackend):
+    name = "assemblyai"
+
+    def available(self) -> bool:
+        return bool(os.getenv("ASSEMBLYAI_API_KEY"))
+
+    @staticmethod
+    def _result(data: dict) -> TranscriptionResult:
+        words = [
+            {
+                "word": w.get("text", ""),
+                "start": w["start"] / 1000.0,
+                "end": w["end"] / 1000.0,
+                "confidence": w.get("confidence"),
+            }
+            for w in data.get("words") or []
+        ]
+        return TranscriptionResult(
+            text=data.get("text") or "",
+            confidence=data.get("confidence", 0),
+            backend=AssemblyAIBackend.name,
+            duration_seconds=data.get("audio_duration"),
+            words=words,
+        )
+
+    async def transcribe_stream(
+        self, chunks: AsyncIterator[bytes], language: str = "en", timeout: float = 300.0
+    ) -> TranscriptionResult:
+        """Upload a streamed body (no local copy) and wait for the transcript."""
+        start = time.perf_counter()
+        try:
+            audio_url = await assemblyai.upload_audio(chunks)
+            result = self._result(await self._wait(audio_url, language, timeout))
+        except Exception:
+            self.metrics.record_failure()
+            raise
+        result.processing_seconds = time.perf_counter() - start
+        self.metrics.record(result.processing_seconds, result.duration_seconds)
+        return result
+
+    async def _wait(self, audio_url: str, language: str, timeout: float) -> dict:
+        webhook = assemblyai.webhook_url()
+        transcript_id = await assemblyai.request_transcript(audio_url, language, webhook=webhook)
+        return await assemblyai.wait_for_transcript(transcript_id, timeout=timeout, webhook=webhook is not None)
+
+    async def _transcribe(self, path: str, language: str) -> TranscriptionResult:
+        audio_url = await assemblyai.upload_audio(iter_file(path))
+        return self._result(await self._wait(audio_url, language, timeout=300.0))
+
+
+# --- Local engine: runs inside pool processes -------------------------------
+
+_whisper_model = None
+
+
+def _load_whisper(model_name: str, compute_type: str, cpu_threads: int) -> None:
+    """Pool initializer: load the model once per process."""
+    global _whisper_model
+    from faster_whisper import WhisperModel
+
+    _whisper_model = WhisperModel(model_name, device="cpu", compute_type=compute_type, cpu_threads=cpu_threads)
+
+
+def _whisper_transcribe(path: str, language: str) -> dict:
+    segments, info = _whisper_model.transcribe(path, language=language, word_timestamps=True, vad_filter=True)
+    texts, words = [], []
+    for segment in segments:
+        texts.append(segment.text.strip())
+        for w in segment.words or []:
+            words.append({"word": w.word.strip(), "start": w.start, "end": w.end, "confidence": w.probability})
+    confidence = sum(w["confidence"] for w in words) / len(words) if words else 0.0
+    return {"text": " ".join(t for t in texts if t), "words": words,
+            "confidence": confidence, "duration": info.duration}
+
+
+class LocalWhisperBackend(TranscriptionBackend):
+    name = "local"
+
+    def __init__(self):
+        super().__init__()
+        self._pool: Optional[ProcessPoolExecutor] = None
+
+    def available(self) -> bool:
+        return importlib.util.find_spec("faster_whisper") is not None
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        # Lazy and "spawn": never inherited across a gunicorn fork, and no forked threads
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(
+                max_workers=WHISPER_WORKERS,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_load_whisper,
+                initargs=(WHISPER_MODEL, WHISPER_COMPUTE_TYPE, WHISPER_CPU_THREADS),
+            )
+        return self._pool
+
+    async def _transcribe(self, path: str, language: str) -> TranscriptionResult:
+        loop = asyncio.get_running_loop()
+        data = await loop.run_in_executor(self._get_pool(), _whisper_transcribe, path, language)
+        return TranscriptionResult(
+            text=data["text"],
+            confidence=round(data["confidence"], 4),
+            backend=self.name,
+            duration_seconds=data["duration"],
+            words=data["words"],
+        )
+
+    def shutdown(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+
+_backends: Dict[str, TranscriptionBackend] = {
+    AssemblyAIBackend.name: AssemblyAIBackend(),
+    LocalWhisperBackend.name: LocalWhisperBackend(),
+}
+
+
+def get_backend(name: str) -> TranscriptionBackend:
+    return _backends[name]
+
+
+def needs_audio_file() -> bool:
+    """Whether uploads must be spooled to disk: the local engine may be chosen, or long ones get chunked."""
+    local = TRANSCRIPTION_ROUTING != "assemblyai" and get_backend("local").available()
+    return local or audio_chunking.enabled()
+
+
+def probe_duration(path: str, size_bytes: Optional[int] = None) -> Optional[float]:
+    """Audio length in seconds: exact for WAV, via PyAV if installed, else estimated from size."""
+    try:
+        with wave.open(path, "rb") as w:
+            return w.getnframes() / float(w.getframerate())
+    except (wave.Error, EOFError, OSError):
+        pass
+    if importlib.util.find_spec("av") is not None:
+        import av
+
+        try:
+            with av.open(path) as container:
+                if container.duration:
+                    return container.duration / av.time_base
+        except Exception:
+            pass
+    if size_bytes is None:
+        size_bytes = os.path.getsize(path)
+    return size_bytes / FALLBACK_BYTES_PER_SECOND
+
+
+def choose_backend(duration_seconds: Optional[float]) -> TranscriptionBackend:
+    """Apply TRANSCRIPTION_ROUTING, falling back to whichever backend is available."""
+    if TRANSCRIPTION_ROUTING in _backends:
+        preferred = TRANSCRIPTION_ROUTING
+    else:
+        short = duration_seconds is not None and duration_seconds <= LOCAL_MAX_SECONDS
+        if TRANSCRIPTION_ROUTING == "short-remote":
+            preferred = "assemblyai" if short else "local"
+        else:
+            preferred = "local" if short else "assemblyai"
+    backend = _backends[preferred]
+    if not backend.available():
+        other = next(b for name, b in _backends.items() if name != preferred)
+        if other.available():
+            return other
+    return backend
+
+
+async def _transcribe_chunked(
+    path: str, backend: TranscriptionBackend, language: str
+) -> TranscriptionResult:
+    start = time.perf_counter()
+    directory = tempfile.mkdtemp(prefix="chunks-")
+    try:
+        chunks, duration = await asyncio.to_thread(audio_chunking.split_audio, path, directory)
+        split_seconds = time.perf_counter() - start
+        slots = asyncio.Semaphore(audio_chunking.CHUNK_CONCURRENCY)
+
+        async def run(chunk: audio_chunking.AudioChunk) -> TranscriptionResult:
+            async with slots:
+                return await backend.transcribe_file(chunk.path, language)
+
+        results = await asyncio.gather(*(run(chunk) for chunk in chunks))
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+    merged = audio_chunking.merge_transcripts(chunks, [r.to_dict() for r in results])
+    elapsed = time.perf_counter() - start
+    print(
+        f"🧩 [{backend.name}] {duration / 60:.1f} min in {len(chunks)} chunks: "
+        f"split {split_seconds:.1f}s, total {elapsed:.1f}s (RTF {elapsed / duration:.2f})"
+    )
+    return TranscriptionResult(
+        text=merged["text"],
+        confidence=merged["confidence"],
+        backend=backend.name,
+        duration_seconds=duration,
+        processing_seconds=elapsed,
+        words=merged["words"],
+        chunks=len(chunks),
+    )
+
+
+async def transcribe_path(path: str, size_bytes: Optional[int] = None, language: str = "en") -> TranscriptionResult:
+    """Route a recording on disk to a backend, chunking long recordings when enabled."""
+    duration = probe_duration(path, size_bytes)
+    backend = choose_backend(duration)
+    if audio_chunking.enabled() and duration is not None and duration >= audio_chunking.CHUNK_MIN_SECONDS:
+        return await _transcribe_chunked(path, backend, language)
+    return await backend.transcribe_file(path, language)
+
+
+def metrics_snapshot() -> dict:
+    return {
+        "routing": TRANSCRIPTION_ROUTING,
+        "localMaxSeconds": LOCAL_MAX_SECONDS,
+        "backends": {
+            name: {"available": backend.available(), **backend.metrics.snapshot()}
+            for name, backend in _backends.items()
+        },
+    }
+
+
+def shutdown_backends() -> None:
+    """Stop local engine pool processes (called on app shutdown)."""
+    for backend in _backends.values():
+        if isinstance(backend, LocalWhisperBackend):
+            backend.shutdown()
@@ -0,0 +1,168 @@
+"""
+Bounded, chunked handling of file uploads.
+
+Starlette already spools multipart files to disk past 1 MB; the problem was
+the endpoints calling `await file.read()` and holding the whole upload in
+memory. These helpers read an UploadFile in fixed-size chunks instead:
+iter_upload feeds a streaming request body (audio → AssemblyAI) and
+spool_upload copies to memory or, above a threshold, a named temp file that
+another process can open (images → the enhancement pool). Both enforce a
+byte limit while reading, and ContentLengthLimitMiddleware rejects uploads
+whose Content-Length is already too large before the body is parsed.
+"""
+
+import asyncio
+import json
+import os
+import tempfile
+from dataclasses import dataclass
+from typing import AsyncIterator, Dict, Optional, Union
+
+from fastapi import UploadFile
+
+UPLOAD_CHUNK_BYTES = int(os.getenv("UPLOAD_CHUNK_BYTES", str(1024 * 1024)))
+# Uploads up to this size stay in memory; larger ones are spooled to a temp file
+UPLOAD_MEMORY_THRESHOLD = int(os.getenv("UPLOAD_MEMORY_THRESHOLD", str(8 * 1024 * 1024)))
+MAX_AUDIO_UPLOAD_BYTES = int(os.getenv("MAX_AUDIO_UPLOAD_BYTES", str(500 * 1024 * 1024)))
+MAX_IMAGE_UPLOAD_BYTES = int(os.getenv("MAX_IMAGE_UPLOAD_BYTES", str(50 * 1024 * 1024)))
+# Allowance for multipart boundaries and headers around the file itself
+MULTIPART_OVERHEAD = 64 * 1024
+
+
+class UploadTooLarge(Exception):
+    """Raised when an upload exceeds its byte limit."""
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        super().__init__(f"File size exceeds {limit // (1024 * 1024)} MB limit.")
+
+
+async def iter_upload(
+    file: UploadFile, max_bytes: int, chunk_size: int = UPLOAD_CHUNK_BYTES
+) -> AsyncIterator[bytes]:
+    """Yield the upload in chunks, raising UploadTooLarge once max_bytes is passed."""
+    if file.size is not None and file.size > max_bytes:
+        raise UploadTooLarge(max_bytes)
+    total = 0
+    while True:
+        chunk = await file.read(chunk_size)
+        if not chunk:
+            return
+        total += len(chunk)
+        if total > max_bytes:
+            raise UploadTooLarge(max_bytes)
+        yield chunk
+
+
+async def iter_file(path: str, chunk_size: int = UPLOAD_CHUNK_BYTES) -> AsyncIterator[bytes]:
+    """Yield a file from disk in chunks without blocking the event loop."""
+    with open(path, "rb") as f:
+        while True:
+            chunk = await asyncio.to_thread(f.read, chunk_size)
+            if not chunk:
+                return
+            yield chunk
+
+
+@dataclass
+class SpooledUpload:
+    """An upload held in memory (small) or in a named temp file (large)."""
+
+    size: int
+    data: Optional[bytes] = None
+    path: Optional[str] = None
+
+    @property
+    def source(self) -> Union[bytes, str]:
+        """Bytes, or a file path that can be handed to another process."""
+        return self.data if self.data is not None else self.path
+
+    def read_bytes(self) -> bytes:
+        if self.data is not None:
+            return self.data
+        with open(self.path, "rb") as f:
+            return f.read()
+
+    def cleanup(self) -> None:
+        if self.path:
+            try:
+                os.unlink(self.path)
+            except FileNotFoundError:
+                pass
+            self.path = None
+
+    def __enter__(self) -> "SpooledUpload":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.cleanup()
+
+
+async def spool_upload(
+    file: UploadFile,
+    max_bytes: int,
+    memory_threshold: int = UPLOAD_MEMORY_THRESHOLD,
+    suffix: str = "",
+) -> SpooledUpload:
+    """Copy an upload chunk by chunk, switching to a temp file past memory_threshold."""
+    buffer = bytearray()
+    tmp = None
+    size = 0
+    try:
+        async for chunk in iter_upload(file, max_bytes):
+            size += len(chunk)
+            if tmp is None and size <= memory_threshold:
+                buffer += chunk
+                continue
+            if tmp is None:
+                tmp = tempfile.NamedTemporaryFile(prefix="upload-", suffix=suffix, delete=False)
+                await asyncio.to_thread(tmp.write, bytes(buffer))
+                buffer = bytearray()
+            await asyncio.to_thread(tmp.write, chunk)
+    except BaseException:
+        if tmp is not None:
+            tmp.close()
+            os.unlink(tmp.name)
+        raise
+
+    if tmp is None:
+        return SpooledUpload(size=size, data=bytes(buffer))
+    tmp.close()
+    return SpooledUpload(size=size, path=tmp.name)
+
+
+class ContentLengthLimitMiddleware:
+    """Reject uploads to the given paths with 413 when Content-Length is over the limit.
+
+    Runs before the multipart body is read, so an oversized upload is never
+    spooled. Chunked requests without Content-Length are still caught by
+    iter_upload while reading.
+    """
+
+    def __init__(self, app, limits: Dict[str, int]):
+        self.app = app
+        self.limits = limits
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http":
+            limit = self.limits.get(scope["path"])
+            if limit is not None:
+                length = dict(scope["headers"]).get(b"content-length")
+                if length is not None and length.isdigit() and int(length) > limit + MULTIPART_OVERHEAD:
+                    await self._reject(send, limit)
+                    return
+        await self.app(scope, receive, send)
+
+    @staticmethod
+    async def _reject(send, limit: int) -> None:
+        body = json.dumps({"detail": str(UploadTooLarge(limit))}).encode()
+        await send({
+            "type": "http.response.start",
+            "status": 413,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"connection", b"close"),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
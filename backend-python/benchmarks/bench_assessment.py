@@ -0,0 +1,262 @@
+"""
+Benchmark: assessment scoring pipeline, from feature building to the HTTP endpoint.
+
+    python -m benchmarks.bench_assessment                      # all sections
+    python -m benchmarks.bench_assessment --sections latency,memory
+    python -m benchmarks.bench_assessment --output before.json
+    python -m benchmarks.bench_assessment --compare before.json
+
+Sections:
+  latency     per-call percentiles of build_feature_vector (DataFrame path),
+              build_feature_matrix (NumPy path) and predict_severity
+  throughput  predictions/second of predict_severity_batch at several batch sizes
+  memory      tracemalloc peak per prediction, single call and batched
+  endpoint    /assessment/submit and /assessment/submit-batch through the ASGI
+              test client, with Firestore replaced by an in-memory fake
+
+Workloads come from benchmarks.synthetic, so runs with the same --seed are
+comparable across commits. Results are written as JSON; --compare prints the
+change against an earlier results file.
+"""
+
+import argparse
+import json
+import platform
+import random
+import statistics
+import subprocess
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+from app.services import severity_model
+from benchmarks.synthetic import make_submissions, make_submit_request
+
+SECTIONS = ("latency", "throughput", "memory", "endpoint")
+BATCH_SIZES = (1, 8, 32, 128, 500)
+
+
+def _percentiles(samples_ms: List[float]) -> Dict[str, float]:
+    arr = np.asarray(samples_ms)
+    return {
+        "n": len(samples_ms),
+        "mean_ms": float(arr.mean()),
+        "p50_ms": float(np.percentile(arr, 50)),
+        "p90_ms": float(np.percentile(arr, 90)),
+        "p99_ms": float(np.percentile(arr, 99)),
+        "max_ms": float(arr.max()),
+    }
+
+
+def _time_calls(fn: Callable, args_list: list, warmup: int = 10) -> Dict[str, float]:
+    for args in args_list[:warmup]:
+        fn(*args)
+    samples = []
+    for args in args_list:
+        start = time.perf_counter()
+        fn(*args)
+        samples.append((time.perf_counter() - start) * 1000)
+    return _percentiles(samples)
+
+
+def _single_args(sub: dict) -> tuple:
+    return sub["task_results"], sub["age"], sub["gender"], sub["native_english"]
+
+
+def bench_latency(iterations: int, seed: int) -> dict:
+    submissions = make_submissions(iterations, seed)
+    return {
+        "build_feature_vector": _time_calls(
+            severity_model.build_feature_vector, [_single_args(s) for s in submissions]
+        ),
+        "build_feature_matrix": _time_calls(
+            severity_model.build_feature_matrix, [([s],) for s in submissions]
+        ),
+        "predict_severity": _time_calls(
+            severity_model.predict_severity, [_single_args(s) for s in submissions]
+        ),
+    }
+
+
+def bench_throughput(iterations: int, seed: int) -> dict:
+    results = {}
+    for size in BATCH_SIZES:
+        rounds = max(3, iterations // size)
+        batches = [make_submissions(size, seed + r) for r in range(rounds)]
+        severity_model.predict_severity_batch(batches[0])
+        samples = []
+        for batch in batches:
+            start = time.perf_counter()
+            severity_model.predict_severity_batch(batch)
+            samples.append(time.perf_counter() - start)
+        total = sum(samples)
+        results[str(size)] = {
+            "rounds": rounds,
+            "predictions_per_s": size * rounds / total,
+            "batch_p50_ms": statistics.median(samples) * 1000,
+            "per_prediction_us": total / (size * rounds) * 1e6,
+        }
+    return results
+
+
+def _peak_bytes(fn: Callable, *args) -> int:
+    tracemalloc.start()
+    try:
+        fn(*args)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def bench_memory(seed: int) -> dict:
+    submissions = make_submissions(max(BATCH_SIZES), seed)
+    single = submissions[0]
+    # Warm imports and model caches so they are not counted
+    severity_model.predict_severity(*_single_args(single))
+    severity_model.build_feature_vector(*_single_args(single))
+
+    batch_peak = _peak_bytes(severity_model.predict_severity_batch, submissions)
+    return {
+        "build_feature_vector_peak_bytes": _peak_bytes(
+            severity_model.build_feature_vector, *_single_args(single)
+        ),
+        "build_feature_matrix_peak_bytes": _peak_bytes(severity_model.build_feature_matrix, [single]),
+        "predict_severity_peak_bytes": _peak_bytes(severity_model.predict_severity, *_single_args(single)),
+        "predict_severity_batch": {
+            "batch_size": len(submissions),
+            "peak_bytes": batch_peak,
+            "peak_bytes_per_prediction": batch_peak / len(submissions),
+        },
+    }
+
+
+@contextmanager
+def _assessment_client():
+    from fastapi import FastAPI
+    from fastapi.testclient import TestClient
+
+    from app.routers import assessment
+    from app.services.document_store import MemoryStore, set_store
+
+    app = FastAPI()
+    app.include_router(assessment.router)
+    # Accepts every write without doing I/O, so only our own code is measured
+    set_store(MemoryStore(latency_ms=0, discard_writes=True))
+    with TestClient(app) as client:
+        yield client
+
+
+def bench_endpoint(iterations: int, seed: int) -> dict:
+    rng = random.Random(seed)
+    bodies = [make_submit_request(rng, f"bench-{i}") for i in range(iterations)]
+    batch_body = {"submissions": bodies[:min(len(bodies), 100)]}
+
+    def post(client, path: str, body: dict) -> None:
+        response = client.post(path, json=body)
+        if response.status_code != 200:
+            raise RuntimeError(f"{path} returned {response.status_code}: {response.text[:200]}")
+
+    with _assessment_client() as client:
+        submit = _time_calls(lambda b: post(client, "/assessment/submit", b), [(b,) for b in bodies])
+        batch_rounds = max(3, iterations // 50)
+        submit_batch = _time_calls(
+            lambda b: post(client, "/assessment/submit-batch", b),
+            [(batch_body,)] * batch_rounds,
+            warmup=1,
+        )
+    submit_batch["batch_size"] = len(batch_body["submissions"])
+    return {"submit": submit, "submit_batch": submit_batch}
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        out = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, timeout=5
+        )
+        return out.stdout.strip() or None
+    except Exception:
+        return None
+
+
+def _metadata(args) -> dict:
+    import sklearn
+
+    pkg = severity_model.load_model()
+    return {
+        "timestamp": datetime.utcnow().isoformat(),
+        "commit": _git_commit(),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "sklearn": sklearn.__version__,
+        "model": pkg.get("model_name", type(pkg["model"]).__name__),
+        "n_features": len(pkg["feature_names"]),
+        "iterations": args.iterations,
+        "seed": args.seed,
+    }
+
+
+def _flatten(data: dict, prefix: str = "") -> Dict[str, float]:
+    flat = {}
+    for key, value in data.items():
+        path = f"{prefix}{key}"
+        if isinstance(value, dict):
+            flat.update(_flatten(value, path + "."))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            flat[path] = float(value)
+    return flat
+
+
+def compare(old: dict, new: dict) -> None:
+    """Print metrics present in both runs with their relative change."""
+    before, after = _flatten(old.get("results", {})), _flatten(new.get("results", {}))
+    print(f"\nvs. {old.get('meta', {}).get('commit') or 'previous run'}:")
+    for key in sorted(before.keys() & after.keys()):
+        if before[key]:
+            change = (after[key] - before[key]) / before[key]
+            print(f"  {key:<60} {before[key]:>12.3f} → {after[key]:>12.3f} ({change:+.1%})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--iterations", type=int, default=500, help="calls per latency measurement")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--sections", default=",".join(SECTIONS), help="comma-separated subset of sections")
+    parser.add_argument("--output", default="bench-assessment.json", help="where to write the JSON results")
+    parser.add_argument("--compare", help="earlier results file to compare against")
+    args = parser.parse_args()
+
+    sections = [s.strip() for s in args.sections.split(",") if s.strip()]
+    unknown = set(sections) - set(SECTIONS)
+    if unknown:
+        parser.error(f"unknown sections: {', '.join(sorted(unknown))}")
+
+    results = {}
+    for section in sections:
+        start = time.perf_counter()
+        if section == "latency":
+            results[section] = bench_latency(args.iterations, args.seed)
+        elif section == "throughput":
+            results[section] = bench_throughput(args.iterations, args.seed)
+        elif section == "memory":
+            results[section] = bench_memory(args.seed)
+        elif section == "endpoint":
+            results[section] = bench_endpoint(args.iterations, args.seed)
+        print(f"⏱️ {section}: done in {time.perf_counter() - start:.1f}s")
+        print(json.dumps(results[section], indent=2))
+
+    report = {"meta": _metadata(args), "results": results}
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"📝 Results written to {args.output}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            compare(json.load(f), report)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+Write throughput of the repository layer with and without batching, offline.
+
+    python -m benchmarks.bench_firestore_writes [--latency-ms 25] [--max-in-flight 16] [--lectures 200]
+
+Runs against MemoryStore with a simulated round trip (--latency-ms) and a cap
+on concurrent RPCs (--max-in-flight), so the numbers reflect commits, not
+Python overhead. The workload mimics lecture
+processing: each lecture is created, gets a status update, then its four
+outputs land at nearly the same time, then a final update. Each window
+setting reports wall time, writes/second and how many commits reached the
+store; window 0 is one commit per write (the old behaviour).
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import time
+
+from app.services.document_store import MemoryStore, set_store
+from app.services.repositories import WriteBatcher, lectures, set_batcher
+
+OUTPUTS = ("simpleText", "detailedSteps", "mindMap", "summary")
+
+
+async def lecture_lifecycle(i: int, rng: random.Random) -> None:
+    lecture = await lectures.create({"userId": f"user-{i % 20}", "transcription": "text " * 50})
+    lecture_id = lecture["id"]
+    await lectures.update(lecture_id, {"processingStatus": {"state": "running", "outputs": {}}})
+
+    async def output(name: str) -> None:
+        await asyncio.sleep(rng.uniform(0, 0.005))
+        await lectures.update(lecture_id, {name: f"{name} text", f"processingStatus.outputs.{name}": "done"})
+
+    await asyncio.gather(*(output(name) for name in OUTPUTS))
+    await lectures.update(lecture_id, {"processingStatus.state": "completed"})
+
+
+async def run(window_ms: float, latency_ms: float, max_in_flight: int, count: int, seed: int) -> dict:
+    store = MemoryStore(latency_ms=latency_ms, max_in_flight=max_in_flight)
+    set_store(store)
+    batcher = WriteBatcher(window_ms=window_ms)
+    set_batcher(batcher)
+    rng = random.Random(seed)
+    start = time.perf_counter()
+    await asyncio.gather(*(lecture_lifecycle(i, rng) for i in range(count)))
+    elapsed = time.perf_counter() - start
+
+    # Every lecture must end up complete with all outputs
+    docs = await lectures.find()
+    complete = sum(
+        1 for d in docs
+        if d["processingStatus"]["state"] == "completed" and all(d.get(name) for name in OUTPUTS)
+    )
+    return {
+        "windowMs": window_ms,
+        "seconds": round(elapsed, 3),
+        "writes": batcher.writes,
+        "writesPerSecond": round(batcher.writes / elapsed, 1),
+        "coalesced": batcher.coalesced,
+        "storeCommits": store.commits,
+        "complete": complete,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--latency-ms", type=float, default=25)
+    parser.add_argument("--max-in-flight", type=int, default=16)
+    parser.add_argument("--lectures", type=int, default=200)
+    parser.add_argument("--windows", nargs="*", type=float, default=[0, 5, 10, 25])
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", help="write the report as JSON")
+    args = parser.parse_args()
+
+    rows = []
+    for window in args.windows:
+        row = asyncio.run(run(window, args.latency_ms, args.max_in_flight, args.lectures, args.seed))
+        print(
+            f"window {window:>5.1f} ms: {row['seconds']:6.2f}s  {row['writesPerSecond']:8.1f} writes/s  "
+            f"{row['storeCommits']:5d} commits ({row['coalesced']} coalesced)  "
+            f"{row['complete']}/{args.lectures} complete"
+        )
+        rows.append(row)
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(rows, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
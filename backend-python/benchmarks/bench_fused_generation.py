@@ -0,0 +1,153 @@
+"""
+Fused (one JSON-schema request) vs four-call generation for /api/content/transform.
+
+    python -m benchmarks.bench_fused_generation --text-file chapter.txt --runs 3
+    python -m benchmarks.bench_fused_generation --dry-run      # no API calls
+
+Needs GEMINI_API_KEYS (or GEMINI_API_KEY) unless --dry-run. Each run sends the
+same text both ways, bypassing the LLM cache, and reports:
+  requests      Gemini requests used (quota), including per-field fallbacks
+  inputTokens   promptTokenCount summed over requests
+  outputTokens  candidatesTokenCount summed over requests
+  latency       wall-clock seconds (the four calls run concurrently)
+  fallbacks     fields the fused response got wrong and that were regenerated
+--dry-run prints only the estimated input tokens from the prompts themselves.
+"""
+
+import argparse
+import asyncio
+import json
+import statistics
+import time
+from typing import Dict, List
+
+from app.services.content_transform import build_fused_transform, build_transform_prompts
+from app.services.fused_generation import FUSED_MAX_OUTPUT_TOKENS, parse_fused, render_fields, response_schema
+from app.services.gemini_client import (
+    DEFAULT_GENERATION_CONFIG,
+    GEMINI_MODEL,
+    close_http_client,
+    estimate_tokens,
+    extract_text,
+    generate_content,
+    json_generation_config,
+)
+
+SAMPLE_TEXT = (
+    "Photosynthesis is the process plants use to turn light into chemical energy. "
+    "It happens in the chloroplasts, which contain a green pigment called chlorophyll. "
+    "In the light-dependent reactions, water is split and oxygen is released. "
+    "The energy captured is stored in ATP and NADPH. In the Calvin cycle, the plant "
+    "uses that energy to fix carbon dioxide from the air into sugars. "
+) * 12
+
+
+def payload(prompt: str, system: str, generation_config: dict) -> dict:
+    return {
+        "contents": [{"role": "user", "parts": [{"text": f"{system}\n\n{prompt}"}]}],
+        "generationConfig": generation_config,
+    }
+
+
+class Usage:
+    def __init__(self):
+        self.requests = 0
+        self.input_tokens = 0
+        self.output_tokens = 0
+
+    async def call(self, body: dict) -> str:
+        data = await generate_content(body, model=GEMINI_MODEL, timeout=150.0)
+        meta = data.get("usageMetadata", {})
+        self.requests += 1
+        self.input_tokens += int(meta.get("promptTokenCount", 0))
+        self.output_tokens += int(meta.get("candidatesTokenCount", 0))
+        return extract_text(data)
+
+
+async def four_calls(text: str) -> dict:
+    usage = Usage()
+    start = time.perf_counter()
+    prompts = build_transform_prompts(text)
+    await asyncio.gather(
+        *(usage.call(payload(p, s, dict(DEFAULT_GENERATION_CONFIG))) for p, s in prompts.values())
+    )
+    return {"latency": time.perf_counter() - start, "requests": usage.requests,
+            "inputTokens": usage.input_tokens, "outputTokens": usage.output_tokens, "fallbacks": 0}
+
+
+async def fused(text: str) -> dict:
+    usage = Usage()
+    start = time.perf_counter()
+    prompt, system, fields = build_fused_transform(text)
+    config = json_generation_config(response_schema(fields), FUSED_MAX_OUTPUT_TOKENS)
+    try:
+        rendered = render_fields(fields, parse_fused(await usage.call(payload(prompt, system, config))))
+    except Exception as e:
+        print(f"⚠️ Fused request failed: {getattr(e, 'detail', None) or e}")
+        rendered = {}
+    missing = [f for f in fields if f.name not in rendered]
+    await asyncio.gather(
+        *(usage.call(payload(*f.fallback, dict(DEFAULT_GENERATION_CONFIG))) for f in missing)
+    )
+    return {"latency": time.perf_counter() - start, "requests": usage.requests,
+            "inputTokens": usage.input_tokens, "outputTokens": usage.output_tokens,
+            "fallbacks": len(missing), "fallbackFields": [f.name for f in missing]}
+
+
+def dry_run(text: str) -> None:
+    prompts = build_transform_prompts(text)
+    four = sum(estimate_tokens(payload(p, s, {})) for p, s in prompts.values())
+    prompt, system, _ = build_fused_transform(text)
+    one = estimate_tokens(payload(prompt, system, {}))
+    print(f"Source text: {len(text)} chars (~{len(text) // 4} tokens)")
+    print(f"Four calls: ~{four} input tokens in 4 requests")
+    print(f"Fused:      ~{one} input tokens in 1 request ({one / four:.0%} of four-call input)")
+
+
+def summarize(name: str, runs: List[dict]) -> Dict[str, float]:
+    summary = {key: round(statistics.mean(r[key] for r in runs), 2)
+               for key in ("latency", "requests", "inputTokens", "outputTokens", "fallbacks")}
+    print(
+        f"{name:<10} latency {summary['latency']:6.2f}s  requests {summary['requests']:4.1f}  "
+        f"input {summary['inputTokens']:8.0f}  output {summary['outputTokens']:7.0f}  "
+        f"fallbacks {summary['fallbacks']:.1f}"
+    )
+    return summary
+
+
+async def main_async(text: str, runs: int) -> dict:
+    results = {"fourCalls": [], "fused": []}
+    try:
+        for i in range(runs):
+            results["fourCalls"].append(await four_calls(text))
+            results["fused"].append(await fused(text))
+            print(f"run {i + 1}/{runs} done")
+    finally:
+        await close_http_client()
+    return {name: {"runs": rows, "mean": summarize(name, rows)} for name, rows in results.items()}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--text-file", help="source material (default: built-in sample)")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--dry-run", action="store_true")
+    parser.add_argument("--out", help="write the report as JSON")
+    args = parser.parse_args()
+
+    text = SAMPLE_TEXT
+    if args.text_file:
+        with open(args.text_file, encoding="utf-8") as f:
+            text = f.read()
+
+    if args.dry_run:
+        dry_run(text)
+        return
+    report = asyncio.run(main_async(text, args.runs))
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
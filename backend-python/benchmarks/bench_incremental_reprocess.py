@@ -0,0 +1,123 @@
+"""
+Gemini calls and wall-clock time to reprocess an edited lecture: a full rerun
+vs an incremental one that reuses the previous run's per-chunk results.
+
+    python -m benchmarks.bench_incremental_reprocess [--minutes 60] [--latency 1.0] [--llm-syllabifier]
+
+No network: Gemini is replaced by a fake that sleeps --latency seconds
+(±20%) per call and counts calls. The transcript is synthetic speech at
+~150 words per minute; each scenario applies one edit to it and reprocesses.
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import time
+import zlib
+
+from app.services import lecture_processing
+from app.services.lecture_processing import CHUNK_CHARS, ChunkMemo, content_chunks, process_transcription
+
+WORDS = (
+    "energy cell membrane protein enzyme reaction gradient molecule carbon oxygen light "
+    "structure function process cycle glucose water pressure system signal transport the "
+    "a of and in to is that this which because during after before then so we you"
+).split()
+
+
+def make_transcript(minutes: int, rng: random.Random) -> str:
+    sentences = []
+    words = 0
+    while words < minutes * 150:
+        length = rng.randint(6, 24)
+        sentence = " ".join(rng.choice(WORDS) for _ in range(length))
+        sentences.append(sentence.capitalize() + rng.choice([".", ".", ".", "?"]))
+        words += length
+    return " ".join(sentences)
+
+
+def edits(text: str):
+    sentences = text.split(". ")
+    middle = len(sentences) // 2
+    fixed = sentences[:]
+    fixed[middle] = fixed[middle].replace(" the ", " a ", 1) + " indeed"
+    inserted = sentences[:3] + ["We will come back to this example next week"] + sentences[3:]
+    return {
+        "typo fix (middle)": ". ".join(fixed),
+        "sentence inserted (start)": ". ".join(inserted),
+        "paragraph appended": text + " Finally we summarize the cycle. The energy is stored as glucose.",
+    }
+
+
+class FakeGemini:
+    def __init__(self, latency: float, rng: random.Random):
+        self.latency = latency
+        self.rng = rng
+        self.calls = 0
+
+    async def __call__(self, prompt: str, system: str = None, *args, **kwargs) -> str:
+        self.calls += 1
+        await asyncio.sleep(self.latency * self.rng.uniform(0.8, 1.2))
+        if "Key points" in prompt or "key points" in prompt:
+            # Notes follow their input, so an edited chunk yields different notes
+            return f"- point {zlib.crc32(prompt.encode())}\n- point two"
+        if "syllables" in prompt:
+            return prompt[-200:]
+        return "Main Topic\n├─ A\n└─ B" if "mind map" in prompt else "1. First\n2. Second"
+
+
+async def run(text: str, fake: FakeGemini, memo: ChunkMemo = None) -> dict:
+    before = fake.calls
+    start = time.perf_counter()
+    await process_transcription(text, memo=memo)
+    return {"calls": fake.calls - before, "seconds": round(time.perf_counter() - start, 2)}
+
+
+async def main_async(args) -> list:
+    rng = random.Random(0)
+    fake = FakeGemini(args.latency, rng)
+    lecture_processing.generate_with_gemini = fake
+    if args.llm_syllabifier:
+        lecture_processing.SYLLABIFIER = "llm"
+
+    original = make_transcript(args.minutes, rng)
+    print(f"Transcript: {len(original)} chars, {len(content_chunks(original, CHUNK_CHARS))} chunks")
+    memo = ChunkMemo()
+    first = await run(original, fake, memo)
+    print(f"initial run                 {first['calls']:3d} calls  {first['seconds']:6.2f}s")
+    saved = memo.to_dict()
+
+    rows = []
+    for name, edited in edits(original).items():
+        old_chunks = set(content_chunks(original, CHUNK_CHARS))
+        new_chunks = content_chunks(edited, CHUNK_CHARS)
+        changed = sum(chunk not in old_chunks for chunk in new_chunks)
+        full = await run(edited, fake)
+        incremental = await run(edited, fake, ChunkMemo.from_dict(saved))
+        row = {"edit": name, "chunks": len(new_chunks), "changedChunks": changed,
+               "fullCalls": full["calls"], "fullSeconds": full["seconds"],
+               "incrementalCalls": incremental["calls"], "incrementalSeconds": incremental["seconds"]}
+        print(
+            f"{name:<27} {changed}/{len(new_chunks)} chunks changed  full {full['calls']:3d} calls "
+            f"{full['seconds']:6.2f}s  incremental {incremental['calls']:3d} calls {incremental['seconds']:6.2f}s"
+        )
+        rows.append(row)
+    return rows
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--minutes", type=int, default=60, help="lecture length")
+    parser.add_argument("--latency", type=float, default=1.0, help="simulated seconds per Gemini call")
+    parser.add_argument("--llm-syllabifier", action="store_true", help="also count the per-chunk LLM breakdown")
+    parser.add_argument("--out", help="write the report as JSON")
+    args = parser.parse_args()
+    rows = asyncio.run(main_async(args))
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(rows, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+Response size and time of GET /api/lectures/user/{id}: the full listing vs a
+projected first page vs the NDJSON export, for one heavy user.
+
+    python -m benchmarks.bench_lecture_listing [--lectures 300] [--text-kb 40]
+
+No network or credentials: the app runs in-process on MemoryStore, seeded
+with lectures whose transcription and outputs are --text-kb each.
+"""
+
+import argparse
+import asyncio
+import json
+import time
+from datetime import datetime, timedelta
+
+import httpx
+
+from app.services.document_store import MemoryStore, WriteOp, set_store
+
+USER_ID = "bench-user"
+
+
+async def seed(store: MemoryStore, count: int, text_kb: int) -> None:
+    text = "lorem ipsum " * (text_kb * 1024 // 12)
+    start = datetime(2026, 1, 1)
+    ops = [
+        WriteOp("set", "lectures", store.new_id("lectures"), {
+            "userId": USER_ID,
+            "transcription": text,
+            "simpleText": text,
+            "detailedSteps": text,
+            "mindMap": text,
+            "summary": f"Lecture {i} summary. " * 5,
+            "createdAt": start + timedelta(minutes=i),
+            "updatedAt": start + timedelta(minutes=i),
+        })
+        for i in range(count)
+    ]
+    await store.commit(ops)
+
+
+async def measure(client: httpx.AsyncClient, name: str, url: str, stream: bool = False) -> dict:
+    start = time.perf_counter()
+    size = 0
+    rows = 0
+    if stream:
+        async with client.stream("GET", url) as response:
+            async for line in response.aiter_lines():
+                size += len(line) + 1
+                rows += bool(line)
+    else:
+        response = await client.get(url)
+        size = len(response.content)
+        rows = len(response.json())
+    elapsed = time.perf_counter() - start
+    print(f"{name:<22} {rows:5d} rows  {size / 1024:10.1f} KiB  {elapsed * 1000:8.1f} ms")
+    return {"name": name, "rows": rows, "bytes": size, "ms": round(elapsed * 1000, 1)}
+
+
+async def main_async(args) -> list:
+    store = MemoryStore(latency_ms=0)
+    set_store(store)
+    await seed(store, args.lectures, args.text_kb)
+
+    from main import app
+
+    base = f"/api/lectures/user/{USER_ID}"
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        return [
+            await measure(client, "full listing", base),
+            await measure(client, "projected listing", f"{base}?fields=summary"),
+            await measure(client, "first page (20)", f"{base}?limit=20&fields=summary"),
+            await measure(client, "export (ndjson)", f"{base}/export", stream=True),
+        ]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--lectures", type=int, default=300)
+    parser.add_argument("--text-kb", type=int, default=40, help="size of each large text field")
+    parser.add_argument("--out", help="write the report as JSON")
+    args = parser.parse_args()
+    rows = asyncio.run(main_async(args))
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(rows, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
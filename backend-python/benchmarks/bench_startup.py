@@ -0,0 +1,85 @@
+"""
+Startup-time report for the severity model loaders.
+
+    python -m benchmarks.bench_startup [--runs 5]
+
+Each configuration runs in a fresh interpreter (so import and page-cache
+effects are real) and measures: importing the severity service, loading the
+model, the first prediction, peak RSS, and which heavy libraries ended up
+imported. Export the sidecars first for the mmap rows:
+
+    python -m app.services.model_store export
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+CONFIGS = {
+    "pickle + sklearn": {"SEVERITY_MODEL_LOADER": "pickle", "SEVERITY_ENGINE": "sklearn"},
+    "pickle + compiled": {"SEVERITY_MODEL_LOADER": "pickle", "SEVERITY_ENGINE": "compiled"},
+    "mmap (compiled)": {"SEVERITY_MODEL_LOADER": "mmap", "SEVERITY_ENGINE": "compiled"},
+}
+
+HEAVY_MODULES = ("pandas", "sklearn", "joblib")
+
+PROBE = r"""
+import json, resource, sys, time
+t0 = time.perf_counter()
+from app.services import severity_model
+t1 = time.perf_counter()
+pkg = severity_model.load_model()
+t2 = time.perf_counter()
+from benchmarks.synthetic import make_submissions
+sub = make_submissions(1, 0)[0]
+t3 = time.perf_counter()
+severity_model.predict_severity(sub["task_results"], sub["age"], sub["gender"], sub["native_english"])
+t4 = time.perf_counter()
+print(json.dumps({
+    "import_ms": (t1 - t0) * 1000,
+    "load_ms": (t2 - t1) * 1000,
+    "first_predict_ms": (t4 - t3) * 1000,
+    "total_ms": (t2 - t0) * 1000 + (t4 - t3) * 1000,
+    "max_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    "mmap": "compiled" in pkg and "model" not in pkg,
+    "imported": [m for m in %r if m in sys.modules],
+}))
+""" % (HEAVY_MODULES,)
+
+
+def run_probe(env_overrides: dict) -> dict:
+    env = {**os.environ, **env_overrides}
+    out = subprocess.run(
+        [sys.executable, "-c", PROBE], env=env, capture_output=True, text=True, check=True
+    )
+    # The service prints load messages; the report is the last line
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--runs", type=int, default=5, help="fresh interpreters per configuration")
+    args = parser.parse_args()
+
+    print(f"{'configuration':<20} {'import':>9} {'load':>9} {'1st pred':>9} {'total':>9} {'rss':>8}  imported")
+    for name, env in CONFIGS.items():
+        try:
+            runs = [run_probe(env) for _ in range(args.runs)]
+        except subprocess.CalledProcessError as e:
+            print(f"{name:<20} failed: {e.stderr.strip().splitlines()[-1] if e.stderr else e}")
+            continue
+        median = {key: statistics.median(r[key] for r in runs)
+                  for key in ("import_ms", "load_ms", "first_predict_ms", "total_ms", "max_rss_mb")}
+        label = name if all(r["mmap"] for r in runs) or "mmap" not in name else f"{name} [no sidecars]"
+        print(
+            f"{label:<20} {median['import_ms']:7.0f}ms {median['load_ms']:7.0f}ms "
+            f"{median['first_predict_ms']:7.1f}ms {median['total_ms']:7.0f}ms "
+            f"{median['max_rss_mb']:6.0f}MB  {', '.join(runs[-1]['imported']) or '-'}"
+        )
+
+
+if __name__ == "__main__":
+    main()
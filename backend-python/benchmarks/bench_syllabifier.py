@@ -0,0 +1,108 @@
+"""
+Benchmark: local syllabifier vs. the Gemini breakdown prompt on sample lectures.
+
+    python -m benchmarks.bench_syllabifier            # local engine only
+    python -m benchmarks.bench_syllabifier --llm      # also call Gemini (uses quota)
+
+Reports latency per lecture (cold and warm word cache) and, with --llm, the
+Gemini latency and the share of words where both engines agree.
+"""
+
+import argparse
+import asyncio
+import re
+import statistics
+import time
+
+from dotenv import load_dotenv
+
+from app.services import syllabifier
+
+SAMPLE_LECTURES = {
+    "biology": (
+        "Photosynthesis is the process by which green plants use sunlight to make food. "
+        "Chlorophyll in the leaves absorbs light energy. The plant takes in carbon dioxide "
+        "from the air and water from the soil. Using the energy from light, it turns these "
+        "into glucose and releases oxygen. This happens mainly in the chloroplasts, small "
+        "structures inside plant cells. Without photosynthesis there would be no oxygen for "
+        "animals to breathe and no food at the bottom of most food chains."
+    ),
+    "history": (
+        "The industrial revolution began in Britain in the late eighteenth century. "
+        "Factories replaced small workshops and machines replaced hand tools. Steam engines "
+        "powered textile mills, and railways connected cities that had been days apart. "
+        "Many families moved from the countryside to crowded towns looking for work. "
+        "Working conditions were often dangerous, and children worked long hours. "
+        "Over time, new laws limited working hours and improved safety."
+    ),
+    "maths": (
+        "A fraction represents part of a whole. The number on top is the numerator and the "
+        "number underneath is the denominator. To add fractions with different denominators "
+        "we first find a common denominator. Equivalent fractions have the same value even "
+        "though they are written differently. Probability uses fractions to describe how "
+        "likely an event is, from impossible to certain."
+    ),
+}
+
+
+def _words(text: str):
+    return re.findall(r"[A-Za-z][A-Za-z'-]*", text.lower())
+
+
+def bench_local(text: str, repeats: int = 50) -> dict:
+    syllabifier._syllabify_lower.cache_clear()
+    start = time.perf_counter()
+    syllabifier.syllabify_text(text)
+    cold_ms = (time.perf_counter() - start) * 1000
+
+    warm = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        syllabifier.syllabify_text(text)
+        warm.append((time.perf_counter() - start) * 1000)
+    return {"cold_ms": cold_ms, "warm_ms": statistics.median(warm)}
+
+
+async def bench_llm(text: str) -> tuple:
+    from app.services.gemini_client import close_http_client, generate_with_gemini
+    from app.services.lecture_processing import breakdown_prompt
+
+    start = time.perf_counter()
+    try:
+        output = await generate_with_gemini(*breakdown_prompt(text), use_cache=False)
+    finally:
+        await close_http_client()
+    return (time.perf_counter() - start) * 1000, output
+
+
+def agreement(local: str, llm: str) -> float:
+    a, b = _words(local), _words(llm)
+    if not a or len(a) != len(b):
+        # Fall back to a set comparison when the LLM rewrote the text
+        return len(set(a) & set(b)) / max(len(set(a)), 1)
+    return sum(x == y for x, y in zip(a, b)) / len(a)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--llm", action="store_true", help="also benchmark the Gemini prompt")
+    args = parser.parse_args()
+    load_dotenv()
+
+    print(f"{'lecture':<10} {'words':>6} {'local cold':>11} {'local warm':>11} {'llm':>10} {'agree':>7}")
+    for name, text in SAMPLE_LECTURES.items():
+        local = bench_local(text)
+        llm_ms, agree = "-", "-"
+        if args.llm:
+            ms, output = asyncio.run(bench_llm(text))
+            llm_ms = f"{ms:8.0f}ms"
+            agree = f"{agreement(syllabifier.syllabify_text(text), output):6.0%}"
+        print(
+            f"{name:<10} {len(_words(text)):>6} {local['cold_ms']:9.2f}ms "
+            f"{local['warm_ms']:9.2f}ms {llm_ms:>10} {agree:>7}"
+        )
+    print(f"word cache: {syllabifier.cache_info()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+"""
+Real-time factor (RTF) of the transcription backends.
+
+    python -m benchmarks.bench_transcription_rtf --audio lecture.mp3 clip.wav
+    python -m benchmarks.bench_transcription_rtf --backends local --concurrency 1 2 4
+
+RTF = processing seconds / audio seconds; below 1.0 is faster than real time.
+For each backend and concurrency level every file is transcribed (concurrently
+at that level, through the backend's own pool) and the report lists per-file
+RTF plus aggregate throughput in audio seconds per wall-clock second.
+
+Without --audio, tone-plus-noise WAV files are generated. These have no
+speech, so with the VAD filter the local engine skips most of them; use real
+recordings for representative numbers. Set WHISPER_MODEL /
+WHISPER_COMPUTE_TYPE / WHISPER_WORKERS / WHISPER_CPU_THREADS to compare local
+configurations, and ASSEMBLYAI_API_BASE to run the remote backend against
+benchmarks/mock_assemblyai.py.
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import os
+import random
+import statistics
+import struct
+import tempfile
+import time
+import wave
+from typing import List
+
+from app.services.transcription_backends import get_backend, probe_duration, shutdown_backends
+
+SAMPLE_RATE = 16_000
+
+
+def make_wav(seconds: float, path: str, seed: int = 0) -> str:
+    """Write a mono 16 kHz WAV of a wandering tone with noise."""
+    rng = random.Random(seed)
+    frames = bytearray()
+    for i in range(int(seconds * SAMPLE_RATE)):
+        t = i / SAMPLE_RATE
+        sample = 0.3 * math.sin(2 * math.pi * (220 + 80 * math.sin(t)) * t) + 0.05 * rng.uniform(-1, 1)
+        frames += struct.pack("<h", int(sample * 32767))
+    with wave.open(path, "wb") as w:
+        w.setnchannels(1)
+        w.setsampwidth(2)
+        w.setframerate(SAMPLE_RATE)
+        w.writeframes(bytes(frames))
+    return path
+
+
+async def run_level(backend_name: str, files: List[str], concurrency: int) -> dict:
+    backend = get_backend(backend_name)
+    slots = asyncio.Semaphore(concurrency)
+    rows = []
+
+    async def one(path: str) -> None:
+        async with slots:
+            result = await backend.transcribe_file(path)
+        duration = result.duration_seconds or probe_duration(path)
+        rows.append({
+            "file": os.path.basename(path),
+            "audioSeconds": round(duration, 2),
+            "processingSeconds": round(result.processing_seconds, 3),
+            "rtf": round(result.processing_seconds / duration, 3) if duration else None,
+            "words": len(result.text.split()),
+        })
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(path) for path in files))
+    wall = time.perf_counter() - start
+    audio = sum(r["audioSeconds"] for r in rows)
+    rtfs = [r["rtf"] for r in rows if r["rtf"] is not None]
+    return {
+        "backend": backend_name,
+        "concurrency": concurrency,
+        "wallSeconds": round(wall, 3),
+        "audioSeconds": round(audio, 2),
+        "throughput": round(audio / wall, 2) if wall else None,
+        "rtfMean": round(statistics.mean(rtfs), 3) if rtfs else None,
+        "rtfMax": round(max(rtfs), 3) if rtfs else None,
+        "files": rows,
+    }
+
+
+async def main_async(args, files: List[str]) -> List[dict]:
+    results = []
+    for name in args.backends:
+        backend = get_backend(name)
+        if not backend.available():
+            print(f"⚠️ Skipping {name}: backend not available")
+            continue
+        # Warm-up: the first local call loads the model in each pool process
+        await backend.transcribe_file(files[0])
+        for level in args.concurrency:
+            report = await run_level(name, files, level)
+            print(
+                f"{name:<10} c={level:<2} wall={report['wallSeconds']:>7.2f}s "
+                f"audio={report['audioSeconds']:>7.1f}s throughput={report['throughput']}x "
+                f"RTF mean={report['rtfMean']} max={report['rtfMax']}"
+            )
+            results.append(report)
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--audio", nargs="*", default=[], help="audio files (default: generated WAVs)")
+    parser.add_argument("--durations", nargs="*", type=float, default=[15, 60, 180],
+                        help="lengths of generated WAVs in seconds")
+    parser.add_argument("--backends", nargs="*", default=["local", "assemblyai"])
+    parser.add_argument("--concurrency", nargs="*", type=int, default=[1, 2])
+    parser.add_argument("--out", help="write the report as JSON")
+    args = parser.parse_args()
+
+    tmpdir = None
+    files = list(args.audio)
+    if not files:
+        tmpdir = tempfile.TemporaryDirectory(prefix="bench-rtf-")
+        files = [make_wav(d, os.path.join(tmpdir.name, f"tone-{int(d)}s.wav"), seed=i)
+                 for i, d in enumerate(args.durations)]
+    try:
+        results = asyncio.run(main_async(args, files))
+    finally:
+        shutdown_backends()
+        if tmpdir is not None:
+            tmpdir.cleanup()
+
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump({"env": {k: os.getenv(k) for k in (
+                "WHISPER_MODEL", "WHISPER_COMPUTE_TYPE", "WHISPER_WORKERS", "WHISPER_CPU_THREADS"
+            )}, "results": results}, f, indent=2)
+        print(f"Report written to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
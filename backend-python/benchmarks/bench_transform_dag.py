@@ -0,0 +1,93 @@
+"""
+Wall-clock time of the four /api/content/transform outputs: sequential vs the
+budget-driven task graph, under different key counts and quota states.
+
+    python -m benchmarks.bench_transform_dag [--latency 0.5] [--rpm 15]
+
+No network: each "Gemini call" acquires a slot from a real KeyScheduler and
+then sleeps for --latency seconds (±20%). "drained" scenarios start with the
+request buckets nearly empty, which is when the graph should fall back to
+running one output at a time.
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import time
+
+from app.services.content_transform import TRANSFORM_OUTPUTS
+from app.services.rate_limiter import KeyScheduler
+from app.services.task_graph import Node, run_graph
+
+
+def make_call(scheduler: KeyScheduler, latency: float, rng: random.Random):
+    async def call(name: str) -> str:
+        await scheduler.acquire(tokens=2_000)
+        await asyncio.sleep(latency * rng.uniform(0.8, 1.2))
+        return name
+    return call
+
+
+def make_scheduler(keys: int, rpm: float, drained: bool) -> KeyScheduler:
+    scheduler = KeyScheduler([f"key-{i}" for i in range(keys)], rpm=rpm)
+    if drained:
+        # Leave roughly one request of budget across all keys
+        for _ in range(int(rpm) * keys - 1):
+            scheduler.try_acquire()
+    return scheduler
+
+
+async def sequential(call) -> float:
+    start = time.perf_counter()
+    for name in TRANSFORM_OUTPUTS:
+        await call(name)
+    return time.perf_counter() - start
+
+
+async def graph(call, scheduler: KeyScheduler) -> dict:
+    nodes = [Node(name, lambda deps, name=name: call(name)) for name in TRANSFORM_OUTPUTS]
+    result = await run_graph(nodes, budget=scheduler.available_requests)
+    return {"seconds": result.elapsed, "peakConcurrency": result.peak_concurrency}
+
+
+async def main_async(args) -> list:
+    rows = []
+    for keys in args.keys:
+        for drained in (False, True):
+            rng = random.Random(0)
+            seq_sched = make_scheduler(keys, args.rpm, drained)
+            seq = await sequential(make_call(seq_sched, args.latency, rng))
+            dag_sched = make_scheduler(keys, args.rpm, drained)
+            dag = await graph(make_call(dag_sched, args.latency, rng), dag_sched)
+            row = {
+                "keys": keys,
+                "quota": "drained" if drained else "fresh",
+                "sequentialSeconds": round(seq, 2),
+                "graphSeconds": round(dag["seconds"], 2),
+                "peakConcurrency": dag["peakConcurrency"],
+                "speedup": round(seq / dag["seconds"], 2),
+            }
+            print(
+                f"{keys} key(s), {row['quota']:<7} sequential {seq:6.2f}s  graph {dag['seconds']:6.2f}s "
+                f"(peak {dag['peakConcurrency']}, {row['speedup']}x)"
+            )
+            rows.append(row)
+    return rows
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--latency", type=float, default=0.5, help="simulated seconds per Gemini call")
+    parser.add_argument("--rpm", type=float, default=15)
+    parser.add_argument("--keys", nargs="*", type=int, default=[1, 2, 4])
+    parser.add_argument("--out", help="write the report as JSON")
+    args = parser.parse_args()
+    rows = asyncio.run(main_async(args))
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(rows, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+"""
+Check silence-aware splitting and overlap merging without a transcription backend.
+
+    python -m benchmarks.check_chunked_transcription [--minutes 30] [--chunk 120]
+
+Builds a synthetic recording of "words" (tone bursts) separated by short gaps
+and longer pauses, splits it with app.services.audio_chunking, then fakes each
+chunk's transcript from the ground-truth words audible in that chunk file
+(timestamps relative to the chunk, with a little jitter). The merged
+transcript must reproduce the ground truth: no word lost or duplicated at the
+overlaps, timestamps back in recording time, and every split point inside a
+pause.
+
+The recording is also written to a WAV file and split with split_audio(),
+which streams it from disk: its split points and chunk files must match the
+in-memory path, and its peak allocation must stay well under the PCM size.
+"""
+
+import argparse
+import random
+import sys
+import os
+import tempfile
+import time
+import tracemalloc
+import wave
+
+import numpy as np
+
+from app.services import audio_chunking
+from app.services.audio_chunking import SAMPLE_RATE
+
+
+def make_recording(minutes: float, seed: int = 0):
+    """Return (int16 samples, ground-truth words, pauses as (start, end))."""
+    rng = random.Random(seed)
+    total = int(minutes * 60 * SAMPLE_RATE)
+    samples = (np.random.default_rng(seed).standard_normal(total) * 30).astype(np.int16)
+    words, pauses = [], []
+    t = 0.5
+    while t < minutes * 60 - 1:
+        length = rng.uniform(0.15, 0.6)
+        a, b = int(t * SAMPLE_RATE), int((t + length) * SAMPLE_RATE)
+        tone = np.sin(2 * np.pi * rng.uniform(150, 400) * np.arange(b - a) / SAMPLE_RATE)
+        samples[a:b] = (tone * 8000).astype(np.int16)
+        words.append({"word": f"w{len(words)}", "start": t, "end": t + length})
+        gap = rng.uniform(0.6, 2.0) if rng.random() < 0.08 else rng.uniform(0.05, 0.2)
+        if gap >= 0.6:
+            pauses.append((t + length, t + length + gap))
+        t += length + gap
+    return samples, words, pauses
+
+
+def fake_transcript(chunk, words, rng) -> dict:
+    audible = [w for w in words if w["end"] > chunk.start and w["start"] < chunk.end]
+    # Words cut by the chunk edge are usually dropped or misheard by a real engine
+    audible = [w for w in audible if w["start"] >= chunk.start and w["end"] <= chunk.end]
+    return {
+        "text": " ".join(w["word"] for w in audible),
+        "confidence": 0.9,
+        "words": [
+            {
+                "word": w["word"],
+                "start": w["start"] - chunk.start + rng.uniform(-0.03, 0.03),
+                "end": w["end"] - chunk.start + rng.uniform(-0.03, 0.03),
+                "confidence": 0.9,
+            }
+            for w in audible
+        ],
+    }
+
+
+def check_streaming(samples: np.ndarray, chunks, directory: str, chunk_seconds: float) -> list:
+    """split_audio() on a WAV of the recording against the in-memory chunks written to directory."""
+    source = os.path.join(directory, "recording.wav")
+    with wave.open(source, "wb") as w:
+        w.setnchannels(1)
+        w.setsampwidth(2)
+        w.setframerate(SAMPLE_RATE)
+        w.writeframes(samples.tobytes())
+    streamed_dir = os.path.join(directory, "streamed")
+    os.mkdir(streamed_dir)
+
+    tracemalloc.start()
+    streamed, _ = audio_chunking.split_audio(source, streamed_dir, chunk_seconds)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    print(f"split_audio peak allocation {peak / 2**20:.1f} MB for {samples.nbytes / 2**20:.1f} MB of PCM")
+
+    failures = []
+    if [(c.start, c.end) for c in streamed] != [(c.start, c.end) for c in chunks]:
+        failures.append("split_audio chose different chunks from the in-memory path")
+    else:
+        for memory, stream in zip(chunks, streamed):
+            with open(memory.path, "rb") as a, open(stream.path, "rb") as b:
+                if a.read() != b.read():
+                    failures.append(f"streamed chunk {stream.index} differs from the in-memory one")
+    if peak > samples.nbytes / 4:
+        failures.append(f"split_audio peaked at {peak / 2**20:.1f} MB")
+    return failures
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--minutes", type=float, default=30)
+    parser.add_argument("--chunk", type=float, default=120, help="target chunk length in seconds")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    samples, words, pauses = make_recording(args.minutes, args.seed)
+    duration = len(samples) / SAMPLE_RATE
+
+    start = time.perf_counter()
+    splits = audio_chunking.find_split_points(samples, chunk_seconds=args.chunk)
+    split_ms = (time.perf_counter() - start) * 1000
+    chunks = audio_chunking.plan_chunks(duration, splits)
+    failures = []
+    with tempfile.TemporaryDirectory() as directory:
+        audio_chunking.write_chunks(samples, chunks, directory)
+        rng = random.Random(args.seed)
+        merged = audio_chunking.merge_transcripts(chunks, [fake_transcript(c, words, rng) for c in chunks])
+        failures += check_streaming(samples, chunks, directory, args.chunk)
+
+    in_pause = sum(any(a <= s <= b for a, b in pauses) for s in splits)
+    if in_pause < len(splits):
+        failures.append(f"{len(splits) - in_pause}/{len(splits)} split points are not in a pause")
+    expected = [w["word"] for w in words]
+    got = [w["word"] for w in merged["words"]]
+    if got != expected:
+        missing = sorted(set(expected) - set(got), key=expected.index)
+        dupes = len(got) - len(set(got))
+        failures.append(f"merged words differ: {len(missing)} missing {missing[:5]}, {dupes} duplicated")
+    drift = max((abs(m["start"] - w["start"]) for m, w in zip(merged["words"], words)), default=0)
+    if drift > 0.05:
+        failures.append(f"timestamps off by up to {drift:.3f}s")
+
+    print(
+        f"{duration / 60:.1f} min, {len(words)} words, {len(chunks)} chunks "
+        f"(split search {split_ms:.0f} ms), splits: {', '.join(f'{s:.1f}' for s in splits)}"
+    )
+    for failure in failures:
+        print(f"❌ {failure}")
+    if not failures:
+        print("✅ Merged transcript matches the ground truth")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
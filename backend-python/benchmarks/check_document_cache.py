@@ -0,0 +1,196 @@
+"""
+Correctness check for the lecture DocumentCache, driven by a fake clock.
+
+    python -m benchmarks.check_document_cache
+
+No network or credentials: repositories and the app run on MemoryStore.
+Checks that
+  - a read still in flight when its document is written is not cached,
+  - a write clears the collection's query pointers ("latest lecture"),
+  - the byte bound holds under churn, with oversized documents not cached,
+  - entries expire after the TTL,
+  - GET /api/lectures/{id} answers 304 for a matching If-None-Match, and
+    200 with a new ETag once the lecture changes.
+Exits non-zero on failure.
+"""
+
+import asyncio
+import random
+import sys
+
+import httpx
+
+from app.services.document_cache import DocumentCache
+from app.services.document_store import MemoryStore, set_store
+from app.services.rate_limiter import FakeClock
+from app.services.repositories import Repository, lectures
+
+USER_ID = "cache-check-user"
+
+
+class GatedStore(MemoryStore):
+    """MemoryStore whose reads, while `gate` is set, hold their result until it opens."""
+
+    def __init__(self):
+        super().__init__(latency_ms=0)
+        self.gate = None
+
+    async def get(self, collection, doc_id):
+        data = await super().get(collection, doc_id)
+        gate = self.gate
+        if gate is not None:
+            await gate.wait()
+        return data
+
+
+async def check_stale_read_dropped(store: GatedStore) -> None:
+    clock = FakeClock(100.0)
+    cache = DocumentCache(clock=clock)
+    repo = Repository("cache_check_race", cache=cache)
+    await repo.put("doc", {"version": 1})
+
+    gate = asyncio.Event()
+    store.gate = gate
+    slow_read = asyncio.create_task(repo.get("doc"))
+    for _ in range(3):
+        await asyncio.sleep(0)  # the read fetches version 1 and parks at the gate
+    store.gate = None
+
+    clock.advance(1)
+    await repo.update("doc", {"version": 2})
+    assert not slow_read.done(), "read finished before the write"
+    gate.set()
+    assert (await slow_read)["version"] == 1
+    assert cache.stale_reads_dropped == 1, cache.stats()
+    assert cache.get("doc") is None, "the in-flight read cached the old version"
+
+    clock.advance(1)
+    assert (await repo.get("doc"))["version"] == 2
+    assert cache.get("doc").doc["version"] == 2
+
+
+async def check_query_pointers_cleared() -> None:
+    clock = FakeClock(100.0)
+    cache = DocumentCache(clock=clock)
+    repo = Repository("cache_check_latest", cache=cache)
+    filters = [("userId", "==", USER_ID)]
+    await repo.put("old", {"userId": USER_ID, "createdAt": 1})
+    clock.advance(1)
+
+    doc, _ = await repo.first_tagged(filters, "createdAt", descending=True)
+    assert doc["id"] == "old"
+    assert cache.stats()["queryEntries"] == 1
+
+    clock.advance(1)
+    await repo.put("new", {"userId": USER_ID, "createdAt": 2})
+    assert cache.stats()["queryEntries"] == 0, "write left a query pointer behind"
+    clock.advance(1)
+    doc, _ = await repo.first_tagged(filters, "createdAt", descending=True)
+    assert doc["id"] == "new", doc
+
+    # Any write to the collection clears pointers, not only writes to the document they point at
+    clock.advance(1)
+    await repo.update("old", {"title": "renamed"})
+    assert cache.stats()["queryEntries"] == 0
+
+
+def check_byte_bound() -> None:
+    clock = FakeClock(100.0)
+    cache = DocumentCache(max_bytes=50_000, clock=clock)
+    rng = random.Random(0)
+    for i in range(500):
+        clock.advance(0.001)
+        doc_id = f"doc-{rng.randrange(120)}"
+        token = cache.begin_read()
+        clock.advance(0.001)
+        cache.store(doc_id, {"id": doc_id, "text": "x" * rng.randint(50, 8_000)}, token)
+        if i % 7 == 0:
+            cache.store_query(f"query-{i % 30}", doc_id, token)
+        if i % 11 == 0:
+            cache.invalidate(f"doc-{rng.randrange(120)}")
+        assert cache.bytes <= cache.max_bytes, (i, cache.bytes)
+        accounted = sum(e.size for e in cache._docs.values()) + 128 * len(cache._queries)
+        assert cache.bytes == accounted, (i, cache.bytes, accounted)
+    assert cache.evictions > 0, "bound was never reached"
+
+    token = cache.begin_read()
+    clock.advance(0.001)
+    entry = cache.store("huge", {"text": "x" * 60_000}, token)
+    assert entry.etag and cache.get("huge") is None, "document over the bound was cached"
+
+
+def check_ttl() -> None:
+    clock = FakeClock(100.0)
+    cache = DocumentCache(ttl_seconds=5, clock=clock)
+    token = cache.begin_read()
+    clock.advance(0.001)
+    cache.store("doc", {"id": "doc"}, token)
+    cache.store_query("latest", "doc", token)
+    clock.advance(4.9)
+    assert cache.get("doc") is not None and cache.get_query("latest") == ("doc",)
+    clock.advance(0.2)
+    assert cache.get("doc") is None and cache.get_query("latest") is None
+    assert cache.bytes == 0, cache.bytes
+
+
+async def check_not_modified() -> None:
+    from main import app
+
+    clock = FakeClock(100.0)
+    lectures.cache = DocumentCache(clock=clock)
+    created = await lectures.create({"userId": USER_ID, "title": "Cells", "summary": "v1", "createdAt": 1})
+    clock.advance(1)
+    url = f"/api/lectures/{created['id']}"
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://check") as client:
+        first = await client.get(url)
+        assert first.status_code == 200, first.status_code
+        etag = first.headers["etag"]
+
+        cached = await client.get(url, headers={"If-None-Match": etag})
+        assert cached.status_code == 304 and not cached.content, cached.status_code
+        assert cached.headers["etag"] == etag
+        weak = await client.get(url, headers={"If-None-Match": f'"other", W/{etag}'})
+        assert weak.status_code == 304, weak.status_code
+
+        preview = await client.get(f"{url}?artifacts=preview", headers={"If-None-Match": etag})
+        assert preview.status_code == 200, "preview must not share the full response's ETag"
+
+        await lectures.update(created["id"], {"summary": "v2"})
+        clock.advance(1)
+        changed = await client.get(url, headers={"If-None-Match": etag})
+        assert changed.status_code == 200, changed.status_code
+        assert changed.headers["etag"] != etag and changed.json()["summary"] == "v2"
+
+
+async def main_async() -> int:
+    store = GatedStore()
+    set_store(store)
+    checks = [
+        ("in-flight read racing a write is dropped", lambda: check_stale_read_dropped(store)),
+        ("writes clear query pointers", check_query_pointers_cleared),
+        ("byte bound holds", check_byte_bound),
+        ("entries expire after the TTL", check_ttl),
+        ("304 for a matching ETag", check_not_modified),
+    ]
+    failures = 0
+    for name, check in checks:
+        try:
+            result = check()
+            if asyncio.iscoroutine(result):
+                await result
+            print(f"✅ {name}")
+        except AssertionError as e:
+            failures += 1
+            print(f"❌ {name}: {e}")
+    return failures
+
+
+def main():
+    failures = asyncio.run(main_async())
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+Parity check: compiled NumPy forest vs. sklearn predict_proba.
+
+    python -m benchmarks.check_engine_parity [--n 5000] [--seed 1234]
+
+Scores a held-out synthetic set (a seed not used by the other benchmarks)
+with both engines, plus rows placed exactly on split thresholds, and exits
+non-zero if any probability differs by more than 1e-9. Also reports
+single-row and batched latency for each engine.
+"""
+
+import argparse
+import sys
+import time
+
+import numpy as np
+
+from app.services import severity_model
+from benchmarks.synthetic import make_submissions
+
+ATOL = 1e-9
+
+
+def _threshold_rows(compiled, X: np.ndarray, n: int, seed: int) -> np.ndarray:
+    """Copies of real rows with one feature set exactly to a split threshold (tie cases)."""
+    rng = np.random.default_rng(seed)
+    internal = np.flatnonzero(compiled.left != np.arange(compiled.n_nodes))
+    nodes = rng.choice(internal, size=n)
+    rows = X[rng.integers(0, len(X), size=n)].copy()
+    values = compiled.threshold[nodes]
+    if compiled.scaler is not None:
+        # Thresholds live in scaled space; map them back to raw feature values
+        feats = compiled.feature[nodes]
+        values = values * compiled.scaler.scale[feats] + compiled.scaler.mean[feats]
+    rows[np.arange(n), compiled.feature[nodes]] = values
+    return rows
+
+
+def _per_row_ms(engine: str, X: np.ndarray, repeats: int = 200) -> float:
+    rows = [X[i:i + 1] for i in range(min(repeats, len(X)))]
+    severity_model._predict_proba(rows[0], engine=engine)
+    start = time.perf_counter()
+    for row in rows:
+        severity_model._predict_proba(row, engine=engine)
+    return (time.perf_counter() - start) * 1000 / len(rows)
+
+
+def _batch_ms(engine: str, X: np.ndarray, repeats: int = 5) -> float:
+    """Best of `repeats` warm calls on the whole batch."""
+    severity_model._predict_proba(X, engine=engine)
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        severity_model._predict_proba(X, engine=engine)
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--n", type=int, default=5000, help="number of held-out synthetic submissions")
+    parser.add_argument("--seed", type=int, default=1234)
+    args = parser.parse_args()
+
+    pkg = severity_model.load_model()
+    try:
+        compiled = severity_model.compile_model(pkg)
+    except ValueError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+    print(f"Compiled {type(pkg['model']).__name__}: {compiled.n_trees} trees, "
+          f"{compiled.n_nodes} nodes, depth {compiled.max_depth}")
+
+    X = severity_model.build_feature_matrix(make_submissions(args.n, args.seed))
+    X = np.vstack([X, _threshold_rows(compiled, X, min(args.n, 1000), args.seed)])
+
+    expected = severity_model._predict_proba(X, engine="sklearn")
+    actual = severity_model._predict_proba(X, engine="compiled")
+    max_diff = float(np.max(np.abs(actual - expected)))
+    ok = max_diff <= ATOL
+    print(f"{'✅' if ok else '❌'} {len(X)} rows: max |diff| {max_diff:.2e} (tolerance {ATOL:.0e})")
+
+    for engine in ("sklearn", "compiled"):
+        print(f"{engine:<9} single row {_per_row_ms(engine, X):8.3f} ms | "
+              f"{len(X)} rows {_batch_ms(engine, X):8.1f} ms")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
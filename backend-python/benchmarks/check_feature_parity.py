@@ -0,0 +1,69 @@
+"""
+Parity check: NumPy feature builder vs. the reference DataFrame path.
+
+    python -m benchmarks.check_feature_parity [--n 2000] [--seed 0]
+
+Builds features for synthetic submissions both ways and compares every
+column, then compares predicted probabilities. Exits non-zero on mismatch.
+"""
+
+import argparse
+import sys
+import time
+
+import numpy as np
+
+from app.services import severity_model
+from benchmarks.synthetic import make_submissions
+
+ATOL = 1e-12
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--n", type=int, default=2000, help="number of synthetic submissions")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    pkg = severity_model.load_model()
+    submissions = make_submissions(args.n, args.seed)
+
+    start = time.perf_counter()
+    reference = np.vstack([
+        severity_model.build_feature_vector(
+            sub["task_results"], sub["age"], sub["gender"], sub["native_english"]
+        ).to_numpy(dtype=np.float64)
+        for sub in submissions
+    ])
+    df_ms = (time.perf_counter() - start) * 1000
+
+    start = time.perf_counter()
+    fast = np.vstack([severity_model.build_feature_matrix([sub]) for sub in submissions])
+    np_ms = (time.perf_counter() - start) * 1000
+
+    batched = severity_model.build_feature_matrix(submissions)
+
+    failed = False
+    for label, candidate in (("per-row", fast), ("batched", batched)):
+        diff = np.abs(candidate - reference)
+        worst = np.unravel_index(np.argmax(diff), diff.shape)
+        max_diff = float(diff[worst])
+        if max_diff > ATOL:
+            failed = True
+            column = pkg["feature_names"][worst[1]]
+            print(f"❌ {label}: max |diff| {max_diff:.3e} at row {worst[0]}, column {column}")
+        else:
+            print(f"✅ {label}: {candidate.shape} features match (max |diff| {max_diff:.1e})")
+
+    prob_diff = float(np.max(np.abs(
+        severity_model._predict_proba(batched) - severity_model._predict_proba(reference)
+    )))
+    print(f"probabilities: max |diff| {prob_diff:.1e}")
+    failed = failed or prob_diff > ATOL
+
+    print(f"DataFrame path: {df_ms / args.n:.3f} ms/row | NumPy path: {np_ms / args.n:.3f} ms/row")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
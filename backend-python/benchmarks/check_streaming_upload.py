@@ -0,0 +1,131 @@
+"""
+Check that /api/transcribe-audio streams uploads with constant memory.
+
+    python -m benchmarks.check_streaming_upload [--sizes 8,64,192] [--limit-mb 200]
+
+Starts benchmarks/mock_assemblyai.py and benchmarks/load_app.py (pointed at
+the mock) as subprocesses, uploads files of increasing size, and after each
+upload reads the server's peak RSS from /health/worker and what the mock
+received from /stats. A file above --limit-mb must be rejected with 413.
+Exits non-zero if the RSS grows with file size or an upload arrives
+incomplete or unchunked.
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import httpx
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+MB = 1024 * 1024
+# Peak RSS may grow by at most this much between the smallest and largest upload
+RSS_TOLERANCE_MB = 48
+
+
+def _start(args: list, env: dict) -> subprocess.Popen:
+    return subprocess.Popen(
+        [sys.executable, "-m", *args], cwd=BACKEND_DIR, env={**os.environ, **env},
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+
+
+def _wait(url: str, timeout: float = 60.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            httpx.get(url, timeout=2.0)
+            return
+        except httpx.TransportError:
+            time.sleep(0.25)
+    raise RuntimeError(f"{url} did not come up")
+
+
+def _make_file(directory: str, size_mb: int) -> str:
+    path = os.path.join(directory, f"audio-{size_mb}mb.wav")
+    block = os.urandom(MB)
+    with open(path, "wb") as f:
+        for _ in range(size_mb):
+            f.write(block)
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", default="8,64,192", help="upload sizes in MB, all under the limit")
+    parser.add_argument("--limit-mb", type=int, default=200)
+    parser.add_argument("--mock-port", type=int, default=8901)
+    parser.add_argument("--app-port", type=int, default=8902)
+    args = parser.parse_args()
+
+    sizes = [int(s) for s in args.sizes.split(",")]
+    mock_url = f"http://127.0.0.1:{args.mock_port}"
+    app_url = f"http://127.0.0.1:{args.app_port}"
+
+    mock = _start(["benchmarks.mock_assemblyai", "--port", str(args.mock_port)], {"MOCK_POLLS_UNTIL_DONE": "1"})
+    server = _start(
+        ["uvicorn", "benchmarks.load_app:app", "--port", str(args.app_port), "--log-level", "warning"],
+        {
+            "ASSEMBLYAI_API_BASE": mock_url,
+            "ASSEMBLYAI_API_KEY": "mock",
+            "ASSEMBLYAI_POLL_INITIAL": "0.1",
+            "MAX_AUDIO_UPLOAD_BYTES": str(args.limit_mb * MB),
+        },
+    )
+    failed = False
+    try:
+        _wait(f"{mock_url}/stats")
+        _wait(f"{app_url}/health/worker")
+        baseline = httpx.get(f"{app_url}/health/worker").json()["maxRssMb"]
+        print(f"server baseline peak RSS: {baseline:.0f} MB")
+
+        rss = []
+        with tempfile.TemporaryDirectory() as tmp:
+            for size_mb in sizes + [args.limit_mb + 16]:
+                path = _make_file(tmp, size_mb)
+                with open(path, "rb") as f:
+                    response = httpx.post(
+                        f"{app_url}/api/transcribe-audio",
+                        files={"file": (os.path.basename(path), f, "audio/wav")},
+                        timeout=300.0,
+                    )
+                os.unlink(path)
+
+                if size_mb > args.limit_mb:
+                    ok = response.status_code == 413
+                    failed |= not ok
+                    print(f"{'✅' if ok else '❌'} {size_mb:>4} MB over the limit → {response.status_code}")
+                    continue
+
+                peak = httpx.get(f"{app_url}/health/worker").json()["maxRssMb"]
+                received = httpx.get(f"{mock_url}/stats").json()["uploads"][-1]
+                ok = (
+                    response.status_code == 200
+                    and received["bytes"] == size_mb * MB
+                    and received["chunks"] > 1
+                )
+                failed |= not ok
+                rss.append(peak)
+                print(
+                    f"{'✅' if ok else '❌'} {size_mb:>4} MB → {response.status_code} | peak RSS {peak:.0f} MB | "
+                    f"mock got {received['bytes'] / MB:.0f} MB in {received['chunks']} chunks "
+                    f"(max {received['max_chunk'] / 1024:.0f} KiB)"
+                )
+
+        growth = rss[-1] - rss[0] if rss else 0.0
+        constant = growth <= RSS_TOLERANCE_MB
+        failed |= not constant
+        print(f"{'✅' if constant else '❌'} peak RSS growth from {sizes[0]} MB to {sizes[-1]} MB: {growth:.0f} MB")
+    finally:
+        for proc in (server, mock):
+            proc.terminate()
+            proc.wait(timeout=10)
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""
+Regression check: local syllabifier output for words it has got wrong before,
+plus the few hundred common lecture words in benchmarks/lecture_words.txt.
+
+    python -m benchmarks.check_syllabifier
+
+Covers inflections (-s, -es, -ed, -ing), silent final e, suffixes such as
+-tion (also before other suffixes), "ng", doubled consonants, prefix
+look-alikes and compounds. The local engine should pass all of it before
+SYLLABIFIER=local becomes the default. Exits non-zero on any mismatch.
+"""
+
+import os
+import sys
+
+from app.services import syllabifier
+
+EXPECTED = {
+    # Plural / third-person -s and -es
+    "fractions": "frac-tions", "machines": "ma-chines", "leaves": "leaves",
+    "engines": "en-gines", "workshops": "work-shops", "structures": "struc-tures",
+    "changes": "chan-ges", "places": "pla-ces", "boxes": "box-es", "watches": "watch-es",
+    # -ed and -ing
+    "powered": "pow-ered", "wanted": "want-ed", "stopped": "stopped", "admitted": "ad-mit-ted",
+    "running": "run-ning", "telling": "tell-ing", "making": "mak-ing", "thing": "thing",
+    # Consonant clusters, "ng" and consonant + le
+    "impossible": "im-pos-si-ble", "unable": "un-a-ble", "little": "lit-tle",
+    "children": "chil-dren", "sandwich": "sand-wich", "kingdom": "king-dom",
+    "singer": "sin-ger", "language": "lan-guage", "hydrogen": "hy-dro-gen",
+    # Prefixes and their look-alikes
+    "unite": "u-nite", "universe": "u-ni-verse", "unhappy": "un-hap-py",
+    "reason": "rea-son", "ready": "rea-dy", "react": "re-act",
+    # Vowel + w
+    "power": "pow-er", "flower": "flow-er", "away": "a-way",
+    # Capitalisation is preserved
+    "Fractions": "Frac-tions", "Running": "Run-ning",
+}
+
+WORD_LIST = os.path.join(os.path.dirname(__file__), "lecture_words.txt")
+
+
+def load_word_list(path: str = WORD_LIST) -> dict:
+    """"word syl-la-bles" lines, the same format as SYLLABLE_DICT_PATH."""
+    words = {}
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) == 2 and not line.startswith("#"):
+                words[parts[0]] = parts[1]
+    return words
+
+
+def main():
+    expected_words = {**load_word_list(), **EXPECTED}
+    failures = 0
+    for word, expected in expected_words.items():
+        got = syllabifier.syllabify_word(word)
+        if got != expected:
+            failures += 1
+            print(f"❌ {word}: {got} (expected {expected})")
+    if failures:
+        print(f"❌ {failures} of {len(expected_words)} words differ")
+        sys.exit(1)
+    print(f"✅ {len(expected_words)} words syllabified as expected")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""
+End-to-end check of asynchronous transcription against the local fake AssemblyAI.
+
+    python -m benchmarks.check_transcription_jobs [--transcribe-seconds 4]
+
+Runs three scenarios, each with fresh benchmarks/mock_assemblyai.py and
+benchmarks/load_app.py processes:
+  polling   no webhook: POST /api/transcriptions, follow the SSE stream
+  webhook   TRANSCRIPTION_WEBHOOK_BASE_URL set: the mock calls back on completion
+  sync      the original blocking POST /api/transcribe-audio contract
+For each it reports time to completion beyond the mock's transcription time
+("lag") and how many status checks hit the API. Exits non-zero on failure.
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import httpx
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+AUDIO = b"RIFF" + os.urandom(256 * 1024)
+
+
+def _start(args: list, env: dict) -> subprocess.Popen:
+    return subprocess.Popen(
+        [sys.executable, "-m", *args], cwd=BACKEND_DIR, env={**os.environ, **env},
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+
+
+def _wait(url: str, timeout: float = 60.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            httpx.get(url, timeout=2.0)
+            return
+        except httpx.TransportError:
+            time.sleep(0.25)
+    raise RuntimeError(f"{url} did not come up")
+
+
+def _follow_events(url: str) -> list:
+    """Collect (event, data) pairs from an SSE stream until it ends."""
+    events, event = [], None
+    with httpx.stream("GET", url, timeout=120.0) as response:
+        response.raise_for_status()
+        for line in response.iter_lines():
+            if line.startswith("event: "):
+                event = line[len("event: "):]
+            elif line.startswith("data: ") and event:
+                events.append((event, json.loads(line[len("data: "):])))
+                event = None
+    return events
+
+
+def run_scenario(name: str, args, webhook: bool) -> bool:
+    mock_url = f"http://127.0.0.1:{args.mock_port}"
+    app_url = f"http://127.0.0.1:{args.app_port}"
+    env = {
+        "ASSEMBLYAI_API_BASE": mock_url,
+        "ASSEMBLYAI_API_KEY": "mock",
+        "JOB_QUEUE_BACKEND": "memory",
+    }
+    if webhook:
+        env["TRANSCRIPTION_WEBHOOK_BASE_URL"] = app_url
+        env["ASSEMBLYAI_WEBHOOK_SECRET"] = "local-check"
+
+    mock = _start(["benchmarks.mock_assemblyai", "--port", str(args.mock_port)],
+                  {"MOCK_TRANSCRIBE_SECONDS": str(args.transcribe_seconds)})
+    server = _start(["uvicorn", "benchmarks.load_app:app", "--port", str(args.app_port),
+                     "--log-level", "warning"], env)
+    try:
+        _wait(f"{mock_url}/stats")
+        _wait(f"{app_url}/health/worker")
+        files = {"file": ("lecture.wav", AUDIO, "audio/wav")}
+        start = time.perf_counter()
+
+        if name == "sync":
+            response = httpx.post(f"{app_url}/api/transcribe-audio", files=files, timeout=120.0)
+            body = response.json()
+            ok = response.status_code == 200 and set(body) == {"transcription", "confidence", "words"}
+            detail = f"→ {response.status_code} {body}"
+        else:
+            response = httpx.post(f"{app_url}/api/transcriptions", files=files, timeout=60.0)
+            accepted = response.json()
+            events = _follow_events(f"{app_url}{accepted['eventsUrl']}")
+            final = events[-1] if events else ("none", {})
+            ok = response.status_code == 202 and final[0] == "completed" and final[1].get("transcription")
+            detail = f"→ {response.status_code}, events: {[e for e, _ in events]}"
+        elapsed = time.perf_counter() - start
+
+        transcript = httpx.get(f"{mock_url}/stats").json()["transcripts"][-1]
+        lag = elapsed - args.transcribe_seconds
+        print(f"{'✅' if ok else '❌'} {name:<8} done in {elapsed:5.2f}s (lag {lag:+.2f}s), "
+              f"{transcript['polls']} status check(s), webhook: {transcript.get('webhook_status', '-')} {detail}")
+        return bool(ok)
+    finally:
+        for proc in (server, mock):
+            proc.terminate()
+            proc.wait(timeout=10)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--transcribe-seconds", type=float, default=4.0)
+    parser.add_argument("--mock-port", type=int, default=8911)
+    parser.add_argument("--app-port", type=int, default=8912)
+    args = parser.parse_args()
+
+    results = [
+        run_scenario("polling", args, webhook=False),
+        run_scenario("webhook", args, webhook=True),
+        run_scenario("sync", args, webhook=False),
+    ]
+    sys.exit(0 if all(results) else 1)
+
+
+if __name__ == "__main__":
+    main()
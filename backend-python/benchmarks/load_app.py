@@ -0,0 +1,41 @@
+"""
+ASGI app for load tests: the real assessment, transcription and worker-health
+routers with Firestore replaced by the in-memory fake, so a load test never
+writes to the production database. Point ASSEMBLYAI_API_BASE at
+benchmarks/mock_assemblyai.py for transcription. Served by the same launcher
+as production:
+
+    gunicorn -c gunicorn.conf.py benchmarks.load_app:app
+"""
+
+from fastapi import FastAPI
+
+from app.routers import assessment, transcription, worker_health
+from app.services.job_queue import get_job_queue
+from app.services.severity_model import load_model
+from app.services.uploads import MAX_AUDIO_UPLOAD_BYTES, ContentLengthLimitMiddleware
+from app.services.document_store import MemoryStore, set_store
+
+set_store(MemoryStore(latency_ms=0, discard_writes=True))
+
+app = FastAPI(title="SimplifiED load-test app")
+app.include_router(assessment.router)
+app.include_router(worker_health.router)
+app.include_router(transcription.router)
+app.add_middleware(ContentLengthLimitMiddleware, limits={"/api/transcribe-audio": MAX_AUDIO_UPLOAD_BYTES})
+
+job_queue = get_job_queue()
+
+
+@app.on_event("startup")
+async def start_job_queue():
+    await job_queue.start()
+
+
+@app.on_event("shutdown")
+async def stop_job_queue():
+    await job_queue.stop()
+
+
+# Loaded at import so preload_app shares it across workers, like main.py
+load_model()
@@ -0,0 +1,176 @@
+"""
+Load test: assessment throughput as the number of gunicorn workers grows.
+
+    python -m benchmarks.load_test                          # spawn 1, 2, 4, ... CPU-count workers
+    python -m benchmarks.load_test --workers 1,2,4 --duration 20 --concurrency 64
+    python -m benchmarks.load_test --url http://localhost:8000   # an already running server
+
+In spawn mode each worker count gets a fresh `gunicorn -c gunicorn.conf.py
+benchmarks.load_app:app` (Firestore faked, so nothing is written). Requests
+are POST /assessment/submit with synthetic bodies; the report shows
+throughput, latency percentiles, how many distinct worker pids answered
+/health/worker, and throughput relative to a single worker.
+"""
+
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import random
+import signal
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import List, Optional
+
+import httpx
+import numpy as np
+
+from benchmarks.synthetic import make_submit_request
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+
+async def _wait_ready(client: httpx.AsyncClient, timeout: float = 60.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if (await client.get("/health/worker")).status_code == 200:
+                return
+        except httpx.TransportError:
+            pass
+        await asyncio.sleep(0.25)
+    raise RuntimeError("Server did not become ready")
+
+
+async def _distinct_workers(client: httpx.AsyncClient, probes: int = 100) -> int:
+    pids = set()
+    responses = await asyncio.gather(*(client.get("/health/worker") for _ in range(probes)))
+    for r in responses:
+        if r.status_code == 200:
+            pids.add(r.json()["pid"])
+    return len(pids)
+
+
+async def run_load(base_url: str, path: str, concurrency: int, duration: float, seed: int) -> dict:
+    rng = random.Random(seed)
+    bodies = [make_submit_request(rng, f"load-{i}") for i in range(256)]
+    latencies: List[float] = []
+    errors = 0
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, timeout=30.0, limits=limits) as client:
+        await _wait_ready(client)
+        # Warm every worker (model pages, imports) before measuring
+        await asyncio.gather(*(client.post(path, json=bodies[i % len(bodies)]) for i in range(concurrency * 2)))
+
+        deadline = time.monotonic() + duration
+
+        async def user(index: int) -> None:
+            nonlocal errors
+            i = index
+            while time.monotonic() < deadline:
+                start = time.perf_counter()
+                try:
+                    response = await client.post(path, json=bodies[i % len(bodies)])
+                    if response.status_code != 200:
+                        errors += 1
+                        continue
+                except httpx.HTTPError:
+                    errors += 1
+                    continue
+                latencies.append((time.perf_counter() - start) * 1000)
+                i += concurrency
+
+        start = time.perf_counter()
+        await asyncio.gather(*(user(i) for i in range(concurrency)))
+        elapsed = time.perf_counter() - start
+        workers_seen = await _distinct_workers(client)
+
+    arr = np.asarray(latencies) if latencies else np.zeros(1)
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "rps": len(latencies) / elapsed,
+        "p50_ms": float(np.percentile(arr, 50)),
+        "p90_ms": float(np.percentile(arr, 90)),
+        "p99_ms": float(np.percentile(arr, 99)),
+        "workers_seen": workers_seen,
+    }
+
+
+def _spawn(workers: int, port: int, app: str) -> subprocess.Popen:
+    env = {
+        **os.environ,
+        "WEB_CONCURRENCY": str(workers),
+        "PORT": str(port),
+        "MAX_REQUESTS": "0",  # no restarts mid-measurement
+    }
+    return subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", app],
+        env=env,
+        cwd=BACKEND_DIR,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+
+
+def _stop(proc: subprocess.Popen) -> None:
+    proc.send_signal(signal.SIGTERM)
+    try:
+        proc.wait(timeout=30)
+    except subprocess.TimeoutExpired:
+        proc.kill()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--url", help="load an already running server instead of spawning gunicorn")
+    parser.add_argument("--workers", help="comma-separated worker counts (default: powers of two up to CPU count)")
+    parser.add_argument("--app", default="benchmarks.load_app:app")
+    parser.add_argument("--path", default="/assessment/submit")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=15.0, help="seconds of load per run")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="write results as JSON")
+    args = parser.parse_args()
+
+    results = {}
+    if args.url:
+        results["external"] = asyncio.run(
+            run_load(args.url, args.path, args.concurrency, args.duration, args.seed)
+        )
+    else:
+        cpus = multiprocessing.cpu_count()
+        counts = (
+            [int(w) for w in args.workers.split(",")]
+            if args.workers
+            else sorted({2 ** i for i in range(cpus.bit_length()) if 2 ** i <= cpus} | {cpus})
+        )
+        for count in counts:
+            proc = _spawn(count, args.port, args.app)
+            try:
+                results[str(count)] = asyncio.run(run_load(
+                    f"http://127.0.0.1:{args.port}", args.path, args.concurrency, args.duration, args.seed
+                ))
+            finally:
+                _stop(proc)
+
+    baseline: Optional[float] = results.get("1", {}).get("rps")
+    print(f"{'workers':>8} {'rps':>9} {'p50':>9} {'p99':>9} {'errors':>7} {'seen':>5} {'scaling':>8}")
+    for name, r in results.items():
+        scaling = f"{r['rps'] / baseline:7.2f}x" if baseline else "-"
+        print(
+            f"{name:>8} {r['rps']:9.1f} {r['p50_ms']:7.1f}ms {r['p99_ms']:7.1f}ms "
+            f"{r['errors']:>7} {r['workers_seen']:>5} {scaling:>8}"
+        )
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"cpus": multiprocessing.cpu_count(), "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
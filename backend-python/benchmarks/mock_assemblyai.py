@@ -0,0 +1,137 @@
+"""
+Local stand-in for the AssemblyAI REST API, for exercising uploads and
+transcription without network access or quota.
+
+    python -m benchmarks.mock_assemblyai --port 8900
+    ASSEMBLYAI_API_BASE=http://127.0.0.1:8900 ASSEMBLYAI_API_KEY=mock uvicorn main:app
+
+/v2/upload consumes the request body as a stream and records how it arrived
+(bytes, chunks, largest chunk). Transcripts complete MOCK_TRANSCRIBE_SECONDS
+after creation, or, if that is 0, after MOCK_POLLS_UNTIL_DONE status checks.
+When a transcript is created with a webhook_url, the mock calls it on
+completion (with the requested auth header), like the real service.
+GET /stats returns uploads and per-transcript status-check counts.
+"""
+
+import argparse
+import asyncio
+import os
+import time
+import uuid
+from typing import Dict, List
+
+import httpx
+from fastapi import FastAPI, HTTPException, Request
+
+POLLS_UNTIL_DONE = int(os.getenv("MOCK_POLLS_UNTIL_DONE", "2"))
+TRANSCRIBE_SECONDS = float(os.getenv("MOCK_TRANSCRIBE_SECONDS", "0"))
+
+app = FastAPI(title="Mock AssemblyAI")
+
+_uploads: Dict[str, dict] = {}
+_transcripts: Dict[str, dict] = {}
+
+
+def _check_auth(request: Request) -> None:
+    if not request.headers.get("authorization"):
+        raise HTTPException(status_code=401, detail="Missing authorization header")
+
+
+@app.post("/v2/upload")
+async def upload(request: Request):
+    _check_auth(request)
+    upload_id = uuid.uuid4().hex
+    stats = {"id": upload_id, "bytes": 0, "chunks": 0, "max_chunk": 0,
+             "chunked": "content-length" not in request.headers}
+    async for chunk in request.stream():
+        stats["bytes"] += len(chunk)
+        stats["chunks"] += 1
+        stats["max_chunk"] = max(stats["max_chunk"], len(chunk))
+    _uploads[upload_id] = stats
+    return {"upload_url": f"{str(request.base_url).rstrip('/')}/files/{upload_id}"}
+
+
+async def _send_webhook(job: dict) -> None:
+    await asyncio.sleep(TRANSCRIBE_SECONDS)
+    headers = {}
+    if job.get("webhook_auth_header_name"):
+        headers[job["webhook_auth_header_name"]] = job["webhook_auth_header_value"]
+    async with httpx.AsyncClient() as client:
+        try:
+            response = await client.post(
+                job["webhook_url"],
+                json={"transcript_id": job["id"], "status": "completed"},
+                headers=headers,
+            )
+            job["webhook_status"] = response.status_code
+        except httpx.HTTPError as e:
+            job["webhook_status"] = str(e)
+    job["webhook_sent_at"] = time.time()
+
+
+@app.post("/v2/transcript")
+async def create_transcript(request: Request):
+    _check_auth(request)
+    body = await request.json()
+    transcript_id = uuid.uuid4().hex
+    job = {
+        "id": transcript_id,
+        "audio_url": body["audio_url"],
+        "webhook_url": body.get("webhook_url"),
+        "webhook_auth_header_name": body.get("webhook_auth_header_name"),
+        "webhook_auth_header_value": body.get("webhook_auth_header_value"),
+        "created_at": time.time(),
+        "polls": 0,
+    }
+    _transcripts[transcript_id] = job
+    if job["webhook_url"] and TRANSCRIBE_SECONDS > 0:
+        asyncio.create_task(_send_webhook(job))
+    return {"id": transcript_id, "status": "queued"}
+
+
+def _is_done(job: dict) -> bool:
+    if TRANSCRIBE_SECONDS > 0:
+        return time.time() - job["created_at"] >= TRANSCRIBE_SECONDS
+    return job["polls"] >= POLLS_UNTIL_DONE
+
+
+@app.get("/v2/transcript/{transcript_id}")
+async def get_transcript(transcript_id: str, request: Request):
+    _check_auth(request)
+    job = _transcripts.get(transcript_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Transcript not found")
+    job["polls"] += 1
+    if not _is_done(job):
+        return {"id": transcript_id, "status": "processing"}
+    upload_id = job["audio_url"].rsplit("/", 1)[-1]
+    size = _uploads.get(upload_id, {}).get("bytes", 0)
+    return {
+        "id": transcript_id,
+        "status": "completed",
+        "text": f"Mock transcript of {size} bytes of audio.",
+        "confidence": 0.99,
+    }
+
+
+@app.get("/stats")
+async def stats() -> Dict[str, List[dict]]:
+    transcripts = [
+        {k: v for k, v in job.items() if k != "webhook_auth_header_value"} for job in _transcripts.values()
+    ]
+    return {"uploads": list(_uploads.values()), "transcripts": transcripts}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mock AssemblyAI server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8900)
+    args = parser.parse_args()
+
+    import uvicorn
+
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+Synthetic assessment submissions shared by the severity-model benchmarks and
+parity checks. Values cover the awkward inputs the feature builder has to
+handle: accuracy encoded as decimal * 1000, missing and duplicated tasks,
+out-of-range task numbers, None/NaN values and zero clicks.
+"""
+
+import math
+import random
+from typing import Any, Dict, List
+
+GENDERS = ("male", "female", "prefer_not_to_say", "Male")
+
+
+def _rate(rng: random.Random) -> Any:
+    roll = rng.random()
+    if roll < 0.05:
+        return None
+    if roll < 0.08:
+        return float("nan")
+    if roll < 0.2:
+        # Legacy clients send accuracy as a decimal * 1000
+        return round(rng.uniform(0, 1000), 1)
+    if roll < 0.25:
+        return 0.0
+    return rng.random()
+
+
+def make_task(task_number: int, rng: random.Random) -> Dict[str, Any]:
+    clicks = rng.choice([0, rng.randint(1, 60)])
+    hits = rng.randint(0, clicks) if clicks else 0
+    return {
+        "task_number": task_number,
+        "game_type": "synthetic",
+        "clicks": clicks,
+        "hits": hits,
+        "misses": clicks - hits,
+        "score": round(rng.uniform(0, 100), 2),
+        "accuracy": _rate(rng),
+        "missrate": _rate(rng),
+    }
+
+
+def make_submission(rng: random.Random) -> Dict[str, Any]:
+    """One child's task results plus demographics, as passed to predict_severity_batch."""
+    numbers = [n for n in range(1, 33) if rng.random() > 0.1]
+    if rng.random() < 0.1:
+        numbers.append(rng.choice(numbers or [1]))  # duplicate task
+    if rng.random() < 0.05:
+        numbers.append(rng.choice([0, 33, 99]))  # unknown task number
+    rng.shuffle(numbers)
+    return {
+        "task_results": [make_task(n, rng) for n in numbers],
+        "age": rng.randint(5, 16),
+        "gender": rng.choice(GENDERS),
+        "native_english": rng.random() > 0.3,
+    }
+
+
+def make_submissions(n: int, seed: int = 0) -> List[Dict[str, Any]]:
+    rng = random.Random(seed)
+    return [make_submission(rng) for _ in range(n)]
+
+
+def _json_safe(value: Any) -> Any:
+    # TaskResult requires numbers and JSON has no NaN
+    if value is None or (isinstance(value, float) and math.isnan(value)):
+        return 0.0
+    return value
+
+
+def make_submit_request(rng: random.Random, user_id: str = "bench-user") -> Dict[str, Any]:
+    """JSON body for POST /assessment/submit built from a synthetic submission."""
+    sub = make_submission(rng)
+    return {
+        "user_id": user_id,
+        "questionnaire_answers": [
+            {
+                "question_id": q,
+                "question_text": f"Synthetic question {q}",
+                "answer": rng.randint(1, 5),
+                "category": "synthetic",
+            }
+            for q in range(1, 11)
+        ],
+        "task_results": [
+            {k: _json_safe(v) for k, v in task.items()} for task in sub["task_results"]
+        ],
+        "age": sub["age"],
+        "gender": sub["gender"],
+        "native_english": sub["native_english"],
+    }
@@ -0,0 +1,62 @@
+"""
+Production launcher: N Uvicorn workers forked from one preloaded app.
+
+    gunicorn -c gunicorn.conf.py main:app
+
+The app (and with it the severity model) is imported once in the master and
+shared copy-on-write by every worker; gc.freeze() before forking keeps the
+garbage collector from touching, and so copying, those pages. Clients that
+must not cross fork() — the Gemini httpx pool, job-queue SQLite connections,
+Firestore's gRPC channel — are created on first use, which happens inside a
+worker: importing main only defines them. The Firestore client additionally
+remembers the pid that built it (document_store.get_store), so a client that
+was somehow created in the master is rebuilt rather than shared by a worker.
+
+Settings come from the environment:
+  WEB_CONCURRENCY       worker processes (default: CPU count)
+  PRELOAD_APP           import the app before forking (default: true)
+  MAX_REQUESTS          restart a worker after this many requests, 0 = never (default: 2000)
+  MAX_REQUESTS_JITTER   random spread so workers do not restart together (default: 200)
+  GRACEFUL_TIMEOUT      seconds a restarting worker gets to finish in-flight requests (default: 30)
+  WORKER_TIMEOUT        seconds without a heartbeat before a worker is killed (default: 120)
+"""
+
+import gc
+import multiprocessing
+import os
+
+bind = f"0.0.0.0:{os.getenv('PORT', '8000')}"
+worker_class = "uvicorn_worker.UvicornWorker"
+workers = int(os.getenv("WEB_CONCURRENCY", str(multiprocessing.cpu_count())))
+preload_app = os.getenv("PRELOAD_APP", "true").lower() == "true"
+
+# Graceful restart policy
+max_requests = int(os.getenv("MAX_REQUESTS", "2000"))
+max_requests_jitter = int(os.getenv("MAX_REQUESTS_JITTER", "200"))
+graceful_timeout = int(os.getenv("GRACEFUL_TIMEOUT", "30"))
+timeout = int(os.getenv("WORKER_TIMEOUT", "120"))
+keepalive = 5
+
+accesslog = "-"
+errorlog = "-"
+
+
+def when_ready(server):
+    if preload_app:
+        # Move everything imported so far out of GC tracking so workers share it
+        gc.freeze()
+    server.log.info(
+        f"🚀 {workers} worker(s), preload={'on' if preload_app else 'off'}, "
+        f"max_requests={max_requests}±{max_requests_jitter}"
+    )
+
+
+def post_fork(server, worker):
+    # Nothing needs re-creating here: the clients listed above are built on
+    # first use in the worker. Anything added to main's import path that opens
+    # a gRPC channel, socket pool or SQLite connection must be lazy too.
+    server.log.info(f"👷 Worker {worker.pid} started")
+
+
+def worker_exit(server, worker):
+    server.log.info(f"👋 Worker {worker.pid} exited")
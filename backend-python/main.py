@@ -3,19 +3,16 @@ FastAPI backend with Ollama integration for SimplifiED
 Processes lecture transcriptions using local Ollama LLM
 """
 
-from fastapi import FastAPI, HTTPException, File, UploadFile, Request
+from fastapi import FastAPI, HTTPException, File, UploadFile, Request, Response, Query
+from fastapi.encoders import jsonable_encoder
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
 from pydantic import BaseModel
-import firebase_admin
-from firebase_admin import credentials, firestore
 from datetime import datetime
 import os
 from dotenv import load_dotenv
-import requests
 import time
 import json
-import threading
-from io import BytesIO
 try:
     from PIL import Image, ImageEnhance, ImageFilter
 except ImportError:
@@ -24,20 +21,58 @@ except ImportError:
     ImageFilter = None
     print("⚠️  Pillow not installed — handwriting image enhancement disabled")
 
+# Load environment variables (before app modules read their settings)
+load_dotenv()
+
 from app.routers import assessment as assessment_router
+from app.routers import worker_health as worker_health_router
+from app.routers import transcription as transcription_router
 from app.services.severity_model import load_model as load_severity_model
-
-# Global rate limiter for Gemini API (free tier: ~15 RPM for 2.0-flash)
-_gemini_lock = threading.Lock()
-_last_gemini_call = 0
-MIN_CALL_INTERVAL = 4  # seconds between Gemini API calls (conservative for free tier)
-
-# Load environment variables
-load_dotenv()
+from app.services.gemini_client import (
+    GEMINI_MODEL,
+    GEMINI_VISION_MODEL,
+    close_http_client,
+    extract_text,
+    generate_content,
+    generate_with_gemini,
+    get_scheduler,
+    stream_with_gemini,
+)
+from app.services.llm_cache import get_llm_cache
+from app.services.job_queue import COMPLETED, FAILED, RUNNING, QueueFullError, get_job_queue
+from app.services.lecture_processing import LECTURE_OUTPUTS, ChunkMemo, process_transcription, stream_transcription
+from app.services.content_transform import TRANSFORM_OUTPUTS, build_fused_transform, build_transform_prompts
+from app.services.fused_generation import FUSED_GENERATION, generate_fused
+from app.services.task_graph import Node, run_graph
+from app.services.document_cache import etag_matches
+from app.services.lecture_artifacts import ARTIFACT_FIELDS, delete_artifacts, hydrate, hydrate_many, load_chunk_memo, load_field, references, save_chunk_memo, save_outputs
+from app.services.document_store import DocumentNotFound
+from app.services.repositories import decode_cursor, encode_cursor, get_batcher, handwriting_uploads, lecture_chunks, lectures
+from app.services.sse import SSE_HEADERS, format_sse, merge_streams
+from app.services.image_pipeline import ImagePipelineBusy, enhance_for_vision, shutdown_image_pool
+from app.services.transcription_backends import shutdown_backends, transcribe_path
+from app.services.uploads import (
+    MAX_AUDIO_UPLOAD_BYTES,
+    MAX_IMAGE_UPLOAD_BYTES,
+    ContentLengthLimitMiddleware,
+    UploadTooLarge,
+    spool_upload,
+)
 
 # Initialize FastAPI
 app = FastAPI(title="SimplifiED Backend")
 
+# Reject oversized uploads from their Content-Length before the body is parsed
+app.add_middleware(
+    ContentLengthLimitMiddleware,
+    limits={
+        "/api/transcribe-audio": MAX_AUDIO_UPLOAD_BYTES,
+        "/api/transcriptions": MAX_AUDIO_UPLOAD_BYTES,
+        "/api/lectures/from-audio": MAX_AUDIO_UPLOAD_BYTES,
+        "/api/handwriting/analyze": MAX_IMAGE_UPLOAD_BYTES,
+    },
+)
+
 # Configure CORS - Allow frontend origins (including all Vercel deployments)
 # Vercel creates multiple URLs: production + preview deployments
 # Using regex pattern to allow all Vercel domains
@@ -81,22 +116,25 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # Lets the browser read the lecture listing's next-page cursor
+    expose_headers=["X-Next-Cursor"],
 )
 
-# Initialize Firebase Admin SDK
-cred = credentials.Certificate("serviceAccountKey.json")
-firebase_admin.initialize_app(cred)
-db = firestore.client()
+# Firestore is reached through app/services/repositories.py; the async client is
+# created lazily on first use (FIRESTORE_BACKEND=memory runs without credentials)
 
 # Register assessment screening router
 app.include_router(assessment_router.router)
+app.include_router(worker_health_router.router)
+app.include_router(transcription_router.router)
 
-# Preload ML severity model at startup
-try:
-    load_severity_model()
-    print("✅ Dyslexia severity model preloaded successfully")
-except FileNotFoundError as e:
-    print(f"⚠️  ML model not found: {e}")
+# Preload ML severity model at startup (SEVERITY_PRELOAD=false defers it to the first assessment)
+if os.getenv("SEVERITY_PRELOAD", "true").lower() == "true":
+    try:
+        load_severity_model()
+        print("✅ Dyslexia severity model preloaded successfully")
+    except FileNotFoundError as e:
+        print(f"⚠️  ML model not found: {e}")
 
 # Pydantic models
 class LectureCreate(BaseModel):
@@ -110,35 +148,28 @@ class LectureUpdate(BaseModel):
     mindMap: str = None
     summary: str = None
 
-# Google Gemini API Configuration (native REST API)
-# Supports multiple API keys for rotation (comma-separated in GEMINI_API_KEYS env var)
-_all_gemini_keys = [k.strip() for k in os.getenv("GEMINI_API_KEYS", "").split(",") if k.strip()]
-if not _all_gemini_keys:
-    # Fallback to single key
-    _single_key = os.getenv("GEMINI_API_KEY", "")
-    if _single_key:
-        _all_gemini_keys = [_single_key]
-
-_current_key_index = 0
-
-def _get_gemini_key() -> str:
-    """Get the current Gemini API key, rotating if multiple are available."""
-    global _current_key_index
-    if not _all_gemini_keys:
-        raise HTTPException(status_code=500, detail="No Gemini API key configured")
-    return _all_gemini_keys[_current_key_index % len(_all_gemini_keys)]
-
-def _rotate_gemini_key():
-    """Switch to the next API key after a quota exhaustion."""
-    global _current_key_index
-    if len(_all_gemini_keys) > 1:
-        _current_key_index = (_current_key_index + 1) % len(_all_gemini_keys)
-        print(f"🔄 Rotated to Gemini API key #{_current_key_index + 1}/{len(_all_gemini_keys)}")
-
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY", "")  # Kept for backward compat
-GEMINI_MODEL = "gemini-2.5-flash"  # Gemini model for text tasks
-GEMINI_VISION_MODEL = "gemini-2.5-flash"  # Vision model (supports image analysis)
-GEMINI_API_BASE = "https://generativelanguage.googleapis.com/v1beta/models"
+
+# Lecture listing: ?fields=summary returns only these, not the large text outputs
+LECTURE_LIST_FIELDS = ["title", "createdAt", "updatedAt", "summary", "processingStatus"]
+LECTURE_PAGE_MAX_LIMIT = int(os.getenv("LECTURE_PAGE_MAX_LIMIT", "100"))
+LECTURE_EXPORT_PAGE_SIZE = int(os.getenv("LECTURE_EXPORT_PAGE_SIZE", "100"))
+
+# Background jobs (lecture processing runs here instead of inside the request)
+job_queue = get_job_queue()
+
+@app.on_event("startup")
+async def start_job_queue():
+    await job_queue.start()
+
+@app.on_event("shutdown")
+async def shutdown_http_clients():
+    """Stop job workers, finish pending Firestore writes and release pooled Gemini connections."""
+    await job_queue.stop()
+    await get_batcher().flush_all()
+    await close_http_client()
+    shutdown_image_pool()
+    shutdown_backends()
 
 @app.get("/")
 async def root():
@@ -148,144 +179,131 @@ async def root():
 async def health_check():
     return {"status": "ok", "model": GEMINI_MODEL}
 
-def chunk_text(text: str, max_chunk_size: int = 500) -> list:
-    """Split text into smaller chunks for faster processing"""
-    sentences = text.replace("?", ".").replace("!", ".").split(".")
-    sentences = [s.strip() for s in sentences if s.strip()]
-    
-    chunks = []
-    current_chunk = []
-    current_length = 0
-    
-    for sentence in sentences:
-        sentence_length = len(sentence)
-        if current_length + sentence_length > max_chunk_size and current_chunk:
-            chunks.append(". ".join(current_chunk) + ".")
-            current_chunk = [sentence]
-            current_length = sentence_length
-        else:
-            current_chunk.append(sentence)
-            current_length += sentence_length
-    
-    if current_chunk:
-        chunks.append(". ".join(current_chunk) + ".")
-    
-    return chunks
-
-def _throttle_gemini():
-    """Ensure minimum interval between Gemini API calls to respect rate limits."""
-    global _last_gemini_call
-    with _gemini_lock:
-        now = time.time()
-        elapsed = now - _last_gemini_call
-        if elapsed < MIN_CALL_INTERVAL:
-            wait = MIN_CALL_INTERVAL - elapsed
-            print(f"🕐 Throttling Gemini call, waiting {wait:.1f}s...")
-            time.sleep(wait)
-        _last_gemini_call = time.time()
-
-
-def generate_with_gemini(prompt: str, system: str = None, stream: bool = False) -> str:
-    """Generate text using Google Gemini native REST API with retry for rate limits"""
-    headers = {"Content-Type": "application/json"}
-    
-    # Build contents array
-    if system:
-        prompt = f"{system}\n\n{prompt}"
-    
-    payload = {
-        "contents": [{"role": "user", "parts": [{"text": prompt}]}],
-        "generationConfig": {
-            "temperature": 0.3,
-            "maxOutputTokens": 4096
-        }
-    }
-    
-    max_retries = 5
-    for attempt in range(max_retries):
-        try:
-            _throttle_gemini()
-            url = f"{GEMINI_API_BASE}/{GEMINI_MODEL}:generateContent?key={_get_gemini_key()}"
-            response = requests.post(url, headers=headers, json=payload, timeout=90)
-            
-            if response.status_code == 429:
-                # Try rotating to next key first
-                _rotate_gemini_key()
-                retry_after = response.headers.get('Retry-After')
-                if retry_after:
-                    wait_time = min(int(retry_after), 90)
-                else:
-                    wait_time = min((2 ** attempt) * 10, 90)  # 10s, 20s, 40s, 80s, 90s
-                print(f"⏳ Rate limited (attempt {attempt+1}/{max_retries}), waiting {wait_time}s...")
-                time.sleep(wait_time)
-                continue
-            
-            if response.status_code != 200:
-                print(f"❌ Gemini API Error {response.status_code}: {response.text}")
-                raise HTTPException(status_code=500, detail=f"Gemini API error: {response.text}")
-            
-            data = response.json()
-            return data['candidates'][0]['content']['parts'][0]['text']
-            
-        except requests.exceptions.RequestException as e:
-            print(f"Gemini API error: {e}")
-            if attempt < max_retries - 1:
-                time.sleep(3)
-                continue
-            raise HTTPException(status_code=500, detail=f"Gemini processing failed: {str(e)}")
-    
-    raise HTTPException(status_code=429, detail="Gemini API rate limit exceeded. Please wait 1-2 minutes and try again.")
+@app.get("/api/llm-cache/stats")
+async def llm_cache_stats():
+    """Hit/miss counters for the Gemini response cache"""
+    return get_llm_cache().stats()
+
+@app.get("/api/lecture-cache/stats")
+async def lecture_cache_stats():
+    """Hit/miss counters and byte usage of this worker's lecture read cache"""
+    return lectures.cache.stats()
+
+async def _save_new_lecture(lecture: LectureCreate, extra: dict = None) -> dict:
+    """Write a new lecture document and return it with its id"""
+    return await lectures.create({
+        "userId": lecture.userId,
+        "transcription": lecture.transcription,
+        "simpleText": "",
+        "detailedSteps": "",
+        "mindMap": "",
+        "summary": "",
+        **(extra or {}),
+        "createdAt": datetime.now(),
+        "updatedAt": datetime.now()
+    })
 
 @app.post("/api/lectures")
 async def create_lecture(lecture: LectureCreate):
     """Create a new lecture with transcription"""
     try:
-        lecture_data = {
-            "userId": lecture.userId,
-            "transcription": lecture.transcription,
-            "simpleText": "",
-            "detailedSteps": "",
-            "mindMap": "",
-            "summary": "",
-            "createdAt": datetime.now(),
-            "updatedAt": datetime.now()
-        }
-        
-        doc_ref = db.collection("lectures").document()
-        doc_ref.set(lecture_data)
-        
-        return {"id": doc_ref.id, **lecture_data}
+        return await _save_new_lecture(lecture)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/api/lectures/from-audio")
+async def create_lecture_from_audio(file: UploadFile = File(...), userId: str = "anonymous", timestamps: bool = False):
+    """Transcribe a recording (chunked in parallel when long) and save it as a new lecture"""
+    upload = None
+    try:
+        upload = await transcription_router.spool_audio(file)
+        result = await transcribe_path(upload.path, upload.size)
+        if not result.text.strip():
+            raise HTTPException(status_code=422, detail="No speech found in the recording")
+        
+        lecture = LectureCreate(userId=userId, transcription=result.text)
+        saved = await _save_new_lecture(lecture, {
+            "audioDuration": result.duration_seconds,
+            "transcriptionBackend": result.backend,
+        })
+        print(f"📚 Lecture {saved['id']} created from {result.chunks} transcript chunk(s)")
+        return {**saved, **transcription_router.transcription_response(result, timestamps)}
+    
+    except UploadTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except HTTPException:
+        raise
+    except Exception as e:
+        print(f"❌ Error creating lecture from audio: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+    finally:
+        if upload is not None:
+            upload.cleanup()
+
+def _expand_artifacts(artifacts: str) -> bool:
+    """?artifacts= value: full (default) loads offloaded outputs, preview keeps the short previews"""
+    if artifacts not in ("full", "preview"):
+        raise HTTPException(status_code=400, detail="artifacts must be 'full' or 'preview'")
+    return artifacts == "full"
+
+async def _tagged_response(request: Request, found, expand: bool = True) -> Response:
+    """JSON body with its ETag, or 304 Not Modified when If-None-Match already has it"""
+    doc, etag = found
+    if not expand:
+        etag = etag[:-1] + '-preview"'
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        # Answered before any offloaded output is fetched
+        return Response(status_code=304, headers=headers)
+    if expand:
+        doc = await hydrate(doc)
+    return JSONResponse(jsonable_encoder(doc), headers=headers)
+
 @app.get("/api/lectures/{lecture_id}")
-async def get_lecture(lecture_id: str):
-    """Get a specific lecture"""
+async def get_lecture(lecture_id: str, request: Request, artifacts: str = "full"):
+    """Get a specific lecture (304 if If-None-Match has the current ETag).
+
+    ?artifacts=preview skips loading outputs stored out of the document;
+    fetch them one at a time from /api/lectures/{id}/artifacts/{field}.
+    """
+    expand = _expand_artifacts(artifacts)
     try:
-        doc = db.collection("lectures").document(lecture_id).get()
-        if not doc.exists:
+        found = await lectures.get_tagged(lecture_id)
+        if found is None:
             raise HTTPException(status_code=404, detail="Lecture not found")
         
-        data = doc.to_dict()
-        return {"id": doc.id, **data}
+        return await _tagged_response(request, found, expand)
     except HTTPException:
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.get("/api/lectures/user/{user_id}/latest")
-async def get_latest_lecture(user_id: str):
-    """Get the latest lecture for a user"""
+@app.get("/api/lectures/{lecture_id}/artifacts/{field}")
+async def get_lecture_artifact(lecture_id: str, field: str):
+    """Full text of one lecture output, whether it is stored inline or as a blob"""
+    if field not in ARTIFACT_FIELDS:
+        raise HTTPException(status_code=404, detail=f"Unknown lecture output: {field}")
     try:
-        docs = db.collection("lectures")\
-            .where("userId", "==", user_id)\
-            .order_by("createdAt", direction=firestore.Query.DESCENDING)\
-            .limit(1)\
-            .stream()
+        lecture = await lectures.get(lecture_id)
+        if lecture is None:
+            raise HTTPException(status_code=404, detail="Lecture not found")
         
-        for doc in docs:
-            data = doc.to_dict()
-            return {"id": doc.id, **data}
+        ref = references(lecture).get(field)
+        text = await load_field(ref) if ref is not None else lecture.get(field, "")
+        return PlainTextResponse(text)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/api/lectures/user/{user_id}/latest")
+async def get_latest_lecture(user_id: str, request: Request, artifacts: str = "full"):
+    """Get the latest lecture for a user (304 if If-None-Match has the current ETag)"""
+    expand = _expand_artifacts(artifacts)
+    try:
+        found = await lectures.first_tagged([("userId", "==", user_id)], "createdAt", descending=True)
+        if found is not None:
+            return await _tagged_response(request, found, expand)
         
         raise HTTPException(status_code=404, detail="No lectures found")
     except HTTPException:
@@ -293,129 +311,176 @@ async def get_latest_lecture(user_id: str):
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.post("/api/lectures/{lecture_id}/process")
-async def process_lecture(lecture_id: str):
-    """Process lecture transcription through Gemini AI with chunking for faster processing"""
+async def _process_lecture_job(job, report) -> dict:
+    """Job handler: run the four Gemini outputs and save each one as it lands"""
+    lecture_id = job.payload["lectureId"]
+    
     try:
-        # Get the lecture
-        doc = db.collection("lectures").document(lecture_id).get()
-        if not doc.exists:
+        # Not from the cache: the transcription must be the latest one saved
+        lecture = await lectures.get(lecture_id, cached=False)
+        if lecture is None:
             raise HTTPException(status_code=404, detail="Lecture not found")
         
-        data = doc.to_dict()
-        transcription = data.get("transcription", "")
-        
+        transcription = lecture.get("transcription", "")
         if not transcription:
             raise HTTPException(status_code=400, detail="No transcription to process")
         
         print(f"🚀 Processing lecture {lecture_id}...")
         start_time = time.time()
         
-        # Chunk the transcription for faster processing
-        chunks = chunk_text(transcription, max_chunk_size=600)
-        print(f"📊 Split into {len(chunks)} chunks for processing")
-        
-        from concurrent.futures import ThreadPoolExecutor
-        
-        # ⚡ OPTIMIZED PROMPTS - SHORTER = FASTER
-        breakdown_prompt = f"""Break down by splitting words into syllables with hyphens. Keep sentences intact.
-
-Example: "Photosynthesis is the process" → "Pho-to-syn-the-sis is the pro-cess"
-
-Text to process:
-{transcription}
-
-Output only the syllable breakdown, no explanations:"""
-        
-        steps_prompt = f"""Break this lecture into clear, numbered steps (max 5-7 steps). Each step should be concise and actionable.
-
-Text:
-{transcription}
-
-Output only the numbered steps, no extra text:"""
-        
-        mindmap_prompt = f"""Create a brief mind map with main topic and 3-4 key points only.
-
-Text:
-{transcription}
-
-Format:
-Main Topic
-├─ Point 1
-├─ Point 2
-└─ Point 3
-
-Keep it short:"""
-        
-        summary_prompt = f"""Summarize in 2-3 sentences: main topic, key points, and conclusion.
-
-Text:
-{transcription}
-
-Summary:"""
-        
-        print("⚙️ Starting parallel processing of 4 outputs...")
-        
-        # Use ThreadPoolExecutor for parallel processing (simpler, no asyncio issues)
-        with ThreadPoolExecutor(max_workers=4) as executor:
-            breakdown_future = executor.submit(
-                generate_with_gemini, 
-                breakdown_prompt,
-                "Break words into syllables. Output only the result."
-            )
-            steps_future = executor.submit(
-                generate_with_gemini,
-                steps_prompt,
-                "Create numbered steps. Be concise."
-            )
-            mindmap_future = executor.submit(
-                generate_with_gemini,
-                mindmap_prompt,
-                "Create a brief mind map. Keep it very short."
-            )
-            summary_future = executor.submit(
-                generate_with_gemini,
-                summary_prompt,
-                "Write a 2-3 sentence summary."
-            )
-            
-            # Wait for all to complete
-            breakdown_text = breakdown_future.result()
-            detailed_steps = steps_future.result()
-            mind_map = mindmap_future.result()
-            summary = summary_future.result()
+        for name in LECTURE_OUTPUTS:
+            await report(name, "pending")
+        await lectures.update(lecture_id, {
+            "processingStatus": {
+                "jobId": job.id,
+                "state": RUNNING,
+                "outputs": {name: "pending" for name in LECTURE_OUTPUTS},
+            }
+        })
+        
+        async def on_output(name: str, text: str):
+            # Persist each output as soon as it is ready so pollers see progress;
+            # outputs landing together are coalesced into one write
+            await report(name, "done")
+            await save_outputs(lecture_id, {
+                name: text,
+                f"processingStatus.outputs.{name}": "done",
+            }, lectures.update)
+        
+        # Results of the previous run: only chunks changed since then go to Gemini
+        memo = ChunkMemo.from_dict(await load_chunk_memo(lecture_id))
+        outputs = await process_transcription(transcription, on_output, memo)
+        try:
+            await save_chunk_memo(lecture_id, memo.to_dict())
+        except Exception as e:
+            # Only costs the next run its reuse; the outputs are already saved
+            print(f"⚠️ Could not save chunk results of lecture {lecture_id}: {e}")
         
         elapsed_time = time.time() - start_time
         print(f"✅ Processing complete in {elapsed_time:.1f} seconds!")
         
-        # Update Firestore
+        # Update Firestore (each output was already saved by on_output)
         update_data = {
-            "simpleText": breakdown_text,
-            "detailedSteps": detailed_steps,
-            "mindMap": mind_map,
-            "summary": summary,
             "updatedAt": datetime.now(),
-            "processingTime": elapsed_time
+            "processingTime": elapsed_time,
+            "processingStatus.state": COMPLETED,
         }
-        
-        db.collection("lectures").document(lecture_id).update(update_data)
+        await lectures.update(lecture_id, update_data)
         
         print("Done! Saved to Firestore.")
         return {
             "id": lecture_id,
-            "simpleText": breakdown_text,
-            "detailedSteps": detailed_steps,
-            "mindMap": mind_map,
-            "summary": summary,
-            "processingTime": elapsed_time
+            **outputs,
+            "processingTime": elapsed_time,
+            "reusedChunkResults": memo.reused,
+            "generatedChunkResults": memo.generated,
+        }
+    
+    except Exception as e:
+        print(f"❌ Error processing lecture: {e}")
+        try:
+            await lectures.update(lecture_id, {
+                "processingStatus.jobId": job.id,
+                "processingStatus.state": FAILED,
+            })
+        except Exception:
+            pass
+        raise
+
+job_queue.register("process_lecture", _process_lecture_job)
+
+@app.post("/api/lectures/{lecture_id}/process", status_code=202)
+async def process_lecture(lecture_id: str):
+    """Queue lecture processing and return a job ID to poll at /api/jobs/{jobId}"""
+    try:
+        # Get the lecture
+        lecture = await lectures.get(lecture_id)
+        if lecture is None:
+            raise HTTPException(status_code=404, detail="Lecture not found")
+        
+        if not lecture.get("transcription", ""):
+            raise HTTPException(status_code=400, detail="No transcription to process")
+        
+        # Retries for the same lecture attach to the job already in flight
+        job = await job_queue.enqueue(
+            "process_lecture",
+            {"lectureId": lecture_id},
+            dedupe_key=f"lecture:{lecture_id}",
+        )
+        await lectures.update(lecture_id, {
+            "processingStatus.jobId": job.id,
+            "processingStatus.state": job.status,
+        })
+        
+        return {
+            "jobId": job.id,
+            "lectureId": lecture_id,
+            "status": job.status,
+            "statusUrl": f"/api/jobs/{job.id}",
         }
         
     except HTTPException:
         raise
+    except QueueFullError as e:
+        raise HTTPException(status_code=503, detail=f"{e}. Please try again shortly.")
     except Exception as e:
-        print(f"❌ Error processing lecture: {e}")
+        print(f"❌ Error queueing lecture: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/api/lectures/{lecture_id}/process/stream")
+async def stream_process_lecture(lecture_id: str):
+    """Stream lecture outputs as Server-Sent Events, then save the assembled result"""
+    lecture = await lectures.get(lecture_id, cached=False)
+    if lecture is None:
+        raise HTTPException(status_code=404, detail="Lecture not found")
+    
+    transcription = lecture.get("transcription", "")
+    if not transcription:
+        raise HTTPException(status_code=400, detail="No transcription to process")
+    
+    async def events():
+        print(f"🚀 Streaming lecture {lecture_id}...")
+        start_time = time.time()
+        parts = {name: [] for name in LECTURE_OUTPUTS}
+        errors = {}
+        
+        async for kind, name, payload in stream_transcription(transcription):
+            if kind == "delta":
+                parts[name].append(payload)
+                yield format_sse("delta", {"output": name, "text": payload})
+            elif kind == "done":
+                yield format_sse("done", {"output": name})
+            else:
+                errors[name] = payload
+                yield format_sse("error", {"output": name, "detail": payload})
+        
+        elapsed_time = time.time() - start_time
+        result = {name: "".join(chunks) for name, chunks in parts.items() if name not in errors}
+        if result:
+            await save_outputs(lecture_id, {
+                **result,
+                "updatedAt": datetime.now(),
+                "processingTime": elapsed_time,
+            }, lectures.update)
+            print(f"✅ Streamed and saved lecture {lecture_id} in {elapsed_time:.1f}s")
+        
+        yield format_sse("complete", {
+            "id": lecture_id,
+            **result,
+            "processingTime": elapsed_time,
+            "errors": errors,
+        })
+    
+    return StreamingResponse(events(), media_type="text/event-stream", headers=SSE_HEADERS)
+
+@app.get("/api/jobs/{job_id}")
+async def get_job_status(job_id: str):
+    """Status, per-output progress and (once completed) result of a background job"""
+    job = await job_queue.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job.to_dict()
+
 @app.patch("/api/lectures/{lecture_id}")
 async def update_lecture(lecture_id: str, updates: LectureUpdate):
     """Update lecture fields"""
@@ -423,11 +488,16 @@ async def update_lecture(lecture_id: str, updates: LectureUpdate):
         update_data = {k: v for k, v in updates.dict().items() if v is not None}
         update_data["updatedAt"] = datetime.now()
         
-        db.collection("lectures").document(lecture_id).update(update_data)
-        
-        doc = db.collection("lectures").document(lecture_id).get()
-        data = doc.to_dict()
-        return {"id": doc.id, **data}
+        # The read runs alongside the write and the update is merged into it locally
+        lecture = await save_outputs(lecture_id, update_data, lectures.update_and_get)
+        # Outputs just written are already in hand; load only the other offloaded ones
+        written = [name for name in ARTIFACT_FIELDS if name in update_data]
+        lecture.update({name: update_data[name] for name in written})
+        return await hydrate(lecture, [name for name in ARTIFACT_FIELDS if name not in written])
+    except DocumentNotFound:
+        # Blobs offloaded for a lecture that does not exist
+        await delete_artifacts(lecture_id)
+        raise HTTPException(status_code=404, detail="Lecture not found")
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -435,110 +505,97 @@ async def update_lecture(lecture_id: str, updates: LectureUpdate):
 async def delete_lecture(lecture_id: str):
     """Delete a lecture"""
     try:
-        db.collection("lectures").document(lecture_id).delete()
+        await lectures.delete(lecture_id)
+        await lecture_chunks.delete(lecture_id)
+        removed = await delete_artifacts(lecture_id)
+        if removed:
+            print(f"🗑️ Deleted {removed} artifact blob(s) of lecture {lecture_id}")
         return {"message": "Lecture deleted successfully"}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.get("/api/lectures/user/{user_id}")
-async def get_user_lectures(user_id: str):
-    """Get all lectures for a user"""
-    try:
-        docs = db.collection("lectures")\
-            .where("userId", "==", user_id)\
-            .order_by("createdAt", direction=firestore.Query.DESCENDING)\
-            .stream()
-        
-        lectures = []
-        for doc in docs:
-            data = doc.to_dict()
-            lectures.append({"id": doc.id, **data})
-        
-        return lectures
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+def _lecture_fields(fields: str = None):
+    """?fields= value -> projection: None (everything), the list-view preset, or named fields"""
+    if not fields or fields == "all":
+        return None
+    if fields == "summary":
+        return LECTURE_LIST_FIELDS
+    return [name.strip() for name in fields.split(",") if name.strip()]
 
-@app.post("/api/transcribe-audio")
-async def transcribe_audio(file: UploadFile = File(...)):
-    """
-    Transcribe audio file using AssemblyAI
-    Requires ASSEMBLYAI_API_KEY in environment variables
+@app.get("/api/lectures/user/{user_id}")
+async def get_user_lectures(
+    user_id: str,
+    response: Response,
+    limit: int = Query(None, ge=1, le=LECTURE_PAGE_MAX_LIMIT),
+    cursor: str = None,
+    fields: str = None,
+    artifacts: str = "full",
+):
+    """Get a user's lectures, newest first.
+
+    Without limit/cursor every lecture is returned, as before. With them the
+    list is paged: pass the X-Next-Cursor response header back as ?cursor= for
+    the next page (no header on the last page). ?fields=summary (or a
+    comma-separated list) returns only those fields plus id; offloaded outputs
+    in a projection stay previews. ?artifacts=preview skips loading them for
+    whole documents too.
     """
+    expand = _expand_artifacts(artifacts)
     try:
-        # Get API key from environment
-        api_key = os.getenv("ASSEMBLYAI_API_KEY")
-        if not api_key:
-            raise HTTPException(
-                status_code=500, 
-                detail="AssemblyAI API key not configured. Please add ASSEMBLYAI_API_KEY to .env file."
-            )
-        
-        # Read file content
-        file_content = await file.read()
-        
-        # Upload audio to AssemblyAI
-        headers = {"authorization": api_key}
-        upload_response = requests.post(
-            "https://api.assemblyai.com/v2/upload",
-            headers=headers,
-            data=file_content
-        )
-        
-        if upload_response.status_code != 200:
-            raise HTTPException(status_code=500, detail="Failed to upload audio file")
-        
-        audio_url = upload_response.json()["upload_url"]
-        
-        # Request transcription
-        transcript_request = {
-            "audio_url": audio_url,
-            "language_code": "en"
-        }
-        
-        transcript_response = requests.post(
-            "https://api.assemblyai.com/v2/transcript",
-            headers=headers,
-            json=transcript_request
+        start_after = decode_cursor(cursor) if cursor else None
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    try:
+        filters = [("userId", "==", user_id)]
+        projection = _lecture_fields(fields)
+        if limit is None and start_after is None:
+            if projection is None:
+                docs = await lectures.find(filters, order_by="createdAt", descending=True)
+                return await hydrate_many(docs) if expand else docs
+            return [doc async for doc in lectures.iter_all(
+                filters, "createdAt", descending=True, fields=projection, page_size=LECTURE_EXPORT_PAGE_SIZE
+            )]
+        
+        page, next_cursor = await lectures.page(
+            filters, "createdAt", descending=True, limit=limit or LECTURE_PAGE_MAX_LIMIT,
+            start_after=start_after, fields=projection,
         )
-        
-        if transcript_response.status_code != 200:
-            raise HTTPException(status_code=500, detail="Failed to request transcription")
-        
-        transcript_id = transcript_response.json()["id"]
-        
-        # Poll for transcription completion
-        polling_endpoint = f"https://api.assemblyai.com/v2/transcript/{transcript_id}"
-        max_attempts = 60  # 5 minutes max
-        attempt = 0
-        
-        while attempt < max_attempts:
-            polling_response = requests.get(polling_endpoint, headers=headers)
-            transcription_result = polling_response.json()
-            
-            if transcription_result["status"] == "completed":
-                return {
-                    "transcription": transcription_result["text"],
-                    "confidence": transcription_result.get("confidence", 0),
-                    "words": len(transcription_result["text"].split())
-                }
-            elif transcription_result["status"] == "error":
-                raise HTTPException(
-                    status_code=500, 
-                    detail=f"Transcription failed: {transcription_result.get('error', 'Unknown error')}"
-                )
-            
-            # Wait before polling again
-            time.sleep(5)
-            attempt += 1
-        
-        raise HTTPException(status_code=408, detail="Transcription timeout. Please try again.")
-        
-    except HTTPException:
-        raise
+        if next_cursor is not None:
+            response.headers["X-Next-Cursor"] = encode_cursor(next_cursor)
+        return await hydrate_many(page) if expand else page
     except Exception as e:
-        print(f"Transcription error: {str(e)}")
-        raise HTTPException(status_code=500, detail=f"Transcription failed: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/api/lectures/user/{user_id}/export")
+async def export_user_lectures(user_id: str, fields: str = None, artifacts: str = "full"):
+    """Stream all of a user's lectures as newline-delimited JSON, one page in memory at a time"""
+    projection = _lecture_fields(fields)
+    expand = _expand_artifacts(artifacts)
+    
+    async def rows():
+        count = 0
+        try:
+            async for doc in lectures.iter_all(
+                [("userId", "==", user_id)], "createdAt", descending=True,
+                fields=projection, page_size=LECTURE_EXPORT_PAGE_SIZE,
+            ):
+                count += 1
+                if expand:
+                    doc = await hydrate(doc)
+                yield json.dumps(jsonable_encoder(doc)) + "\n"
+        except Exception as e:
+            # Headers are already sent; end with an error line the client can detect
+            print(f"❌ Lecture export for {user_id} failed after {count} rows: {e}")
+            yield json.dumps({"error": str(e)}) + "\n"
+            return
+        print(f"📦 Exported {count} lectures for {user_id}")
+    
+    return StreamingResponse(
+        rows(),
+        media_type="application/x-ndjson",
+        headers={"Content-Disposition": f'attachment; filename="lectures-{user_id}.ndjson"'},
+    )
 
 # ============================================
 # NEW ENDPOINTS: Handwriting, Content, Analytics
@@ -564,40 +621,28 @@ async def analyze_handwriting(file: UploadFile = File(...), userId: str = "anony
     Returns detailed scoring, extracted text, error highlights, and improvement tips.
     """
     try:
-        file_content = await file.read()
-        
-        # Validate file size (50 MB limit)
-        if len(file_content) > 50 * 1024 * 1024:
+        # Read in chunks (50 MB limit); large photos go to a temp file, not memory
+        try:
+            upload = await spool_upload(file, MAX_IMAGE_UPLOAD_BYTES)
+        except UploadTooLarge:
             raise HTTPException(status_code=400, detail="File size exceeds 50 MB limit.")
         
-        # Enhance image for better OCR/analysis
+        # Enhance image for better OCR/analysis (off the event loop, in the image process pool)
         try:
             if Image is None:
                 raise ImportError("Pillow not installed")
-            img = Image.open(BytesIO(file_content))
-            # Convert to RGB if needed (handles RGBA, grayscale, etc.)
-            if img.mode != 'RGB':
-                img = img.convert('RGB')
-            # Increase contrast
-            img = ImageEnhance.Contrast(img).enhance(1.5)
-            # Increase sharpness
-            img = ImageEnhance.Sharpness(img).enhance(2.0)
-            # Slight brightness boost
-            img = ImageEnhance.Brightness(img).enhance(1.1)
-            # Save enhanced image to buffer
-            buf = BytesIO()
-            img.save(buf, format='JPEG', quality=95)
-            enhanced_bytes = buf.getvalue()
-            base64_image = base64.b64encode(enhanced_bytes).decode('utf-8')
-            mime_type = 'image/jpeg'
-            print(f"🖼️ Image enhanced: {img.size[0]}x{img.size[1]}, {len(enhanced_bytes)} bytes")
+            enhanced = await enhance_for_vision(upload.source)
+            base64_image = enhanced.base64_data
+            mime_type = enhanced.mime_type
+        except ImagePipelineBusy as busy:
+            print(f"⏳ {busy}")
+            raise HTTPException(status_code=503, detail="Image processing is busy. Please try again shortly.")
         except Exception as img_err:
             print(f"⚠️ Image enhancement failed ({img_err}), using original")
-            base64_image = base64.b64encode(file_content).decode('utf-8')
+            base64_image = base64.b64encode(upload.read_bytes()).decode('utf-8')
             mime_type = file.content_type or 'image/jpeg'
-        
-        url = f"{GEMINI_API_BASE}/{GEMINI_VISION_MODEL}:generateContent?key={_get_gemini_key()}"
-        headers = {"Content-Type": "application/json"}
+        finally:
+            upload.cleanup()
         
         system_prompt = """You are a dyslexia handwriting analyst. Analyze the handwriting image and respond with ONLY a JSON object (no markdown, no code fences, no extra text).
 
@@ -641,44 +686,9 @@ JSON format — output ONLY this, nothing else:
             }
         }
         
-        # Retry with backoff for rate limits (free tier needs longer waits)
-        result_text = None
-        max_retries = 5
-        for attempt in range(max_retries):
-            _throttle_gemini()
-            # Rebuild URL each attempt (key may have rotated)
-            attempt_url = f"{GEMINI_API_BASE}/{GEMINI_VISION_MODEL}:generateContent?key={_get_gemini_key()}"
-            try:
-                response = requests.post(attempt_url, headers=headers, json=payload, timeout=120)
-            except requests.exceptions.RequestException as req_err:
-                print(f"⚠️ Request failed (attempt {attempt+1}): {req_err}")
-                if attempt < max_retries - 1:
-                    time.sleep(10)
-                    continue
-                raise HTTPException(status_code=500, detail=f"Network error: {str(req_err)}")
-            
-            if response.status_code == 429:
-                # Rotate to next API key if available
-                _rotate_gemini_key()
-                # Parse Retry-After header if available, otherwise use exponential backoff
-                retry_after = response.headers.get('Retry-After')
-                if retry_after:
-                    wait_time = min(int(retry_after), 90)
-                else:
-                    wait_time = min((2 ** attempt) * 10, 90)  # 10s, 20s, 40s, 80s, 90s
-                print(f"⏳ Vision rate limited (attempt {attempt+1}/{max_retries}), waiting {wait_time}s...")
-                time.sleep(wait_time)
-                continue
-            
-            if response.status_code != 200:
-                print(f"Gemini Vision API Error: {response.status_code} - {response.text}")
-                raise HTTPException(status_code=500, detail=f"Vision API error: {response.text}")
-            
-            result_text = response.json()['candidates'][0]['content']['parts'][0]['text']
-            break
-        
-        if result_text is None:
-            raise HTTPException(status_code=429, detail="Rate limit exceeded. Please wait 1-2 minutes and try again.")
+        # Retry with non-blocking backoff for rate limits (free tier needs longer waits)
+        data = await generate_content(payload, model=GEMINI_VISION_MODEL, timeout=120.0, label="Vision")
+        result_text = extract_text(data)
         
         # Parse the JSON response
         try:
@@ -803,7 +813,7 @@ JSON format — output ONLY this, nothing else:
         
         # Save to Firestore
         try:
-            db.collection("handwritingUploads").add({
+            await handwriting_uploads.create({
                 "userId": userId,
                 "score": result.get("score", 0),
                 "errorCount": len(result.get("errors", [])),
@@ -827,6 +837,7 @@ async def transform_content(request: ContentTransformRequest):
     """
     Transform educational content into multiple learning formats:
     simplified notes, flashcards, quiz, mind map
+    Outputs that fail come back empty with the reason in "errors"; "timings" has per-output timings
     """
     try:
         text = request.text
@@ -836,120 +847,50 @@ async def transform_content(request: ContentTransformRequest):
         print(f"🔄 Transforming content ({len(text)} chars)...")
         start_time = time.time()
         
-        notes_prompt = f"""You are a teacher helping a dyslexic student understand this topic. Rewrite the content below in a way that is EASY to read and DETAILED enough to fully understand the topic.
-
-Rules:
-- Use simple, everyday words (no jargon)
-- Write in short, clear sentences (max 15 words each)
-- Use bullet points (start each point with a dash -)
-- DO NOT use any markdown symbols like # or * or **
-- Group related points under plain text headings (just capitalize the heading, no symbols)
-- Explain every key concept — do not skip anything
-- Add a brief "Why This Matters" section at the end
-- The output should be at least 300 words and cover ALL the main ideas from the text
-- Use line breaks between sections for easy reading
-
-Text:
-{text}
-
-Simplified notes:"""
-        
-        flashcard_prompt = f"""Create 8-10 flashcards to help a dyslexic student learn this content.
-
-Rules:
-- Each question should test ONE key concept
-- Keep questions clear and simple (no trick questions)
-- Answers should be 1-2 sentences, easy to remember
-- Use simple vocabulary
-- Cover all the important topics in the text
-
-Format EXACTLY like this (no extra text):
-Q: What is photosynthesis?
-A: It is the process plants use to make food from sunlight, water, and carbon dioxide.
-
-Q: Why is photosynthesis important?
-A: It produces oxygen that all living things need to breathe.
-
-Text:
-{text}
-
-Flashcards:"""
-        
-        quiz_prompt = f"""Create a 5-question multiple choice quiz from this content to help a dyslexic student review.
-
-Rules:
-- Use simple, clear language in questions and options
-- Each question should have exactly 4 options (A, B, C, D)
-- Only ONE option per question is correct
-- Mark the correct option by adding (correct) after it
-- Make wrong options believable but clearly wrong if you know the material
-- Cover different parts of the content
-
-Format EXACTLY like this:
-
-1. What does the heart do?
-A. It helps you breathe
-B. It pumps blood through your body (correct)
-C. It digests food
-D. It filters waste
-
-2. Where is the heart located?
-A. In your head
-B. In your stomach
-C. In your chest (correct)
-D. In your back
-
-Text:
-{text}
-
-Quiz:"""
-        
-        mindmap_prompt = f"""Create a detailed text-based mind map from this content with at least 4-5 main categories and 2-3 details under each.
-
-Rules:
-- Use simple words a dyslexic student can easily read
-- Cover ALL the main topics from the text
-- Each detail should be a short phrase (not full sentences)
-- Use tree-drawing characters for the structure
-
-Format EXACTLY like this:
-
-Main Topic Name
-├─ Category 1
-│  ├─ Detail 1a
-│  └─ Detail 1b
-├─ Category 2
-│  ├─ Detail 2a
-│  ├─ Detail 2b
-│  └─ Detail 2c
-├─ Category 3
-│  ├─ Detail 3a
-│  └─ Detail 3b
-└─ Category 4
-   ├─ Detail 4a
-   └─ Detail 4b
-
-Text:
-{text}
-
-Mind Map:"""
-        
-        # Run sequentially to avoid rate limits (Gemini free tier: ~15 RPM)
-        # The global throttle ensures minimum spacing between calls
-        simplified_notes = generate_with_gemini(notes_prompt, "You are a patient dyslexia specialist teacher. Write detailed, easy-to-read notes. NO markdown symbols (no # or * or **). Use plain text with dashes for bullets. Be thorough — cover every key point.")
-        flashcards = generate_with_gemini(flashcard_prompt, "Create flashcards using ONLY Q: and A: format. No numbering, no extra text. Keep answers clear and simple.")
-        quiz = generate_with_gemini(quiz_prompt, "Create a multiple choice quiz. Use simple language. Mark correct answer with (correct). Format exactly as shown.")
-        mind_map = generate_with_gemini(mindmap_prompt, "Create a detailed text mind map using tree characters (├─ │ └─). Use simple words. Be thorough.")
+        if FUSED_GENERATION:
+            # One structured request for all four; only malformed fields are regenerated
+            fused = await generate_fused(*build_fused_transform(text))
+            if not fused.outputs:
+                raise HTTPException(
+                    status_code=500,
+                    detail=f"Transformation failed: {'; '.join(f'{k}: {v}' for k, v in fused.errors.items())}"
+                )
+            elapsed = time.time() - start_time
+            print(f"✅ Content transformation (fused) complete in {elapsed:.1f}s")
+            return {
+                **{name: fused.outputs.get(name, "") for name in TRANSFORM_OUTPUTS},
+                "processingTime": elapsed,
+                "errors": fused.errors,
+                "timings": fused.timings_summary(),
+            }
+        
+        prompts = build_transform_prompts(text)
+        
+        # The four outputs are independent graph nodes; they run concurrently while
+        # the Gemini key scheduler has request budget and one at a time when it does not
+        nodes = [
+            Node(name, lambda deps, prompt=prompt, system=system: generate_with_gemini(prompt, system))
+            for name, (prompt, system) in prompts.items()
+        ]
+        graph = await run_graph(nodes, budget=lambda: get_scheduler().available_requests())
+        if not graph.results:
+            raise HTTPException(
+                status_code=500,
+                detail=f"Transformation failed: {'; '.join(f'{k}: {v}' for k, v in graph.errors.items())}"
+            )
         
         elapsed = time.time() - start_time
-        print(f"✅ Content transformation complete in {elapsed:.1f}s")
+        print(
+            f"✅ Content transformation complete in {elapsed:.1f}s "
+            f"({len(graph.results)}/{len(nodes)} outputs, peak concurrency {graph.peak_concurrency})"
+        )
         
         return {
-            "simplifiedNotes": simplified_notes,
-            "flashcards": flashcards,
-            "quiz": quiz,
-            "mindMap": mind_map,
-            "processingTime": elapsed
+            # Failed outputs stay empty strings so the response shape is unchanged
+            **{name: graph.results.get(name, "") for name in TRANSFORM_OUTPUTS},
+            "processingTime": elapsed,
+            "errors": graph.errors,
+            "timings": graph.timings_summary(),
         }
         
     except HTTPException:
@@ -959,6 +900,42 @@ Mind Map:"""
         raise HTTPException(status_code=500, detail=f"Transformation failed: {str(e)}")
 
 
+@app.post("/api/content/transform/stream")
+async def stream_transform_content(request: ContentTransformRequest):
+    """Stream the four content formats as Server-Sent Events, tagged by output"""
+    text = request.text
+    if not text.strip():
+        raise HTTPException(status_code=400, detail="No text provided")
+    
+    prompts = build_transform_prompts(text)
+    
+    async def events():
+        print(f"🔄 Streaming content transformation ({len(text)} chars)...")
+        start_time = time.time()
+        parts = {name: [] for name in TRANSFORM_OUTPUTS}
+        errors = {}
+        
+        streams = {name: stream_with_gemini(prompt, system) for name, (prompt, system) in prompts.items()}
+        async for kind, name, payload in merge_streams(streams):
+            if kind == "delta":
+                parts[name].append(payload)
+                yield format_sse("delta", {"output": name, "text": payload})
+            elif kind == "done":
+                yield format_sse("done", {"output": name})
+            else:
+                errors[name] = payload
+                yield format_sse("error", {"output": name, "detail": payload})
+        
+        elapsed = time.time() - start_time
+        yield format_sse("complete", {
+            **{name: "".join(chunks) for name, chunks in parts.items() if name not in errors},
+            "processingTime": elapsed,
+            "errors": errors,
+        })
+    
+    return StreamingResponse(events(), media_type="text/event-stream", headers=SSE_HEADERS)
+
+
 @app.post("/api/analytics/recommend")
 async def get_recommendations(request: RecommendationRequest):
     """Generate AI-powered learning recommendations based on user stats"""
@@ -974,7 +951,7 @@ Provide specific, actionable recommendations. Format as a JSON array:
   {{"title": "...", "description": "...", "priority": "high|medium|low"}}
 ]"""
         
-        result = generate_with_gemini(prompt, "You are an educational psychologist specializing in dyslexia. Provide practical learning recommendations. Respond with valid JSON only.")
+        result = await generate_with_gemini(prompt, "You are an educational psychologist specializing in dyslexia. Provide practical learning recommendations. Respond with valid JSON only.")
         
         try:
             json_start = result.find('[')
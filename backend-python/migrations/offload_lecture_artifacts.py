@@ -0,0 +1,137 @@
+"""
+Move the large outputs of existing lecture documents into the artifact blob
+store (app/services/lecture_artifacts.py), or back inline with --inline.
+
+    ARTIFACT_STORE=gcs python -m migrations.offload_lecture_artifacts --dry-run
+    ARTIFACT_STORE=gcs python -m migrations.offload_lecture_artifacts [--limit 500] [--concurrency 8]
+    ARTIFACT_STORE=gcs python -m migrations.offload_lecture_artifacts --inline    # roll back
+
+Uses the same Firestore settings as the app. Safe to rerun: documents that
+are already migrated are skipped, and blob keys are content hashes, so a
+retried upload overwrites identical data. Lectures that are queued or being
+processed are skipped because their outputs are about to be rewritten (new
+outputs are offloaded by the app itself); run again later for those.
+Documents without createdAt are not visited.
+"""
+
+import argparse
+import asyncio
+import json
+from typing import Dict, List
+
+from app.services.blob_store import get_blob_store
+from app.services.job_queue import QUEUED, RUNNING
+from app.services.lecture_artifacts import (
+    ARTIFACT_FIELDS,
+    ARTIFACT_MIN_BYTES,
+    hydrate,
+    offload_fields,
+    references,
+)
+from app.services.repositories import get_batcher, lectures
+
+
+def _busy(doc: dict) -> bool:
+    return (doc.get("processingStatus") or {}).get("state") in (QUEUED, RUNNING)
+
+
+def _field_bytes(doc: dict, names) -> int:
+    return sum(len(doc[name].encode("utf-8")) for name in names if isinstance(doc.get(name), str))
+
+
+async def offload(doc: dict, dry_run: bool, totals: Dict[str, int]) -> None:
+    refs = references(doc)
+    inline = {
+        name: doc[name] for name in ARTIFACT_FIELDS
+        if name not in refs and isinstance(doc.get(name), str)
+        and len(doc[name].encode("utf-8")) >= ARTIFACT_MIN_BYTES
+    }
+    if not inline:
+        totals["skipped"] += 1
+        return
+    totals["bytesBefore"] += _field_bytes(doc, inline)
+    if dry_run:
+        totals["migrated"] += 1
+        return
+    update = await offload_fields(doc["id"], inline)
+    await lectures.update(doc["id"], update)
+    totals["bytesAfter"] += _field_bytes(update, inline)
+    totals["blobBytes"] += sum(update[f"artifacts.{name}"]["storedBytes"] for name in inline)
+    totals["migrated"] += 1
+
+
+async def restore(doc: dict, dry_run: bool, totals: Dict[str, int]) -> None:
+    refs = references(doc)
+    if not refs:
+        totals["skipped"] += 1
+        return
+    totals["bytesBefore"] += _field_bytes(doc, refs)
+    if dry_run:
+        totals["migrated"] += 1
+        return
+    await hydrate(doc, refs)
+    if doc.get("artifactErrors"):
+        print(f"⚠️ {doc['id']}: not restored, could not load {sorted(doc['artifactErrors'])}")
+        totals["failed"] += 1
+        return
+    update = {name: doc[name] for name in refs}
+    update.update({f"artifacts.{name}": None for name in refs})
+    await lectures.update(doc["id"], update)
+    store = get_blob_store()
+    for name in refs:
+        await store.delete_prefix(f"lectures/{doc['id']}/{name}/")
+    totals["bytesAfter"] += _field_bytes(update, refs)
+    totals["migrated"] += 1
+
+
+async def main_async(args) -> dict:
+    if get_blob_store() is None:
+        raise SystemExit("Set ARTIFACT_STORE to local or gcs first (it is inline)")
+    migrate = restore if args.inline else offload
+    totals = {"seen": 0, "migrated": 0, "skipped": 0, "busy": 0, "failed": 0,
+              "bytesBefore": 0, "bytesAfter": 0, "blobBytes": 0}
+
+    async def one(doc: dict) -> None:
+        try:
+            await migrate(doc, args.dry_run, totals)
+        except Exception as e:
+            print(f"❌ {doc['id']}: {e}")
+            totals["failed"] += 1
+
+    batch: List[dict] = []
+    async for doc in lectures.iter_all([], "createdAt", page_size=args.page_size):
+        if args.limit and totals["seen"] >= args.limit:
+            break
+        totals["seen"] += 1
+        if _busy(doc):
+            totals["busy"] += 1
+            continue
+        batch.append(doc)
+        if len(batch) >= args.concurrency:
+            await asyncio.gather(*(one(d) for d in batch))
+            batch = []
+    await asyncio.gather(*(one(d) for d in batch))
+    print(f"{'Would migrate' if args.dry_run else 'Migrated'} {totals['migrated']} of {totals['seen']} lectures "
+          f"({totals['busy']} busy, {totals['failed']} failed); "
+          f"document text {totals['bytesBefore'] / 1024:.0f} KiB -> {totals['bytesAfter'] / 1024:.0f} KiB")
+    totals["batcher"] = get_batcher().stats()
+    return totals
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--dry-run", action="store_true", help="count what would move, write nothing")
+    parser.add_argument("--inline", action="store_true", help="move offloaded outputs back into the documents")
+    parser.add_argument("--limit", type=int, default=0, help="stop after this many lectures (0 = all)")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--page-size", type=int, default=100)
+    parser.add_argument("--out", help="write the totals as JSON")
+    args = parser.parse_args()
+    totals = asyncio.run(main_async(args))
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(totals, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -65,9 +65,10 @@ export async function getLatestLecture(userId) {
 }
 
 /**
- * Process lecture transcription through Gemini AI
+ * Process lecture transcription through Gemini AI.
+ * The backend queues a job and returns a job ID; poll it until the outputs are ready.
  */
-export async function processLecture(lectureId) {
+export async function processLecture(lectureId, { pollIntervalMs = 2000, onProgress } = {}) {
   try {
     const response = await fetch(`${API_BASE_URL}/lectures/${lectureId}/process`, {
       method: 'POST',
@@ -80,7 +81,24 @@ export async function processLecture(lectureId) {
       throw new Error(`Failed to process lecture: ${response.statusText}`);
     }
 
-    return await response.json();
+    const { jobId } = await response.json();
+
+    while (true) {
+      await new Promise((resolve) => setTimeout(resolve, pollIntervalMs));
+
+      const statusResponse = await fetch(`${API_BASE_URL}/jobs/${jobId}`);
+      if (!statusResponse.ok) {
+        throw new Error(`Failed to get processing status: ${statusResponse.statusText}`);
+      }
+
+      const job = await statusResponse.json();
+      if (onProgress) onProgress(job.progress);
+
+      if (job.status === 'completed') return job.result;
+      if (job.status === 'failed') {
+        throw new Error(`Failed to process lecture: ${job.error || 'Unknown error'}`);
+      }
+    }
   } catch (error) {
     console.error('Error processing lecture:', error);
     throw error;